@@ -0,0 +1,54 @@
+from analysistools.FactorialDataFrame import FactorialDataFrame
+from time import time
+import configparser as cp
+import texttable as tt
+import json
+
+
+config = cp.ConfigParser()
+config.read("settings.ini")
+
+
+def print_effect_table(statistic_name, effect_data):
+    result_table = tt.Texttable()
+    result_table.header(["Effect", "Value", "Confidence interval", "Variation explained [%]", "Significant"])
+    result_table.set_cols_dtype(["t", "t", "t", "t", "t"])
+
+    for effect_label, effect, error, variation_fraction, significant in effect_data:
+        if effect_label == "Error":
+            result_table.add_row([effect_label, "", "", "%.2f" % (variation_fraction*100), ""])
+            continue
+
+        confidence_interval = "[%.4f, %.4f]" % (effect-error, effect+error)
+        variation = "" if variation_fraction is None else "%.2f" % (variation_fraction*100)
+        result_table.add_row([effect_label, "%.4f" % effect, confidence_interval, variation, "yes" if significant else "no"])
+
+    print("************* " + statistic_name + " *************")
+    print(result_table.draw())
+
+
+def main():
+    factor_list = json.loads(config.get("Analysis", "factor_list"))
+    statistic_list = json.loads(config.get("Analysis", "statistic_list"))
+    confidence_level = config["Analysis"].getfloat("confidence_level")
+    dataframe = FactorialDataFrame(config["General"]["working_csv"], factor_list)
+
+    '''************* DATA ANALYSIS *************'''
+    start_time = time()
+
+    effect_data = dataframe.get_effects(confidence_level, statistic_list)
+    #sign_table = dataframe.get_sign_table()
+
+    print("Data analysis completed")
+    print("--- %s seconds ---" % (time() - start_time))
+
+    '''************* RESULTS *************'''
+
+    #print(sign_table)
+
+    for statistic_name in effect_data.keys():
+        print_effect_table(statistic_name, effect_data[statistic_name])
+
+
+if __name__ == "__main__":
+    main()
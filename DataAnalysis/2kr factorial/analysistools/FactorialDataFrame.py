@@ -0,0 +1,207 @@
+from sharedtools.ResultReader import get_file_compression
+import pandas as pd
+import numpy as np
+import scipy.stats
+
+
+class FactorialDataFrame:
+    def __init__(self, file_name, factor_list):
+        self.factor_list = factor_list
+        self.number_factors = len(factor_list)
+
+        csv_data = pd.read_csv(file_name, compression=get_file_compression(file_name), low_memory=False)
+        self.statistic_dataframe = self.__build_dataframe(csv_data)
+        self.sign_table, self.effect_label_list = self.__build_sign_table()
+        self.statistic_list, self.response_tensor = self.__build_response_tensor()
+
+    '''
+    Converts a time expressed as in the Omnet++ configuration (e.g. "30s", "1.5min", "2h", "5d") in seconds.
+    Values without a time unit are simply converted to float.
+    '''
+    def __convert_to_seconds(self, time_string):
+        unit_multiplier = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+
+        for unit in sorted(unit_multiplier, key=len, reverse=True):
+            if time_string.endswith(unit):
+                return float(time_string[:-len(unit)])*unit_multiplier[unit]
+
+        return float(time_string)
+
+    '''
+    Given an Omnet++ exported CSV file, it returns a dataframe in a suitable format for a factorial analysis.
+    Each row contains the response of a single repetition for a statistic, i.e. the mean of a vector or the value
+    of a scalar. The dataframe has columns: ['run' <factor_list> 'repetition' 'statistic' 'response'].
+    The factor columns contain the level of each factor in the run, expressed as -1 (low level) or +1 (high level).
+    '''
+    def __build_dataframe(self, csv_data):
+        attribute_rows = csv_data[csv_data["attrname"].isin(self.factor_list + ["repetition"])]
+        attribute_dataframe = attribute_rows.pivot(index="run", columns="attrname", values="attrvalue").reset_index()
+
+        for factor in self.factor_list:
+            if factor not in attribute_dataframe.columns:
+                exit("ERROR: the factor " + factor + " is not an attribute of the runs in the CSV file")
+
+            factor_value = attribute_dataframe[factor].map(self.__convert_to_seconds)
+            factor_levels = np.unique(factor_value)
+            if len(factor_levels) != 2:
+                exit("ERROR: the factor " + factor + " must have exactly two levels, found " + str(len(factor_levels)))
+
+            attribute_dataframe[factor] = np.where(factor_value == factor_levels[1], 1, -1)
+
+        vector_rows = csv_data[["run", "name", "vecvalue"]].dropna()
+        vector_rows = vector_rows.assign(response=[np.mean(np.array(vecvalue.split(), dtype=np.float64)) for vecvalue in vector_rows["vecvalue"]])
+
+        response_dataframe = vector_rows[["run", "name", "response"]]
+        if "value" in csv_data.columns:
+            scalar_rows = csv_data[["run", "name", "value"]].dropna()
+            scalar_rows = scalar_rows.rename(columns={"value": "response"})
+            response_dataframe = pd.concat([response_dataframe, scalar_rows], ignore_index=True)
+        response_dataframe = response_dataframe.rename(columns={"name": "statistic"})
+
+        final_dataframe = attribute_dataframe.merge(response_dataframe, left_on="run", right_on="run", validate="one_to_many")
+        final_dataframe["repetition"] = pd.to_numeric(final_dataframe["repetition"])
+        final_dataframe["response"] = pd.to_numeric(final_dataframe["response"])
+
+        return final_dataframe
+
+    '''
+    Builds the sign table of a 2^k design, where k is the number of factors.
+    Returns a tuple (sign_table, effect_label_list), where:
+    1) sign_table is a 2^k x 2^k matrix: the row i is the i-th experiment, in which the factor j is at the high level
+       if the bit j of i is set; the column m is the effect identified by the set of factors in the bitmask m
+       (column 0 is the identity I, used to compute the mean);
+    2) effect_label_list contains the name of each column, e.g. "NOP", "VOP*CASH".
+    '''
+    def __build_sign_table(self):
+        number_experiments = 2**self.number_factors
+        experiment_index = np.arange(number_experiments)
+
+        factor_sign = np.where((experiment_index[:, np.newaxis] >> np.arange(self.number_factors)) & 1, 1, -1)
+        effect_mask = np.arange(number_experiments)
+        effect_membership = (effect_mask[:, np.newaxis] >> np.arange(self.number_factors)) & 1
+
+        # The sign of an interaction is the product of the signs of its factors (factors not involved count as +1)
+        sign_table = np.prod(np.where(effect_membership[np.newaxis, :, :] == 1, factor_sign[:, np.newaxis, :], 1), axis=2)
+
+        effect_label_list = []
+        for mask in effect_mask:
+            involved_factors = [self.factor_list[j] for j in range(self.number_factors) if (mask >> j) & 1]
+            effect_label_list.append("*".join(involved_factors) if involved_factors else "I")
+
+        return sign_table, effect_label_list
+
+    '''
+    Arranges the responses in a tensor with shape (2^k experiments, r repetitions, number of statistics), where the
+    experiments follow the order of the rows of the sign table.
+    Only the repetitions available for every experiment and statistic are kept, so that the design is balanced.
+    Returns a tuple (statistic_list, response_tensor).
+    '''
+    def __build_response_tensor(self):
+        experiment_index = np.zeros(len(self.statistic_dataframe), dtype=np.int64)
+        for j, factor in enumerate(self.factor_list):
+            experiment_index += (self.statistic_dataframe[factor].to_numpy() == 1).astype(np.int64) << j
+
+        indexed_dataframe = self.statistic_dataframe.assign(experiment=experiment_index)
+        response_pivot = indexed_dataframe.pivot_table(index=["experiment", "repetition"], columns="statistic", values="response", aggfunc="first")
+
+        complete_pivot = response_pivot.dropna(axis=0, how="any")
+        repetitions_per_experiment = complete_pivot.groupby(level="experiment").size()
+        number_experiments = 2**self.number_factors
+
+        if len(repetitions_per_experiment) != number_experiments:
+            exit("ERROR: the CSV file does not contain all the " + str(number_experiments) + " experiments of the design")
+
+        number_repetitions = int(repetitions_per_experiment.min())
+        if (repetitions_per_experiment != number_repetitions).any() or len(complete_pivot) != len(response_pivot):
+            print("WARNING: the design is not balanced, only " + str(number_repetitions) + " repetitions per experiment are used")
+
+        if number_repetitions < 2:
+            exit("ERROR: at least two repetitions per experiment are needed to estimate the experimental error")
+
+        balanced_pivot = complete_pivot.groupby(level="experiment").head(number_repetitions).sort_index()
+        response_tensor = balanced_pivot.to_numpy(dtype=np.float64).reshape(number_experiments, number_repetitions, -1)
+
+        return balanced_pivot.columns.tolist(), response_tensor
+
+    '''
+    Performs the 2^k*r factorial analysis for all the statistics at once.
+    Returns a tuple (effect_matrix, error_vector, variation_matrix, error_variation_vector), where:
+    1) effect_matrix[m][s] is the effect q_m of the column m of the sign table on the statistic s (q_0 is the mean);
+    2) error_vector[s] is such that the confidence interval of each effect is [q - error, q + error];
+       it is computed with the Student's t distribution with 2^k(r-1) degrees of freedom;
+    3) variation_matrix[m][s] is the fraction of the total variation SST explained by the effect m (m > 0);
+    4) error_variation_vector[s] is the fraction of SST due to the experimental errors (SSE/SST).
+    '''
+    def __compute_factorial_analysis(self, confidence_level):
+        number_experiments, number_repetitions, number_statistics = self.response_tensor.shape
+
+        experiment_mean = np.mean(self.response_tensor, axis=1, dtype=np.float64)
+        effect_matrix = (self.sign_table.T @ experiment_mean)/number_experiments
+
+        grand_mean = effect_matrix[0]
+        total_variation = np.sum((self.response_tensor - grand_mean[np.newaxis, np.newaxis, :])**2, axis=(0, 1))
+        error_variation = np.sum((self.response_tensor - experiment_mean[:, np.newaxis, :])**2, axis=(0, 1))
+        effect_variation = number_experiments*number_repetitions*effect_matrix**2
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variation_matrix = effect_variation/total_variation
+            error_variation_vector = error_variation/total_variation
+        variation_matrix[0] = np.nan  # The mean does not explain any variation
+
+        alpha = 1 - confidence_level
+        degrees_of_freedom = number_experiments*(number_repetitions - 1)
+        error_std = np.sqrt(error_variation/degrees_of_freedom)
+        error_vector = scipy.stats.t.ppf(1 - alpha/2, df=degrees_of_freedom)*error_std/np.sqrt(number_experiments*number_repetitions)
+
+        return effect_matrix, error_vector, variation_matrix, error_variation_vector
+
+
+    # PUBLIC INTERFACE
+
+    '''
+    Returns the sign table of the design in the form of a dataframe, where each row is an experiment and each column
+    an effect (the identity I, the main effects and all the interactions).
+    '''
+    def get_sign_table(self):
+        return pd.DataFrame(self.sign_table, columns=self.effect_label_list)
+
+    '''
+    Computes the effects of the factors and of their interactions, together with their confidence intervals and the
+    allocation of variation, for all the statistics in statistic_list (all the available statistics if None).
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples with the format
+    (effect_label, effect, error, variation_fraction, significant), where:
+    1) the error is such that the confidence interval is [effect-error, effect+error];
+    2) variation_fraction is the fraction of the total variation explained by the effect (None for the mean "I");
+    3) significant is True if the confidence interval does not include zero.
+    The last tuple of each list has effect_label "Error" and contains only the fraction of variation due to
+    the experimental errors.
+    '''
+    def get_effects(self, confidence_level, statistic_list=None):
+        effect_matrix, error_vector, variation_matrix, error_variation_vector = self.__compute_factorial_analysis(confidence_level)
+
+        if statistic_list is None or len(statistic_list) == 0:
+            statistic_list = self.statistic_list
+
+        effect_dict = dict()
+        for statistic_name in statistic_list:
+            if statistic_name not in self.statistic_list:
+                exit("ERROR: the statistic " + statistic_name + " is not available in the CSV file")
+
+            s = self.statistic_list.index(statistic_name)
+            effect_data = []
+
+            for m, effect_label in enumerate(self.effect_label_list):
+                variation_fraction = None if m == 0 else variation_matrix[m][s]
+                significant = abs(effect_matrix[m][s]) > error_vector[s]
+                effect_data.append((effect_label, effect_matrix[m][s], error_vector[s], variation_fraction, significant))
+
+            effect_data.append(("Error", None, None, error_variation_vector[s], None))
+            effect_dict[statistic_name] = effect_data
+
+        return effect_dict
+
+    '''
+    Returns the list of the statistics (responses) available for the analysis.
+    '''
+    def get_statistic_list(self):
+        return list(self.statistic_list)
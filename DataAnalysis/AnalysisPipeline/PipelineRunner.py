@@ -0,0 +1,436 @@
+from TaskGraph import TaskGraph
+from pprint import pprint
+from time import time
+import configparser as cp
+import numpy as np
+import threading
+import importlib
+import hashlib
+import glob
+import json
+import sys
+import os
+
+
+config = cp.ConfigParser()
+config.read("settings.ini")
+
+DATA_ANALYSIS_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Queries of StatisticDataFrame (WaitingResponseTimes): analysis name -> (method name, job parameters passed to the
+# method, fixed arguments, True if the query is based on the sorted observations of each (statistic, cashier) group)
+WAITING_RESPONSE_ANALYSIS = {
+    "ECDF": ("get_ECDF_data", ["confidence_level"], dict(), False),
+    "ECDF_no_error": ("get_ECDF_data", [], {"confidence_level": None}, True),
+    "ECDF_grid": ("get_ECDF_grid_data", ["x_grid", "confidence_level"], dict(), False),
+    "quantile_grid": ("get_quantile_grid_data", ["x_grid", "probability_levels", "confidence_level"], dict(), False),
+    "Lorenz_curve": ("get_Lorenz_Curve_data", ["confidence_level"], dict(), True),
+    "inequality_indices": ("get_inequality_indices", ["confidence_level"], dict(), True),
+    "histogram": ("get_histogram_data", ["number_bins"], dict(), True),
+    "sample_mean": ("get_sample_mean", ["confidence_level"], dict(), False),
+    "sample_mean_corrected": ("get_sample_mean", ["confidence_level", "max_lag"], {"autocorrelation_correction": True}, False),
+    "sample_mean_control_variate": ("get_sample_mean_control_variate", ["confidence_level", "vip_interarrival_time", "normal_interarrival_time"], dict(), False),
+    "autocorrelation": ("get_autocorrelation_diagnostics", ["max_lag"], dict(), False),
+    "sample_median": ("get_sample_median", ["confidence_level"], dict(), True),
+    "sample_coefficient_of_variation": ("get_sample_coefficient_of_variation", [], dict(), True),
+    "qq_plot": ("get_qq_plot_data", ["qq_parameters"], dict(), True),
+}
+
+# Queries of StatisticDataFrame (VipNormalQueue): analysis name -> (method name, job parameters passed to the method)
+VIP_NORMAL_ANALYSIS = {
+    "sample_mean": ("get_sample_mean", ["confidence_level"]),
+    "index_of_dispersion": ("get_index_of_dispersion", []),
+    "sample_quantile": ("get_sample_quantile", ["quantile_number", "confidence_level"]),
+    "histogram": ("get_histogram_data", ["bins", "time_weighted"]),
+    "qq_plot": ("get_qq_plot_data", ["qq_parameters"]),
+    "paired_differences": ("get_all_paired_differences", ["confidence_level"]),
+    "loss_probability": ("get_loss_probability", ["confidence_level"]),
+    "windowed_loss_probability": ("get_windowed_loss_probability", ["window_length", "confidence_level"]),
+    "queue_dimensioning": ("get_queue_dimensioning", ["overflow_probability", "confidence_level"]),
+}
+
+# Analyses whose results are printed at the end of the run
+REPORT_ANALYSIS_LIST = ["sample_mean", "sample_mean_corrected", "sample_mean_control_variate", "sample_median",
+                        "sample_coefficient_of_variation", "inequality_indices", "index_of_dispersion", "sample_quantile", "paired_differences",
+                        "loss_probability", "queue_dimensioning"]
+
+# Readers of the parameters of a job section; qq_parameters is a dictionary of keyword arguments of get_qq_plot_data
+PARAMETER_READER = {
+    "confidence_level": lambda job_config: job_config.getfloat("confidence_level"),
+    "x_grid": lambda job_config: np.arange(*json.loads(job_config["ECDF_grid"])),
+    "probability_levels": lambda job_config: json.loads(job_config["probability_levels"]),
+    "number_bins": lambda job_config: job_config.getint("number_bins"),
+    "max_lag": lambda job_config: job_config.getint("max_lag"),
+    "vip_interarrival_time": lambda job_config: job_config["vip_interarrival_time"],
+    "normal_interarrival_time": lambda job_config: job_config["normal_interarrival_time"],
+    "qq_parameters": lambda job_config: json.loads(job_config["qq_parameters"]),
+    "quantile_number": lambda job_config: job_config.getfloat("quantile_number"),
+    "bins": lambda job_config: np.arange(*json.loads(job_config["histogram_bins"])),
+    "time_weighted": lambda job_config: job_config.getboolean("time_weighted_histogram"),
+    "window_length": lambda job_config: job_config["loss_window_length"],
+    "overflow_probability": lambda job_config: job_config.getfloat("overflow_probability"),
+}
+
+
+'''
+Returns the keyword arguments of a query: the job parameters in parameter_list (qq_parameters is expanded) and the
+fixed arguments.
+'''
+def get_query_arguments(job_config, parameter_list, fixed_argument_dict=None):
+    argument_dict = dict() if fixed_argument_dict is None else dict(fixed_argument_dict)
+
+    for parameter_name in parameter_list:
+        if parameter_name == "qq_parameters":
+            argument_dict.update(PARAMETER_READER[parameter_name](job_config))
+        else:
+            argument_dict[parameter_name] = PARAMETER_READER[parameter_name](job_config)
+
+    return argument_dict
+
+
+'''
+Returns the signature of the input files (absolute path, size and modification time), which identifies the version of
+the data loaded from them.
+'''
+def get_source_signature(file_list):
+    signature_list = []
+
+    for file_name in file_list:
+        if not os.path.exists(file_name):
+            exit("ERROR: the input file " + file_name + " does not exist")
+        file_stat = os.stat(file_name)
+        signature_list.append((file_name, file_stat.st_size, file_stat.st_mtime_ns))
+
+    return signature_list
+
+
+'''
+Returns the digest of the sources of a tool (its analysistools package) and of the shared packages (sharedtools), which
+identifies the version of the code computing the results: a change of the code invalidates the persisted results.
+'''
+def get_code_version(tool_directory):
+    source_digest = hashlib.sha256()
+
+    for source_directory in [os.path.join(DATA_ANALYSIS_DIRECTORY, tool_directory, "analysistools"),
+                             os.path.join(DATA_ANALYSIS_DIRECTORY, "sharedtools")]:
+        for file_name in sorted(glob.glob(os.path.join(source_directory, "*.py"))):
+            source_digest.update(os.path.basename(file_name).encode("utf-8"))
+            with open(file_name, "rb") as source_file:
+                source_digest.update(source_file.read())
+
+    return source_digest.hexdigest()
+
+
+'''
+Converts a time expressed as in the Omnet++ configuration (e.g. "30s", "1.5min", "2h", "5d") in seconds.
+'''
+def convert_to_seconds(time_string):
+    unit_multiplier = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+
+    for unit in sorted(unit_multiplier, key=len, reverse=True):
+        if time_string.endswith(unit):
+            return float(time_string[:-len(unit)])*unit_multiplier[unit]
+
+    return float(time_string)
+
+
+'''
+Saves a plot in the export directory, closes its figure and returns the name of the image.
+'''
+def save_plot(plot, export_directory, file_name, image_format):
+    plot.to_image(directory=export_directory, file_name=file_name, image_format=image_format)
+    plot.figure.clf()
+    import matplotlib.pyplot as plt
+    plt.close(plot.figure)
+
+    return os.path.join(export_directory, file_name + "." + image_format)
+
+
+'''
+Plots an analysis of one statistic of WaitingResponseTimes, as the plot functions of its Main.py: the histograms and
+the qq plots have a figure for each cashier value, the other analyses a single figure with a line for each one.
+Returns the list of the saved images.
+'''
+def plot_waiting_response(PlotBuilder, plot_name, statistic_data, x_axis_name, file_name, export_directory, image_format):
+    plot_profile = {"ECDF": "ecdf", "ECDF_no_error": "ecdf", "ECDF_grid": "ecdf_grid", "Lorenz_curve": "lorenz",
+                    "histogram": "histogram", "qq_plot": "qq"}[plot_name]
+    y_axis_name = {"ecdf": "Probability", "ecdf_grid": "Probability", "lorenz": "", "histogram": "Frequency", "qq": "Theoretical quantile"}[plot_profile]
+    image_list = []
+    plot = None
+
+    for color_index, line_data in enumerate(statistic_data):
+        if plot is None:
+            plot = PlotBuilder(plot_profile=plot_profile)
+            plot.set_axes_label(x_axis_name, y_axis_name)
+            color_list = json.loads(plot.config.get("Plot_Profile", "color_list"))
+
+        if plot_profile == "ecdf":
+            plot.add_plot_line(line_data[0], line_data[1], line_data[2], x_error_bar=line_data[3], color=color_list[color_index])
+        elif plot_profile == "ecdf_grid":
+            plot.add_plot_line(line_data[0], line_data[1], line_data[2], y_error_bar=line_data[4], color=color_list[color_index])
+        elif plot_profile == "lorenz":
+            plot.add_plot_line(line_data[0], line_data[1], line_data[2], y_error_bar=line_data[3], color=color_list[color_index])
+        elif plot_profile == "histogram":
+            plot.add_plot_line(line_data[0], line_data[1], line_data[2], color=color_list[color_index])
+        else:
+            plot.add_plot_line(line_data[0], line_data[1], line_data[2], regression_x=line_data[3], regression_y=line_data[4], color=color_list[color_index])
+
+        if plot_profile in ["histogram", "qq"]:
+            image_list.append(save_plot(plot, export_directory, file_name + "_" + str(color_index), image_format))
+            plot = None
+
+    if plot is not None:
+        image_list.append(save_plot(plot, export_directory, file_name, image_format))
+
+    return image_list
+
+
+'''
+Plots an analysis of one customer category of VipNormalQueue, as the plot functions of its Main.py: the estimates
+(sample mean, index of dispersion, sample quantile) are compared in a single figure with a line for each customer
+level, the histograms and the qq plots have a figure for each scenario. Returns the list of the saved images.
+'''
+def plot_vip_normal(PlotBuilder, plot_name, analysis_data, cashier_level, y_axis_name, file_name, export_directory, image_format):
+    image_list = []
+
+    if plot_name in ["sample_mean", "index_of_dispersion", "sample_quantile"]:
+        plot = PlotBuilder(plot_profile="comparison")
+        plot.set_axes_label('$T_{CASHIER} [min]$', y_axis_name)
+        color_list = json.loads(plot.config.get("Plot_Profile", "color_list"))
+        x_axis_value = [convert_to_seconds(cashier_time)/60 for cashier_time in cashier_level]
+        cashier_data = [analysis_data[r'$T_{CASHIER} = ' + cashier_time + '$'] for cashier_time in cashier_level]
+
+        for customer_index in range(len(cashier_data[0])):
+            customer_series = [customer_data[customer_index] for customer_data in cashier_data]
+            y_error_bar = None
+            if len(customer_series[0]) > 2:
+                y_error_bar = np.array([[estimate[2] for estimate in customer_series], [estimate[3] for estimate in customer_series]])
+            plot.add_plot_line(customer_series[0][0], x_axis_value, [estimate[1] for estimate in customer_series],
+                               y_error_bar=y_error_bar, marker="^", color=color_list[customer_index])
+
+        return [save_plot(plot, export_directory, file_name, image_format)]
+
+    for cashier_index, (cashier_label, customer_data) in enumerate(analysis_data.items()):
+        color_list = None
+        for customer_index, line_data in enumerate(customer_data):
+            plot = PlotBuilder(plot_profile="histogram" if plot_name == "histogram" else "qq")
+            plot.set_axes_label(y_axis_name + " (" + cashier_label + ")", "Frequency" if plot_name == "histogram" else "Theoretical quantiles")
+            color_list = color_list or json.loads(plot.config.get("Plot_Profile", "color_list"))
+
+            if plot_name == "histogram":
+                plot.add_plot_line(line_data[0], line_data[1], line_data[2], color=color_list[customer_index])
+            else:
+                plot.add_plot_line(line_data[0], line_data[1], line_data[2], regression_x=line_data[3], regression_y=line_data[4], color=color_list[customer_index])
+            image_list.append(save_plot(plot, export_directory, file_name + "_" + str(cashier_index) + "_" + str(customer_index), image_format))
+
+    return image_list
+
+
+'''
+Adds to the graph the tasks of a WaitingResponseTimes job: the results are loaded, the rows of each statistic are
+indexed and the observations of each (statistic, cashier) group are sorted once, shared by all the queries (and by
+the jobs with the same input files); each query is computed separately for each statistic.
+Returns a dictionary {analysis_name: [task_name of each statistic]}.
+'''
+def add_waiting_response_job(graph, tool_module_dict, job_name, job_config, export_directory, image_format):
+    StatisticDataFrame, PlotBuilder = tool_module_dict["StatisticDataFrame"], tool_module_dict["PlotBuilder"]
+    input_list = [os.path.abspath(file_name) for file_name in json.loads(job_config["input_list"])]
+    statistic_list = json.loads(job_config["statistic_list"])
+    cashier_level = json.loads(job_config["cashier_level"])
+
+    def load(file_list):
+        dataframe = StatisticDataFrame(file_list[0])
+        for file_name in file_list[1:]:
+            dataframe.append_results(file_name)
+        return dataframe
+
+    def build_index(dataframe, statistic_name):
+        dataframe.build_statistic_index([statistic_name])
+        return dataframe
+
+    def sort_observations(dataframe, statistic_name, cashier_value):
+        dataframe.sort_observations([statistic_name], [cashier_value])
+        return dataframe
+
+    load_task = "WaitingResponseTimes/load/" + ";".join(input_list)
+    if load_task not in graph.task_dict:
+        graph.add_task(load_task, lambda: load(input_list),
+                       source_signature=(get_code_version("WaitingResponseTimes"), get_source_signature(input_list)))
+
+    index_task_dict, sort_task_dict = dict(), dict()
+    for statistic_name in statistic_list:
+        index_task = load_task + "/index/" + statistic_name
+        if index_task not in graph.task_dict:
+            graph.add_task(index_task, lambda dataframe, statistic_name=statistic_name: build_index(dataframe, statistic_name), [load_task])
+        index_task_dict[statistic_name] = index_task
+
+        sort_task_dict[statistic_name] = []
+        for cashier_value in cashier_level:
+            sort_task = index_task + "/sort/" + cashier_value
+            if sort_task not in graph.task_dict:
+                graph.add_task(sort_task, lambda dataframe, statistic_name=statistic_name, cashier_value=cashier_value:
+                               sort_observations(dataframe, statistic_name, cashier_value), [index_task])
+            sort_task_dict[statistic_name].append(sort_task)
+
+    analysis_task_dict = dict()
+    for analysis_name in json.loads(job_config["analysis_list"]):
+        if analysis_name not in WAITING_RESPONSE_ANALYSIS:
+            exit("ERROR: the analysis " + analysis_name + " is not one of " + str(list(WAITING_RESPONSE_ANALYSIS)))
+        method_name, parameter_list, fixed_argument_dict, uses_sorted_observations = WAITING_RESPONSE_ANALYSIS[analysis_name]
+        argument_dict = get_query_arguments(job_config, parameter_list, fixed_argument_dict)
+
+        analysis_task_dict[analysis_name] = []
+        for statistic_name in statistic_list:
+            dependency_list = [index_task_dict[statistic_name]] + (sort_task_dict[statistic_name] if uses_sorted_observations else [])
+            analysis_task_dict[analysis_name].append(graph.add_task(
+                job_name + "/" + analysis_name + "/" + statistic_name,
+                lambda dataframe, *sorted_groups, method_name=method_name, statistic_name=statistic_name, argument_dict=argument_dict:
+                    getattr(dataframe, method_name)([statistic_name], cashier_level, **argument_dict),
+                dependency_list, parameters=(method_name, cashier_level, argument_dict), persistent=True))
+
+    for plot_name in json.loads(job_config["plot_list"]):
+        if plot_name not in analysis_task_dict:
+            exit("ERROR: the plot " + plot_name + " of the job " + job_name + " is not in its analysis_list")
+
+        for statistic_name, analysis_task in zip(statistic_list, analysis_task_dict[plot_name]):
+            file_name = job_name + "_" + plot_name + "_" + statistic_name
+            graph.add_task(job_name + "/plot/" + plot_name + "/" + statistic_name,
+                           lambda analysis_data, plot_name=plot_name, statistic_name=statistic_name, file_name=file_name:
+                               plot_waiting_response(PlotBuilder, plot_name, analysis_data[statistic_name], statistic_name, file_name, export_directory, image_format),
+                           [analysis_task], parameters=(export_directory, image_format), persistent=True, main_thread=True,
+                           is_valid=lambda image_list: all(os.path.exists(image_name) for image_name in image_list))
+
+    return analysis_task_dict
+
+
+'''
+Adds to the graph the tasks of a VipNormalQueue job: the results are loaded once (shared by the jobs with the same input
+files) and each query is computed separately for each customer category. The category is a state of the dataframe,
+so the queries on the same dataframe are serialized.
+Returns a dictionary {analysis_name: [task_name of each customer category]}.
+'''
+def add_vip_normal_job(graph, tool_module_dict, job_name, job_config, export_directory, image_format, lock_dict):
+    StatisticDataFrame, PlotBuilder = tool_module_dict["StatisticDataFrame"], tool_module_dict["PlotBuilder"]
+    source_dict = json.loads(job_config["input_list"])
+    if not isinstance(source_dict, dict):
+        source_dict = {os.path.splitext(os.path.basename(file_name))[0]: file_name for file_name in source_dict}
+    source_dict = {source_name: [os.path.abspath(file_name)
+                                 for file_name in ([file_list] if isinstance(file_list, str) else file_list)]
+                   for source_name, file_list in sorted(source_dict.items())}
+    cashier_level = json.loads(job_config["cashier_level"])
+    category_list = json.loads(job_config["customer_category_list"])
+
+    load_task = "VipNormalQueue/load/" + ";".join(file_name for file_list in source_dict.values() for file_name in file_list)
+    if load_task not in graph.task_dict:
+        graph.add_task(load_task, lambda: StatisticDataFrame(source_dict),
+                       source_signature=(get_code_version("VipNormalQueue"),
+                                         get_source_signature([file_name for file_list in source_dict.values() for file_name in file_list])))
+        lock_dict[load_task] = threading.Lock()
+
+    def query(dataframe, method_name, customer_category, customer_level, argument_dict):
+        with lock_dict[load_task]:
+            dataframe.set_customer_category(vip_enabled=customer_category == "vip")
+            return getattr(dataframe, method_name)(cashier_level, customer_level, **argument_dict)
+
+    analysis_task_dict = dict()
+    for analysis_name in json.loads(job_config["analysis_list"]):
+        if analysis_name not in VIP_NORMAL_ANALYSIS:
+            exit("ERROR: the analysis " + analysis_name + " is not one of " + str(list(VIP_NORMAL_ANALYSIS)))
+        method_name, parameter_list = VIP_NORMAL_ANALYSIS[analysis_name]
+        argument_dict = get_query_arguments(job_config, parameter_list)
+
+        analysis_task_dict[analysis_name] = []
+        for customer_category in category_list:
+            customer_level = json.loads(job_config[customer_category + "_level"])
+            analysis_task_dict[analysis_name].append(graph.add_task(
+                job_name + "/" + analysis_name + "/" + customer_category,
+                lambda dataframe, method_name=method_name, customer_category=customer_category, customer_level=customer_level, argument_dict=argument_dict:
+                    query(dataframe, method_name, customer_category, customer_level, argument_dict),
+                [load_task], parameters=(method_name, cashier_level, customer_level, argument_dict), persistent=True))
+
+    for plot_name in json.loads(job_config["plot_list"]):
+        if plot_name not in analysis_task_dict:
+            exit("ERROR: the plot " + plot_name + " of the job " + job_name + " is not in its analysis_list")
+
+        for customer_category, analysis_task in zip(category_list, analysis_task_dict[plot_name]):
+            file_name = job_name + "_" + plot_name + "_" + customer_category
+            y_axis_name = plot_name + " (" + customer_category + ")"
+            graph.add_task(job_name + "/plot/" + plot_name + "/" + customer_category,
+                           lambda analysis_data, plot_name=plot_name, y_axis_name=y_axis_name, file_name=file_name:
+                               plot_vip_normal(PlotBuilder, plot_name, analysis_data, cashier_level, y_axis_name, file_name, export_directory, image_format),
+                           [analysis_task], parameters=(cashier_level, export_directory, image_format), persistent=True, main_thread=True,
+                           is_valid=lambda image_list: all(os.path.exists(image_name) for image_name in image_list))
+
+    return analysis_task_dict
+
+
+'''
+Builds and runs the graph of the jobs of one tool. The tools have packages with the same name (analysistools), so the
+ones of the tool run before are removed from the module cache; the analysistools of the tool read the settings.ini
+in the working directory (plot profiles), so the graph is executed from the directory of the tool.
+Returns a dictionary {job_name: {analysis_name: [results]}}.
+'''
+def run_tool_jobs(tool_directory, job_name_list, state_directory, max_workers, export_directory, image_format):
+    for loaded_module in [name for name in sys.modules if name == "analysistools" or name.startswith("analysistools.")]:
+        del sys.modules[loaded_module]
+
+    working_directory = os.getcwd()
+    tool_path = os.path.join(DATA_ANALYSIS_DIRECTORY, tool_directory)
+    sys.path.insert(0, tool_path)
+    try:
+        tool_module_dict = {module_name: getattr(importlib.import_module("analysistools." + module_name), module_name)
+                            for module_name in ["StatisticDataFrame", "PlotBuilder"]}
+        graph = TaskGraph(state_directory, max_workers)
+        lock_dict = dict()
+        job_task_dict = dict()
+
+        for job_name in job_name_list:
+            if tool_directory == "WaitingResponseTimes":
+                job_task_dict[job_name] = add_waiting_response_job(graph, tool_module_dict, job_name, config[job_name], export_directory, image_format)
+            else:
+                job_task_dict[job_name] = add_vip_normal_job(graph, tool_module_dict, job_name, config[job_name], export_directory, image_format, lock_dict)
+
+        os.chdir(tool_path)
+        result_dict = graph.run()
+    finally:
+        os.chdir(working_directory)
+        sys.path.remove(tool_path)
+
+    return {job_name: {analysis_name: [result_dict[task_name] for task_name in task_list] for analysis_name, task_list in analysis_task_dict.items()}
+            for job_name, analysis_task_dict in job_task_dict.items()}
+
+
+def main():
+    # The plots are only saved, so no window is opened
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    state_directory = os.path.abspath(config["General"]["state_directory"])
+    export_directory = os.path.join(os.path.abspath(config["General"]["export_directory"]), "")
+    os.makedirs(export_directory, exist_ok=True)
+
+    tool_job_dict = dict()
+    for job_name in json.loads(config.get("General", "job_list")):
+        tool_directory = config[job_name]["tool"]
+        if tool_directory not in ["WaitingResponseTimes", "VipNormalQueue"]:
+            exit("ERROR: the tool " + tool_directory + " of the job " + job_name + " is not supported")
+        tool_job_dict.setdefault(tool_directory, []).append(job_name)
+
+    start_time = time()
+    job_result_dict = dict()
+    for tool_directory, job_name_list in tool_job_dict.items():
+        job_result_dict.update(run_tool_jobs(tool_directory, job_name_list, state_directory, config["General"].getint("max_workers"),
+                                             export_directory, config["General"]["image_format"]))
+
+    print("Pipeline completed")
+    print("--- %s seconds ---" % (time() - start_time))
+
+    for job_name, analysis_result_dict in job_result_dict.items():
+        for analysis_name in REPORT_ANALYSIS_LIST:
+            if analysis_name in analysis_result_dict:
+                print("\n" + job_name + ": " + analysis_name)
+                for result in analysis_result_dict[analysis_name]:
+                    pprint(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+import hashlib
+import pickle
+import os
+
+
+'''
+Node of a TaskGraph: function is called with the results of the dependencies (in the given order) and returns the
+result of the task.
+'''
+class Task:
+    def __init__(self, name, function, dependency_list, parameters, source_signature, persistent, main_thread, is_valid):
+        self.name = name
+        self.function = function
+        self.dependency_list = dependency_list
+        self.parameters = parameters
+        self.source_signature = source_signature
+        self.persistent = persistent
+        self.main_thread = main_thread
+        self.is_valid = is_valid
+        self.fingerprint = None
+
+
+'''
+Graph of the tasks of an analysis pipeline (e.g. load -> index -> sort -> estimators -> plots), executed as follows:
+1) the fingerprint of each task is the digest of its name, its parameters, the signature of its sources (e.g. the
+   size and modification time of the input files and the digest of the code reading them) and the fingerprints of its
+   dependencies, so it changes whenever any of its inputs changes;
+2) the results of the persistent tasks are saved in state_directory, one pickle file per fingerprint: a persistent task
+   whose fingerprint has a saved (and still valid) result is not executed again, and neither are the tasks needed
+   only by it. The other tasks are intermediate results, kept in memory only until their last dependent task ends;
+3) each task is executed once, as soon as its dependencies are available: the independent tasks are executed in
+   parallel by max_workers threads, except the ones flagged main_thread (e.g. the plots, since matplotlib is not
+   thread-safe), which are executed by the calling thread.
+'''
+class TaskGraph:
+    def __init__(self, state_directory=None, max_workers=4):
+        self.state_directory = state_directory
+        self.max_workers = max_workers
+        self.task_dict = dict()
+
+        if state_directory is not None:
+            os.makedirs(state_directory, exist_ok=True)
+
+    '''
+    Adds a task and returns its name. The dependencies must have been added before, so the graph is acyclic and the
+    tasks are stored in topological order.
+    '''
+    def add_task(self, name, function, dependency_list=(), parameters=None, source_signature=None, persistent=False,
+                 main_thread=False, is_valid=None):
+        if name in self.task_dict:
+            exit("ERROR: the task " + name + " is defined twice")
+        for dependency_name in dependency_list:
+            if dependency_name not in self.task_dict:
+                exit("ERROR: the dependency " + dependency_name + " of the task " + name + " is not defined")
+
+        task = Task(name, function, list(dependency_list), parameters, source_signature, persistent, main_thread, is_valid)
+        fingerprint_content = (name, parameters, source_signature, [self.task_dict[dependency_name].fingerprint for dependency_name in dependency_list])
+        task.fingerprint = hashlib.sha256(pickle.dumps(fingerprint_content, protocol=4)).hexdigest()
+        self.task_dict[name] = task
+
+        return name
+
+    def __get_path(self, task):
+        return os.path.join(self.state_directory, task.fingerprint + ".pkl")
+
+    def __load_result(self, task):
+        with open(self.__get_path(task), "rb") as state_file:
+            return pickle.load(state_file)
+
+    def __save_result(self, task, result):
+        # Written atomically, so that an interrupted run never leaves a truncated result
+        temporary_path = self.__get_path(task) + ".tmp"
+        with open(temporary_path, "wb") as state_file:
+            pickle.dump(result, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.__get_path(task))
+
+    '''
+    Returns True if the result of the task saved by a previous run can be reused.
+    '''
+    def __is_up_to_date(self, task):
+        if not task.persistent or self.state_directory is None or not os.path.exists(self.__get_path(task)):
+            return False
+
+        return task.is_valid is None or task.is_valid(self.__load_result(task))
+
+    '''
+    Returns the list of the tasks to execute to obtain the results of target_list, in topological order, the list of
+    the up-to-date persistent tasks whose saved result is needed (by a target or by a task to execute) and the list
+    of all the up-to-date tasks.
+    '''
+    def __plan(self, target_list):
+        status_dict = dict()
+
+        def visit(task_name):
+            if task_name in status_dict:
+                return
+            task = self.task_dict[task_name]
+            if self.__is_up_to_date(task):
+                status_dict[task_name] = "reused"
+                return
+
+            status_dict[task_name] = "executed"
+            for dependency_name in task.dependency_list:
+                visit(dependency_name)
+
+        for task_name in target_list:
+            visit(task_name)
+
+        execution_list = [task_name for task_name in self.task_dict if status_dict.get(task_name) == "executed"]
+        needed_list = {dependency_name for task_name in execution_list for dependency_name in self.task_dict[task_name].dependency_list}
+        needed_list.update(target_list)
+        reused_list = [task_name for task_name in self.task_dict if status_dict.get(task_name) == "reused"]
+
+        return execution_list, [task_name for task_name in reused_list if task_name in needed_list], reused_list
+
+    '''
+    Executes the tasks needed to obtain the results of target_list (all the persistent tasks if None) and returns
+    a dictionary {task_name: result} with the results of the targets. A summary of the executed and reused tasks
+    is printed at the end.
+    '''
+    def run(self, target_list=None):
+        if target_list is None:
+            target_list = [task_name for task_name, task in self.task_dict.items() if task.persistent]
+
+        start_time = perf_counter()
+        execution_list, loaded_list, reused_list = self.__plan(target_list)
+        result_dict = {task_name: self.__load_result(self.task_dict[task_name]) for task_name in loaded_list}
+
+        # Number of tasks still waiting for each result, so that the intermediate results are released when not needed
+        consumer_count = dict()
+        for task_name in execution_list:
+            for dependency_name in self.task_dict[task_name].dependency_list:
+                consumer_count[dependency_name] = consumer_count.get(dependency_name, 0) + 1
+
+        def complete(task_name, result):
+            task = self.task_dict[task_name]
+            if task.persistent and self.state_directory is not None:
+                self.__save_result(task, result)
+            result_dict[task_name] = result
+
+            for dependency_name in task.dependency_list:
+                consumer_count[dependency_name] -= 1
+                if consumer_count[dependency_name] == 0 and dependency_name not in target_list:
+                    del result_dict[dependency_name]
+
+        def execute(task_name):
+            task = self.task_dict[task_name]
+            return task.function(*[result_dict[dependency_name] for dependency_name in task.dependency_list])
+
+        pending_list = list(execution_list)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running_dict = dict()
+
+            while len(pending_list) > 0 or len(running_dict) > 0:
+                ready_list = [task_name for task_name in pending_list
+                              if all(dependency_name in result_dict for dependency_name in self.task_dict[task_name].dependency_list)]
+
+                for task_name in ready_list:
+                    pending_list.remove(task_name)
+                    if not self.task_dict[task_name].main_thread:
+                        running_dict[executor.submit(execute, task_name)] = task_name
+
+                # The tasks of the main thread are executed while the workers are busy with the others
+                main_thread_list = [task_name for task_name in ready_list if self.task_dict[task_name].main_thread]
+                for task_name in main_thread_list:
+                    complete(task_name, execute(task_name))
+                if len(main_thread_list) > 0:
+                    continue
+
+                if len(running_dict) == 0:
+                    exit("ERROR: the tasks " + str(pending_list) + " cannot be executed")
+
+                done_set, _ = wait(running_dict, return_when=FIRST_COMPLETED)
+                for future in done_set:
+                    complete(running_dict.pop(future), future.result())
+
+        print("--- %d tasks executed, %d up to date, in %s seconds ---" % (len(execution_list), len(reused_list), perf_counter() - start_time))
+
+        return {task_name: result_dict[task_name] for task_name in target_list}
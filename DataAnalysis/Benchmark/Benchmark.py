@@ -0,0 +1,343 @@
+from ExportGenerator import generate_export, WAITING_RESPONSE_STATISTIC_LIST, CASHIER_LEVEL, CUSTOMER_LEVEL, FACTORIAL_LEVEL
+from time import perf_counter, strftime
+import configparser as cp
+import pandas as pd
+import numpy as np
+import subprocess
+import importlib
+import platform
+import tracemalloc
+import glob
+import json
+import sys
+import os
+
+
+config = cp.ConfigParser()
+config.read("settings.ini")
+
+DATA_ANALYSIS_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+'''
+Imports a module of one of the analysis tools given its directory (relative to DataAnalysis). The tools have packages
+with the same name (analysistools), so the ones imported before are removed from the module cache.
+'''
+def import_tool_module(tool_directory, module_name):
+    for loaded_module in [name for name in sys.modules if name == "analysistools" or name.startswith("analysistools.")]:
+        del sys.modules[loaded_module]
+
+    module_directory = os.path.join(DATA_ANALYSIS_DIRECTORY, tool_directory)
+    sys.path.insert(0, module_directory)
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        sys.path.remove(module_directory)
+
+
+'''
+Measures a function: the minimum and the mean wall clock time over number_repeats calls and, if profile_memory is True,
+the peak of the memory allocated during an additional call (traced separately, since tracing slows down the code).
+setup is called before each call, e.g. to clear the caches of the object under test.
+'''
+def measure(function, number_repeats, profile_memory, setup=None):
+    time_list = []
+    for _ in range(number_repeats):
+        if setup is not None:
+            setup()
+        start_time = perf_counter()
+        function()
+        time_list.append(perf_counter() - start_time)
+
+    measurement = {"time_min": min(time_list), "time_mean": float(np.mean(time_list))}
+
+    if profile_memory:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        function()
+        measurement["peak_memory_mb"] = tracemalloc.get_traced_memory()[1]/1024**2
+        tracemalloc.stop()
+
+    return measurement
+
+
+'''
+Generates the synthetic exports of all the scenarios (if not already generated with the same size) and returns a
+dictionary {scenario: file_name}.
+'''
+def generate_exports(data_directory, number_repetitions, vector_length):
+    os.makedirs(data_directory, exist_ok=True)
+    export_dict = dict()
+
+    for scenario in ["waiting_response", "vip_queue", "normal_queue", "factorial", "throughput", "interdeparture"]:
+        # Absolute, since the startup benchmarks run from the directories of the tools
+        file_name = os.path.abspath(os.path.join(data_directory, "%s_r%d_n%d.csv" % (scenario, number_repetitions, vector_length)))
+        if not os.path.exists(file_name):
+            start_time = perf_counter()
+            number_runs = generate_export(file_name, scenario, number_repetitions, vector_length)
+            print("Generated %s (%d runs, %.1f MB) in %.1f seconds" % (file_name, number_runs, os.path.getsize(file_name)/1024**2, perf_counter() - start_time))
+        export_dict[scenario] = file_name
+
+    return export_dict
+
+
+'''
+Returns the benchmarks of the public methods of StatisticDataFrame (WaitingResponseTimes) as a list of tuples
+(benchmark_name, function, setup). The query and aggregate caches are cleared before each call, so that every
+measurement is a cold computation.
+'''
+def get_waiting_response_benchmarks(export_dict):
+    StatisticDataFrame = import_tool_module("WaitingResponseTimes", "analysistools.StatisticDataFrame").StatisticDataFrame
+    file_name = export_dict["waiting_response"]
+    dataframe = StatisticDataFrame(file_name, memory_cache_entries=0)
+    statistic_list, x_grid = WAITING_RESPONSE_STATISTIC_LIST, np.arange(0, 3600, 5)
+
+    def clear_caches():
+        dataframe.aggregate_cache.clear()
+
+    query_dict = {
+        "get_ECDF_data": lambda: dataframe.get_ECDF_data(statistic_list, CASHIER_LEVEL, 0.99),
+        "get_ECDF_data_no_error": lambda: dataframe.get_ECDF_data(statistic_list, CASHIER_LEVEL, confidence_level=None),
+        "get_ECDF_grid_data": lambda: dataframe.get_ECDF_grid_data(statistic_list, CASHIER_LEVEL, x_grid, 0.99),
+        "get_quantile_grid_data": lambda: dataframe.get_quantile_grid_data(statistic_list, CASHIER_LEVEL, x_grid, [0.5, 0.9, 0.99], 0.99),
+        "get_Lorenz_Curve_data": lambda: dataframe.get_Lorenz_Curve_data(statistic_list, CASHIER_LEVEL),
+        "get_histogram_data": lambda: dataframe.get_histogram_data(statistic_list, CASHIER_LEVEL, number_bins=200),
+        "get_sample_mean": lambda: dataframe.get_sample_mean(statistic_list, CASHIER_LEVEL, 0.99),
+        "get_sample_mean_autocorrelation": lambda: dataframe.get_sample_mean(statistic_list, CASHIER_LEVEL, 0.99, autocorrelation_correction=True, max_lag=2000),
+        "get_sample_mean_control_variate": lambda: dataframe.get_sample_mean_control_variate(statistic_list, CASHIER_LEVEL, 0.99, "5.5min", "5.5min"),
+        "get_autocorrelation_diagnostics": lambda: dataframe.get_autocorrelation_diagnostics(statistic_list, CASHIER_LEVEL, max_lag=2000),
+        "get_sample_median": lambda: dataframe.get_sample_median(statistic_list, CASHIER_LEVEL, 0.99),
+        "get_sample_coefficient_of_variation": lambda: dataframe.get_sample_coefficient_of_variation(statistic_list, CASHIER_LEVEL),
+        "get_qq_plot_data": lambda: dataframe.get_qq_plot_data(statistic_list, CASHIER_LEVEL, theoretical_distribution="weibull", weibull_shape=0.8),
+    }
+
+    benchmark_list = [("WaitingResponseTimes.StatisticDataFrame.__init__", lambda: StatisticDataFrame(file_name, memory_cache_entries=0), None)]
+    benchmark_list += [("WaitingResponseTimes.StatisticDataFrame." + name, query, clear_caches) for name, query in query_dict.items()]
+    return benchmark_list
+
+
+'''
+Returns the benchmarks of the public methods of StatisticDataFrame (VipNormalQueue), with the VIP and the normal
+experiments loaded together.
+'''
+def get_vip_normal_benchmarks(export_dict):
+    StatisticDataFrame = import_tool_module("VipNormalQueue", "analysistools.StatisticDataFrame").StatisticDataFrame
+    source_dict = {"vip": export_dict["vip_queue"], "normal": export_dict["normal_queue"]}
+    dataframe = StatisticDataFrame(source_dict)
+
+    query_dict = {
+        "get_sample_mean": lambda: dataframe.get_sample_mean(CASHIER_LEVEL, CUSTOMER_LEVEL, 0.99),
+        "get_index_of_dispersion": lambda: dataframe.get_index_of_dispersion(CASHIER_LEVEL, CUSTOMER_LEVEL),
+        "get_sample_quantile": lambda: dataframe.get_sample_quantile(CASHIER_LEVEL, CUSTOMER_LEVEL, 0.9, 0.99),
+        "get_histogram_data": lambda: dataframe.get_histogram_data(CASHIER_LEVEL, CUSTOMER_LEVEL, bins=20),
+        "get_qq_plot_data": lambda: dataframe.get_qq_plot_data(CASHIER_LEVEL, CUSTOMER_LEVEL, theoretical_distribution="geometric", geometric_prob=0.5),
+        "get_all_paired_differences": lambda: dataframe.get_all_paired_differences(CASHIER_LEVEL, CUSTOMER_LEVEL, 0.99),
+    }
+
+    benchmark_list = [("VipNormalQueue.StatisticDataFrame.__init__", lambda: StatisticDataFrame(source_dict), None)]
+    benchmark_list += [("VipNormalQueue.StatisticDataFrame." + name, query, None) for name, query in query_dict.items()]
+    return benchmark_list
+
+
+'''
+Returns the benchmarks of FactorialDataFrame (2kr factorial).
+'''
+def get_factorial_benchmarks(export_dict):
+    FactorialDataFrame = import_tool_module("2kr factorial", "analysistools.FactorialDataFrame").FactorialDataFrame
+    factor_list = list(FACTORIAL_LEVEL)
+    dataframe = FactorialDataFrame(export_dict["factorial"], factor_list)
+
+    return [("2krFactorial.FactorialDataFrame.__init__", lambda: FactorialDataFrame(export_dict["factorial"], factor_list), None),
+            ("2krFactorial.FactorialDataFrame.get_effects", lambda: dataframe.get_effects(0.99), None)]
+
+
+'''
+Returns the benchmarks of the core functions of the standalone scripts; the exports are parsed once, outside of the
+measurements, except for the functions that build the dataframes.
+'''
+def get_script_benchmarks(export_dict):
+    benchmark_list = []
+
+    finite_variance = import_tool_module("TestFiniteVariance", "TestFiniteVariance")
+    waiting_response_csv = pd.read_csv(export_dict["waiting_response"], low_memory=False)
+    statistic_dataframe = finite_variance.build_dataframe(waiting_response_csv)
+    repetition_dataframe = finite_variance.get_single_statistic_dataframe(WAITING_RESPONSE_STATISTIC_LIST[0], statistic_dataframe)
+    repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == CASHIER_LEVEL[0]]
+    obs_vector = finite_variance.get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+    benchmark_list += [
+        ("TestFiniteVariance.build_dataframe", lambda: finite_variance.build_dataframe(waiting_response_csv), None),
+        ("TestFiniteVariance.get_all_vecvalues_obervations", lambda: finite_variance.get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False), None),
+        ("TestFiniteVariance.get_all_vecvalues_obervations_sorted", lambda: finite_variance.get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True), None),
+        ("TestFiniteVariance.get_partial_variance", lambda: finite_variance.get_partial_variance(obs_vector), None),
+    ]
+
+    warmup = import_tool_module("WarmupTimeChoice", "WarmupTimeChoicePlot")
+    throughput_dataframe = warmup.build_dataframe(pd.read_csv(export_dict["throughput"], low_memory=False))
+    vecvalue_list, vectime_list = warmup.convert_vecvalues(throughput_dataframe)
+    sampling_time = warmup.get_sampling_times(vectime_list)
+    benchmark_list += [
+        ("WarmupTimeChoicePlot.convert_vecvalues", lambda: warmup.convert_vecvalues(throughput_dataframe), None),
+        ("WarmupTimeChoicePlot.get_sampling_times", lambda: warmup.get_sampling_times(vectime_list), None),
+        ("WarmupTimeChoicePlot.get_throughput_at_each_sample_time", lambda: warmup.get_throughput_at_each_sample_time(vecvalue_list, vectime_list, sampling_time), None),
+    ]
+
+    interdeparture = import_tool_module("FittingInterDepartureTime", "InterDepartureTimeCashier")
+    interdeparture_dataframe = interdeparture.build_dataframe(pd.read_csv(export_dict["interdeparture"], low_memory=False))
+    interdeparture_vector = interdeparture.get_all_vecvalues(interdeparture_dataframe)
+    repetition_vector_list = interdeparture.get_vecvalues_per_repetition(interdeparture_dataframe)
+    benchmark_list += [
+        ("InterDepartureTimeCashier.get_all_vecvalues", lambda: interdeparture.get_all_vecvalues(interdeparture_dataframe), None),
+        ("InterDepartureTimeCashier.compute_integrated_autocorrelation_time", lambda: interdeparture.compute_integrated_autocorrelation_time(repetition_vector_list, max_lag=2000), None),
+        ("InterDepartureTimeCashier.compute_qq_plot_points", lambda: interdeparture.compute_qq_plot_points(interdeparture_vector), None),
+        ("InterDepartureTimeCashier.compute_sample_mean", lambda: interdeparture.compute_sample_mean(interdeparture_vector, confidence_level=0.99), None),
+    ]
+
+    fitting = import_tool_module("FittingInterDepartureTime", "DistributionFittingSuite")
+    fitting_config = config["Fitting"]
+    benchmark_list.append(("DistributionFittingSuite.fit_candidates",
+                           lambda: fitting.fit_candidates(repetition_vector_list, json.loads(fitting_config["candidate_list"]), fitting_config.getint("fit_sample_size"),
+                                                          fitting_config.getint("gof_sample_size"), fitting_config.getint("bootstrap_replicates"), 0), None))
+
+    return benchmark_list
+
+
+'''
+Returns the benchmarks of the loss probability of the seating node: the analytical M/M/c/K formula and the
+importance sampling estimator.
+'''
+def get_loss_probability_benchmarks():
+    dimensioning = import_tool_module("DimensioningSeatingNode", "DimensioningSeatingNode")
+    importance_sampling = import_tool_module("DimensioningSeatingNode", "ImportanceSamplingSeatingNode")
+
+    arrival_rate, eating_rate = 2/(5.5*60), 1/(15*60)
+    number_of_seats = np.arange(4, 21)
+    node_capacity = number_of_seats.copy()
+    u = arrival_rate/eating_rate
+    number_of_cycles = config["Benchmark"].getint("number_of_cycles")
+
+    def estimate_all_loss_probabilities():
+        rng = np.random.default_rng(0)
+        return [importance_sampling.estimate_loss_probability(arrival_rate, eating_rate, int(n_seats), int(capacity), number_of_cycles, rng)
+                for n_seats, capacity in zip(number_of_seats, node_capacity)]
+
+    return [("DimensioningSeatingNode.compute_loss_probability", lambda: dimensioning.compute_loss_probability(u, u/number_of_seats, node_capacity, number_of_seats), None),
+            ("ImportanceSamplingSeatingNode.estimate_loss_probability", estimate_all_loss_probabilities, None)]
+
+
+'''
+Returns the startup benchmarks: each common command runs in a new interpreter, so the measured time is the latency
+from the imports to the first result (the time of an empty interpreter is reported as a reference).
+'''
+def get_startup_benchmarks(export_dict):
+    statistic_list, cashier_list = WAITING_RESPONSE_STATISTIC_LIST[:1], CASHIER_LEVEL[:1]
+    command_list = [
+        ("python", None, "pass"),
+        ("WaitingResponseTimes.get_sample_mean", "WaitingResponseTimes",
+         "from analysistools.StatisticDataFrame import StatisticDataFrame\n"
+         "StatisticDataFrame(%r).get_sample_mean(%r, %r, 0.99)" % (export_dict["waiting_response"], statistic_list, cashier_list)),
+        ("WaitingResponseTimes.import_Main", "WaitingResponseTimes", "import Main"),
+        ("VipNormalQueue.get_sample_mean", "VipNormalQueue",
+         "from analysistools.StatisticDataFrame import StatisticDataFrame\n"
+         "StatisticDataFrame(%r).get_sample_mean(%r, %r, 0.99)" % (export_dict["vip_queue"], CASHIER_LEVEL[:1], CUSTOMER_LEVEL[:1])),
+        ("InterDepartureTimeCashier.compute_sample_mean", "FittingInterDepartureTime",
+         "import InterDepartureTimeCashier as script, pandas as pd\n"
+         "dataframe = script.build_dataframe(pd.read_csv(%r, low_memory=False))\n"
+         "script.compute_sample_mean(script.get_all_vecvalues(dataframe), 0.99)" % export_dict["interdeparture"]),
+        ("DimensioningSeatingNode.loss_table", "DimensioningSeatingNode", "import DimensioningSeatingNode\nDimensioningSeatingNode.main()"),
+    ]
+
+    def run_command(tool_directory, code):
+        working_directory = os.path.join(DATA_ANALYSIS_DIRECTORY, tool_directory) if tool_directory is not None else None
+        subprocess.run([sys.executable, "-c", code], cwd=working_directory, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    return [("Startup." + name, lambda tool_directory=tool_directory, code=code: run_command(tool_directory, code), None)
+            for name, tool_directory, code in command_list]
+
+
+'''
+Returns the most recent result file of the result directory (None if there is none).
+'''
+def get_previous_result_file(result_directory):
+    result_file_list = sorted(glob.glob(os.path.join(result_directory, "benchmark_*.json")))
+    return result_file_list[-1] if len(result_file_list) > 0 else None
+
+
+'''
+Prints the results, with the ratio between the time of each benchmark and the one of the previous result file
+(when the benchmark was run with the same parameters).
+'''
+def print_results(result_dict, previous_result_dict):
+    previous_benchmark_dict = dict()
+    if previous_result_dict is not None and previous_result_dict["parameters"] == result_dict["parameters"]:
+        previous_benchmark_dict = previous_result_dict["benchmarks"]
+
+    print("\n{:<76} {:>10} {:>10} {:>12} {:>10}".format("Benchmark", "min [s]", "mean [s]", "peak [MB]", "vs prev."))
+    for benchmark_name, measurement in result_dict["benchmarks"].items():
+        if "error" in measurement:
+            print("{:<76} {}".format(benchmark_name, "ERROR: " + measurement["error"]))
+            continue
+
+        ratio = ""
+        if "time_min" in previous_benchmark_dict.get(benchmark_name, dict()):
+            ratio = "%.2fx" % (measurement["time_min"]/previous_benchmark_dict[benchmark_name]["time_min"])
+        peak_memory = "%.1f" % measurement["peak_memory_mb"] if "peak_memory_mb" in measurement else ""
+        print("{:<76} {:>10.4f} {:>10.4f} {:>12} {:>10}".format(benchmark_name, measurement["time_min"], measurement["time_mean"], peak_memory, ratio))
+
+
+def main():
+    benchmark_config = config["Benchmark"]
+    number_repetitions = benchmark_config.getint("number_repetitions")
+    vector_length = benchmark_config.getint("vector_length")
+    number_repeats = benchmark_config.getint("number_repeats")
+    profile_memory = benchmark_config.getboolean("profile_memory")
+    result_directory = benchmark_config["result_directory"]
+
+    export_dict = generate_exports(benchmark_config["data_directory"], number_repetitions, vector_length)
+
+    result_dict = {"timestamp": strftime("%Y-%m-%d %H:%M:%S"),
+                   "environment": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                                   "machine": platform.machine(), "cpu_count": os.cpu_count()},
+                   "parameters": {"number_repetitions": number_repetitions, "vector_length": vector_length, "number_repeats": number_repeats},
+                   "benchmarks": dict()}
+
+    benchmark_group_list = [("WaitingResponseTimes", lambda: get_waiting_response_benchmarks(export_dict)),
+                            ("VipNormalQueue", lambda: get_vip_normal_benchmarks(export_dict)),
+                            ("2krFactorial", lambda: get_factorial_benchmarks(export_dict)),
+                            ("Scripts", lambda: get_script_benchmarks(export_dict)),
+                            ("LossProbability", get_loss_probability_benchmarks),
+                            ("Startup", lambda: get_startup_benchmarks(export_dict))]
+
+    for group_name, get_benchmarks in benchmark_group_list:
+        # A group that cannot be set up (e.g. a missing optional dependency) is recorded, not fatal
+        try:
+            benchmark_list = get_benchmarks()
+        except (ImportError, SystemExit) as error:
+            result_dict["benchmarks"][group_name] = {"error": repr(error)}
+            continue
+
+        for benchmark_name, function, setup in benchmark_list:
+            print("Running " + benchmark_name)
+            try:
+                # The memory of the startup benchmarks is allocated in other processes, so it is not traced
+                result_dict["benchmarks"][benchmark_name] = measure(function, number_repeats, profile_memory and group_name != "Startup", setup)
+            except (ImportError, SystemExit, subprocess.CalledProcessError) as error:
+                result_dict["benchmarks"][benchmark_name] = {"error": repr(error)}
+
+    previous_result_file = get_previous_result_file(result_directory)
+    previous_result_dict = None
+    if previous_result_file is not None:
+        with open(previous_result_file, "r") as previous_file:
+            previous_result_dict = json.load(previous_file)
+
+    print_results(result_dict, previous_result_dict)
+
+    os.makedirs(result_directory, exist_ok=True)
+    result_file = os.path.join(result_directory, "benchmark_" + strftime("%Y%m%d_%H%M%S") + ".json")
+    with open(result_file, "w") as output_file:
+        json.dump(result_dict, output_file, indent=4)
+    print("\nResults saved in " + result_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import numpy as np
+import gzip
+import bz2
+import lzma
+import csv
+
+
+CSV_HEADER = ["run", "type", "module", "name", "attrname", "attrvalue", "value", "vectime", "vecvalue"]
+CASHIER_LEVEL = ["1min", "1.5min", "2min", "2.5min"]
+CUSTOMER_LEVEL = ["5.5min", "7.5min", "10min"]
+FACTORIAL_LEVEL = {"CASH": ["1min", "2min"], "VOP": ["3min", "8min"], "NOP": ["3min", "8min"]}
+WAITING_RESPONSE_STATISTIC_LIST = ["waitingTimeVipCustomerCashierQueueStatistic", "responseTimeVipCustomerCashierNodeStatistic",
+                                   "waitingTimeNormalCustomerCashierQueueStatistic", "responseTimeNormalCustomerCashierNodeStatistic"]
+QUEUE_STATISTIC = {"VOP": "numberOfVipCustomersCashierQueueStatistic", "NOP": "numberOfNormalCustomersCashierQueueStatistic"}
+SCENARIO_LIST = ["waiting_response", "vip_queue", "normal_queue", "factorial", "throughput", "interdeparture"]
+COMPRESSED_OPEN = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+'''
+Converts a time expressed as in the Omnet++ configuration (e.g. "30s", "1.5min", "2h", "5d") in seconds.
+'''
+def convert_to_seconds(time_string):
+    unit_multiplier = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+
+    for unit in sorted(unit_multiplier, key=len, reverse=True):
+        if time_string.endswith(unit):
+            return float(time_string[:-len(unit)])*unit_multiplier[unit]
+
+    return float(time_string)
+
+
+'''
+Simulates number_customers customers of the cashier node: a single server FIFO queue fed by the two Poisson streams of
+VIP and normal customers, with exponential service times. The waiting times are obtained at once from the Lindley
+recursion W(n) = max(0, W(n-1) + S(n-1) - A(n)), whose solution is W(n) = X(n) - min(X(0), ..., X(n)) with X the
+cumulative sum of S(n-1) - A(n).
+Returns a tuple (arrival_time, is_vip, waiting_time, departure_time) of vectors, one element per customer.
+'''
+def simulate_cashier(rng, vip_interarrival_time, normal_interarrival_time, service_time, number_customers):
+    arrival_rate = 1/vip_interarrival_time + 1/normal_interarrival_time
+    arrival_time = np.cumsum(rng.exponential(1/arrival_rate, number_customers))
+    is_vip = rng.random(number_customers) < (1/vip_interarrival_time)/arrival_rate
+    service = rng.exponential(service_time, number_customers)
+
+    increment = np.concatenate(([0.0], service[:-1] - np.diff(arrival_time)))
+    cumulative_increment = np.cumsum(increment)
+    waiting_time = cumulative_increment - np.minimum.accumulate(np.minimum(cumulative_increment, 0.0))
+    departure_time = arrival_time + waiting_time + service
+
+    return arrival_time, is_vip, waiting_time, departure_time
+
+
+'''
+Returns the number of customers of one class in the queue, recorded at each change as Omnet++ does: the vector of
+the times and the vector of the values.
+'''
+def get_queue_occupancy(arrival_time, waiting_time):
+    event_time = np.concatenate((arrival_time, arrival_time + waiting_time))
+    event_increment = np.concatenate((np.ones(len(arrival_time)), -np.ones(len(arrival_time))))
+
+    event_order = np.argsort(event_time, kind="stable")
+    return event_time[event_order], np.cumsum(event_increment[event_order])
+
+
+def format_vector(vector):
+    return " ".join(map(repr, np.asarray(vector, dtype=np.float64).tolist()))
+
+
+'''
+Returns the vectors of a run of the given scenario as a list of tuples (module, statistic_name, vectime, vecvalue).
+vector_length is the approximate number of observations of each vector.
+'''
+def generate_run_vectors(rng, scenario, attribute_dict, vector_length):
+    cashier_time = convert_to_seconds(attribute_dict.get("CASH", "1.5min"))
+    vip_interarrival_time = convert_to_seconds(attribute_dict.get("VOP", "5.5min"))
+    normal_interarrival_time = convert_to_seconds(attribute_dict.get("NOP", "5.5min"))
+
+    # Each class receives about half of the customers, except for the vectors of a single class
+    number_customers = vector_length if scenario in ["throughput", "interdeparture", "vip_queue", "normal_queue"] else 2*vector_length
+    arrival_time, is_vip, waiting_time, departure_time = simulate_cashier(rng, vip_interarrival_time, normal_interarrival_time,
+                                                                           cashier_time, number_customers)
+
+    if scenario == "throughput":
+        return [("FacultyBar.cashier", "throughputCashierStatistic", departure_time, np.arange(1, number_customers + 1)/departure_time)]
+    if scenario == "interdeparture":
+        return [("FacultyBar.cashier", "interDepartureTimeCashierStatistic", departure_time[1:], np.diff(departure_time))]
+    if scenario in ["vip_queue", "normal_queue"]:
+        category = "VOP" if scenario == "vip_queue" else "NOP"
+        class_mask = is_vip if category == "VOP" else ~is_vip
+        occupancy_time, occupancy = get_queue_occupancy(arrival_time[class_mask], waiting_time[class_mask])
+        return [("FacultyBar.cashier", QUEUE_STATISTIC[category], occupancy_time, occupancy)]
+
+    vector_list = []
+    for customer_category, class_mask in [("Vip", is_vip), ("Normal", ~is_vip)]:
+        vector_list.append(("FacultyBar.cashier", "waitingTime" + customer_category + "CustomerCashierQueueStatistic",
+                            arrival_time[class_mask] + waiting_time[class_mask], waiting_time[class_mask]))
+        vector_list.append(("FacultyBar.cashier", "responseTime" + customer_category + "CustomerCashierNodeStatistic",
+                            departure_time[class_mask], departure_time[class_mask] - arrival_time[class_mask]))
+
+    return vector_list
+
+
+'''
+Returns the list of the iteration variables of each experiment of the scenario, as dictionaries {name: level}.
+'''
+def get_experiment_list(scenario):
+    if scenario == "waiting_response":
+        return [{"CASH": cashier_level} for cashier_level in CASHIER_LEVEL]
+    if scenario in ["vip_queue", "normal_queue"]:
+        category = "VOP" if scenario == "vip_queue" else "NOP"
+        return [{"CASH": cashier_level, category: customer_level} for cashier_level in CASHIER_LEVEL for customer_level in CUSTOMER_LEVEL]
+    if scenario == "factorial":
+        return [{"CASH": cashier_level, "VOP": vip_level, "NOP": normal_level} for cashier_level in FACTORIAL_LEVEL["CASH"]
+                for vip_level in FACTORIAL_LEVEL["VOP"] for normal_level in FACTORIAL_LEVEL["NOP"]]
+
+    return [dict()]  # Static parameters, i.e. without iteration variables
+
+
+'''
+Writes a synthetic Omnet++ CSV export of the scenario (one of SCENARIO_LIST) with number_repetitions repetitions of each
+experiment and vectors of about vector_length observations, with the same columns and run attributes (configname,
+repetition and the iteration variables CASH, VOP, NOP) of the real exports used by the analysis tools.
+Repetition r of every experiment uses the seed r, like seed-set = ${repetition} in omnetpp.ini.
+The file is compressed if its name ends with ".gz", ".bz2" or ".xz". Returns the number of written runs.
+'''
+def generate_export(file_name, scenario, number_repetitions, vector_length):
+    if scenario not in SCENARIO_LIST:
+        exit("ERROR: the scenario " + scenario + " is not one of " + str(SCENARIO_LIST))
+
+    open_function = next((COMPRESSED_OPEN[extension] for extension in COMPRESSED_OPEN if file_name.endswith(extension)), open)
+    run_number = 0
+
+    with open_function(file_name, "wt", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(CSV_HEADER)
+
+        for attribute_dict in get_experiment_list(scenario):
+            for repetition in range(number_repetitions):
+                run = "Benchmark-" + scenario + "-" + str(run_number)
+                csv_writer.writerow([run, "runattr", "", "", "configname", "Benchmark_" + scenario, "", "", ""])
+                for attribute_name, attribute_value in attribute_dict.items():
+                    csv_writer.writerow([run, "itervar", "", "", attribute_name, attribute_value, "", "", ""])
+                csv_writer.writerow([run, "runattr", "", "", "repetition", str(repetition), "", "", ""])
+
+                rng = np.random.default_rng(repetition)
+                for module, statistic_name, vectime, vecvalue in generate_run_vectors(rng, scenario, attribute_dict, vector_length):
+                    csv_writer.writerow([run, "vector", module, statistic_name + ":vector", "", "", "",
+                                         format_vector(vectime), format_vector(vecvalue)])
+                run_number += 1
+
+    return run_number
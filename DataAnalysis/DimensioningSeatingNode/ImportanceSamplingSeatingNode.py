@@ -0,0 +1,152 @@
+from DimensioningSeatingNode import load_parameters, compute_loss_probability, convert_min_to_sec
+import configparser as cp
+import texttable as tt
+import numpy as np
+import math
+
+
+def load_simulation_parameters():
+    config = cp.ConfigParser()
+    config.read("settings.ini")
+
+    arrival_rate = 1 / convert_min_to_sec(config["Customer"].getfloat("vip_interarrival_time")) + \
+                   1 / convert_min_to_sec(config["Customer"].getfloat("normal_interarrival_time"))
+    eating_rate = 1 / convert_min_to_sec(config["Customer"].getfloat("eating_time"))
+    number_of_cycles = config["ImportanceSampling"].getint("number_of_cycles")
+    seed = config["ImportanceSampling"].getint("seed")
+
+    return arrival_rate, eating_rate, number_of_cycles, seed
+
+
+'''
+Given the arrival probability p_n of the jump chain in each state 0..K, returns the arrival probabilities under the
+twisted measure used before hitting K.
+The +1/-1 increments of each state n are exponentially twisted with a state-dependent parameter, so that
+p'_n = p_n * h(n+1) / h(n), where h(n) is the probability of hitting K before 0 starting from n (gambler's ruin
+formula of a birth-death chain). With this choice every excursion contributes a unitary factor to the likelihood ratio:
+all the twisted paths reach K and they share the same likelihood ratio h(1), hence the variance of the estimator
+comes only from the losses accumulated after K is reached.
+'''
+def compute_twisted_arrival_probability(arrival_probability, node_capacity):
+    down_up_ratio = (1 - arrival_probability[1:node_capacity]) / arrival_probability[1:node_capacity]
+    ruin_terms = np.concatenate(([1.0], np.cumprod(down_up_ratio)))
+    hitting_probability = np.concatenate(([0.0], np.cumsum(ruin_terms))) / np.sum(ruin_terms)
+
+    twisted_arrival_probability = arrival_probability.copy()
+    twisted_arrival_probability[1:node_capacity] = arrival_probability[1:node_capacity] * \
+        hitting_probability[2:node_capacity + 1] / hitting_probability[1:node_capacity]
+
+    return np.minimum(twisted_arrival_probability, 1.0)
+
+
+'''
+Simulates in parallel number_of_cycles regenerative cycles of the jump chain of the M/M/c/K seating node.
+A cycle starts with the arrival of a customer in the empty node and ends when the node becomes empty again.
+In state n, the next event is an arrival with probability p_n = lambda / (lambda + min(n, c)*mu); an arrival in
+state K (node capacity) is a loss.
+If twisted is True, the chain is simulated under the exponentially twisted measure until it hits K, then it goes on
+under the original measure (see compute_twisted_arrival_probability).
+Returns a tuple (losses, arrivals, likelihood_ratio) of vectors with one element per cycle; under the original measure
+the likelihood ratio is always 1.
+'''
+def simulate_regenerative_cycles(arrival_rate, eating_rate, n_seats, node_capacity, number_of_cycles, rng, twisted):
+    state = np.ones(number_of_cycles, dtype=np.int64)
+    losses = np.zeros(number_of_cycles, dtype=np.int64)
+    arrivals = np.ones(number_of_cycles, dtype=np.int64)
+    likelihood_ratio = np.ones(number_of_cycles, dtype=np.float64)
+    twisted_phase = np.full(number_of_cycles, fill_value=twisted and node_capacity > 1)
+
+    # Arrival probability in each state 0..K, original and twisted
+    state_vector = np.arange(0, node_capacity + 1)
+    arrival_probability = arrival_rate / (arrival_rate + np.minimum(state_vector, n_seats) * eating_rate)
+    twisted_arrival_probability = compute_twisted_arrival_probability(arrival_probability, node_capacity)
+
+    active = np.arange(number_of_cycles)
+    while len(active) > 0:
+        active_state = state[active]
+        in_twisted_phase = twisted_phase[active]
+
+        original_probability = arrival_probability[active_state]
+        step_probability = np.where(in_twisted_phase, twisted_arrival_probability[active_state], original_probability)
+        is_arrival = rng.random(len(active)) < step_probability
+
+        # Both the branches are evaluated: a twisted down probability equal to 0 is never selected
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step_ratio = np.where(is_arrival, original_probability / step_probability, (1 - original_probability) / (1 - step_probability))
+        likelihood_ratio[active] *= np.where(in_twisted_phase, step_ratio, 1)
+
+        is_loss = is_arrival & (active_state == node_capacity)
+        arrivals[active] += is_arrival
+        losses[active] += is_loss
+        active_state = active_state + np.where(is_arrival, 1, -1) - is_loss
+        state[active] = active_state
+
+        # Back to the original measure as soon as the node capacity is reached
+        twisted_phase[active] = in_twisted_phase & (active_state < node_capacity)
+        active = active[active_state > 0]
+
+    return losses, arrivals, likelihood_ratio
+
+
+'''
+Estimates the loss probability of the seating node as the ratio E[losses per cycle] / E[arrivals per cycle].
+The numerator is estimated with importance sampling (losses weighted by the likelihood ratio), the denominator,
+which is not related to a rare event, with an independent set of cycles under the original measure.
+The same cycles under the original measure give the crude estimator of the loss probability, used as a reference.
+Returns a tuple (is_estimate, is_relative_error, crude_estimate, crude_relative_error), where the relative errors are
+the ratios between the standard error of the estimators (computed with the delta method) and the estimates.
+'''
+def estimate_loss_probability(arrival_rate, eating_rate, n_seats, node_capacity, number_of_cycles, rng):
+    is_losses, is_arrivals, likelihood_ratio = simulate_regenerative_cycles(arrival_rate, eating_rate, n_seats, node_capacity,
+                                                                           number_of_cycles, rng, twisted=True)
+    crude_losses, crude_arrivals, unit_ratio = simulate_regenerative_cycles(arrival_rate, eating_rate, n_seats, node_capacity,
+                                                                           number_of_cycles, rng, twisted=False)
+
+    weighted_losses = is_losses * likelihood_ratio
+    mean_weighted_losses = np.mean(weighted_losses, dtype=np.float64)
+    mean_arrivals = np.mean(crude_arrivals, dtype=np.float64)
+    arrivals_relative_error = np.std(crude_arrivals, ddof=1) / (mean_arrivals * math.sqrt(number_of_cycles))
+
+    is_estimate = mean_weighted_losses / mean_arrivals
+    if mean_weighted_losses > 0:
+        losses_relative_error = np.std(weighted_losses, ddof=1) / (mean_weighted_losses * math.sqrt(number_of_cycles))
+        is_relative_error = math.sqrt(losses_relative_error ** 2 + arrivals_relative_error ** 2)
+    else:
+        is_relative_error = math.inf
+
+    crude_estimate = np.sum(crude_losses) / np.sum(crude_arrivals)
+    if crude_estimate > 0:
+        crude_std_error = np.std(crude_losses - crude_estimate * crude_arrivals, ddof=1) / (mean_arrivals * math.sqrt(number_of_cycles))
+        crude_relative_error = crude_std_error / crude_estimate
+    else:
+        crude_relative_error = math.inf
+
+    return is_estimate, is_relative_error, crude_estimate, crude_relative_error
+
+
+def main():
+    u, u_divided_by_nseat, node_capacity, number_of_seats, queue_size = load_parameters()
+    analytical_loss_probability = compute_loss_probability(u, u_divided_by_nseat, node_capacity, number_of_seats)
+    arrival_rate, eating_rate, number_of_cycles, seed = load_simulation_parameters()
+    rng = np.random.default_rng(seed)
+
+    result_table = tt.Texttable()
+    result_table.header(["Number of seats", "Queue capacity", "Analytical loss", "IS loss", "IS relative error",
+                         "Crude loss", "Crude relative error", "Deviation from analytical"])
+    result_table.set_cols_dtype(["t", "t", "t", "t", "t", "t", "t", "t"])
+
+    for index, n_seats in enumerate(number_of_seats):
+        is_estimate, is_relative_error, crude_estimate, crude_relative_error = \
+            estimate_loss_probability(arrival_rate, eating_rate, int(n_seats), int(node_capacity[index]), number_of_cycles, rng)
+
+        analytical_loss = float(analytical_loss_probability[index])
+        deviation = abs(is_estimate - analytical_loss) / analytical_loss
+        result_table.add_row([n_seats, queue_size[index], "%.4e" % analytical_loss, "%.4e" % is_estimate, "%.4f" % is_relative_error,
+                              "%.4e" % crude_estimate, "%.4f" % crude_relative_error, "%.4f" % deviation])
+
+    print("************* IMPORTANCE SAMPLING (" + str(number_of_cycles) + " cycles) *************")
+    print(result_table.draw())
+
+
+if __name__ == "__main__":
+    main()
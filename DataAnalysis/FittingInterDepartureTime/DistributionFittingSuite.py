@@ -0,0 +1,247 @@
+from InterDepartureTimeCashier import build_dataframe, get_vecvalues_per_repetition, get_file_compression
+from concurrent.futures import ProcessPoolExecutor
+from scipy.special import digamma, polygamma
+import configparser as cp
+import texttable as tt
+import pandas as pd
+import numpy as np
+import scipy.stats
+import json
+
+
+CANDIDATE_PARAMETER_NUMBER = {"exponential": 1, "gamma": 2, "weibull": 2, "lognormal": 2, "hyperexponential": 3}
+
+
+def load_parameters():
+    config = cp.ConfigParser()
+    config.read("settings.ini")
+
+    return {"csv_file": config["General"]["working_csv"],
+            "candidate_list": json.loads(config.get("Fitting", "candidate_list")),
+            "fit_sample_size": config["Fitting"].getint("fit_sample_size"),
+            "gof_sample_size": config["Fitting"].getint("gof_sample_size"),
+            "bootstrap_replicates": config["Fitting"].getint("bootstrap_replicates"),
+            "seed": config["Fitting"].getint("seed")}
+
+
+'''
+Extracts a subsample of the given size, stratified by repetition: each repetition contributes a number of observations
+proportional to its size, drawn without replacement. The subsample is reproducible, since it depends only on the seed.
+Only strictly positive observations are considered, as required by the candidate distributions.
+'''
+def get_stratified_subsample(vecvalue_list, sample_size, seed):
+    rng = np.random.default_rng(seed)
+    positive_list = [vecvalue[vecvalue > 0] for vecvalue in vecvalue_list]
+    repetition_size = np.array([len(vecvalue) for vecvalue in positive_list])
+    total_size = np.sum(repetition_size)
+
+    if sample_size >= total_size:
+        return np.concatenate(positive_list)
+
+    stratum_size = np.floor(repetition_size*sample_size/total_size).astype(np.int64)
+    # The observations left by the rounding are assigned to the largest remainders
+    remainder = repetition_size*sample_size/total_size - stratum_size
+    stratum_size[np.argsort(-remainder)[:sample_size - np.sum(stratum_size)]] += 1
+
+    return np.concatenate([rng.choice(vecvalue, size=size, replace=False) for vecvalue, size in zip(positive_list, stratum_size)])
+
+
+'''
+Computes the maximum likelihood estimates of the parameters of a candidate distribution.
+The input is a matrix where each row is an independent sample, so that all the bootstrap replicates are fitted at once;
+each returned parameter is a vector with one element per row.
+'''
+def fit_mle(candidate, sample_matrix):
+    mean = np.mean(sample_matrix, axis=1)
+
+    if candidate == "exponential":
+        return {"scale": mean}
+
+    log_sample = np.log(sample_matrix)
+    mean_log = np.mean(log_sample, axis=1)
+
+    if candidate == "lognormal":
+        return {"mu": mean_log, "sigma": np.std(log_sample, axis=1)}
+
+    if candidate == "gamma":
+        # Closed-form starting point (Minka), refined with Newton's method on the shape
+        s = np.log(mean) - mean_log
+        shape = (3 - s + np.sqrt((s - 3)**2 + 24*s))/(12*s)
+        for i in range(10):
+            shape = shape - (np.log(shape) - digamma(shape) - s)/(1/shape - polygamma(1, shape))
+        return {"shape": shape, "scale": mean/shape}
+
+    if candidate == "weibull":
+        # Newton's method on the shape; the observations are normalized by the mean for numerical stability
+        normalized_log = log_sample - np.log(mean)[:, np.newaxis]
+        shape = 1.2825/np.maximum(np.std(log_sample, axis=1), 1e-12)
+        for i in range(50):
+            weight = np.exp(shape[:, np.newaxis]*normalized_log)
+            sum_weight = np.sum(weight, axis=1)
+            sum_weight_log = np.sum(weight*normalized_log, axis=1)
+            sum_weight_log2 = np.sum(weight*normalized_log**2, axis=1)
+            score = 1/shape + np.mean(normalized_log, axis=1) - sum_weight_log/sum_weight
+            derivative = -1/shape**2 - (sum_weight_log2*sum_weight - sum_weight_log**2)/sum_weight**2
+            shape = np.maximum(shape - score/derivative, shape/2)
+        scale = mean*np.mean(np.exp(shape[:, np.newaxis]*normalized_log), axis=1)**(1/shape)
+        return {"shape": shape, "scale": scale}
+
+    if candidate == "hyperexponential":
+        # Expectation-maximization for a mixture of two exponentials
+        probability, fast_rate, slow_rate = np.full_like(mean, 0.5), 2/mean, 0.5/mean
+        for i in range(200):
+            fast_density = probability[:, np.newaxis]*fast_rate[:, np.newaxis]*np.exp(-fast_rate[:, np.newaxis]*sample_matrix)
+            slow_density = (1 - probability[:, np.newaxis])*slow_rate[:, np.newaxis]*np.exp(-slow_rate[:, np.newaxis]*sample_matrix)
+            responsibility = fast_density/np.maximum(fast_density + slow_density, 1e-300)
+            probability = np.clip(np.mean(responsibility, axis=1), 1e-9, 1 - 1e-9)
+            fast_rate = np.sum(responsibility, axis=1)/np.sum(responsibility*sample_matrix, axis=1)
+            slow_rate = np.sum(1 - responsibility, axis=1)/np.sum((1 - responsibility)*sample_matrix, axis=1)
+        return {"probability": probability, "fast_rate": fast_rate, "slow_rate": slow_rate}
+
+    exit("ERROR: the candidate distribution " + candidate + " is not defined")
+
+
+'''
+Given the parameters returned by fit_mle(), evaluates the CDF of the candidate distribution on each row of x_matrix.
+'''
+def compute_cdf(candidate, parameters, x_matrix):
+    column = {name: value[:, np.newaxis] for name, value in parameters.items()}
+
+    if candidate == "exponential":
+        return -np.expm1(-x_matrix/column["scale"])
+    if candidate == "lognormal":
+        return scipy.stats.norm.cdf((np.log(x_matrix) - column["mu"])/column["sigma"])
+    if candidate == "gamma":
+        return scipy.stats.gamma.cdf(x_matrix, a=column["shape"], scale=column["scale"])
+    if candidate == "weibull":
+        return -np.expm1(-(x_matrix/column["scale"])**column["shape"])
+    if candidate == "hyperexponential":
+        return 1 - column["probability"]*np.exp(-column["fast_rate"]*x_matrix) - (1 - column["probability"])*np.exp(-column["slow_rate"]*x_matrix)
+
+
+'''
+Computes the log-likelihood of the sample (single row matrix) under the fitted candidate distribution.
+'''
+def compute_log_likelihood(candidate, parameters, sample_matrix):
+    column = {name: value[:, np.newaxis] for name, value in parameters.items()}
+
+    if candidate == "exponential":
+        log_density = scipy.stats.expon.logpdf(sample_matrix, scale=column["scale"])
+    elif candidate == "lognormal":
+        log_density = scipy.stats.lognorm.logpdf(sample_matrix, s=column["sigma"], scale=np.exp(column["mu"]))
+    elif candidate == "gamma":
+        log_density = scipy.stats.gamma.logpdf(sample_matrix, a=column["shape"], scale=column["scale"])
+    elif candidate == "weibull":
+        log_density = scipy.stats.weibull_min.logpdf(sample_matrix, c=column["shape"], scale=column["scale"])
+    else:
+        log_density = np.log(column["probability"]*column["fast_rate"]*np.exp(-column["fast_rate"]*sample_matrix) +
+                             (1 - column["probability"])*column["slow_rate"]*np.exp(-column["slow_rate"]*sample_matrix))
+
+    return np.sum(log_density, axis=1)
+
+
+'''
+Draws a matrix of replicates x sample_size observations from the fitted candidate distribution (scalar parameters).
+'''
+def generate_samples(candidate, parameters, replicates, sample_size, rng):
+    value = {name: float(vector[0]) for name, vector in parameters.items()}
+    shape = (replicates, sample_size)
+
+    if candidate == "exponential":
+        return rng.exponential(value["scale"], size=shape)
+    if candidate == "lognormal":
+        return rng.lognormal(value["mu"], value["sigma"], size=shape)
+    if candidate == "gamma":
+        return rng.gamma(value["shape"], value["scale"], size=shape)
+    if candidate == "weibull":
+        return value["scale"]*rng.weibull(value["shape"], size=shape)
+    if candidate == "hyperexponential":
+        fast_phase = rng.random(size=shape) < value["probability"]
+        return rng.exponential(size=shape)/np.where(fast_phase, value["fast_rate"], value["slow_rate"])
+
+
+'''
+Computes the Kolmogorov-Smirnov and Anderson-Darling statistics of each row of sample_matrix with respect to the
+distribution fitted on the same row. Returns a tuple (ks_vector, ad_vector).
+'''
+def compute_gof_statistics(candidate, parameters, sample_matrix):
+    sorted_matrix = np.sort(sample_matrix, axis=1)
+    sample_size = sorted_matrix.shape[1]
+    cdf_matrix = np.clip(compute_cdf(candidate, parameters, sorted_matrix), 1e-12, 1 - 1e-12)
+    rank = np.arange(1, sample_size + 1)
+
+    ks_vector = np.maximum(np.max(rank/sample_size - cdf_matrix, axis=1), np.max(cdf_matrix - (rank - 1)/sample_size, axis=1))
+    ad_terms = (2*rank - 1)*(np.log(cdf_matrix) + np.log(1 - cdf_matrix[:, ::-1]))
+    ad_vector = -sample_size - np.sum(ad_terms, axis=1)/sample_size
+
+    return ks_vector, ad_vector
+
+
+'''
+Fits a candidate distribution and tests its goodness of fit; it is executed in a separate process for each candidate.
+The parameters are estimated on fit_sample, while the KS and AD statistics are computed on gof_sample.
+Since the parameters are estimated from the data, the p-values are obtained with a parametric bootstrap:
+each replicate is drawn from the fitted distribution, fitted again and tested in the same way (all replicates at once).
+'''
+def evaluate_candidate(candidate, fit_sample, gof_sample, bootstrap_replicates, seed):
+    rng = np.random.default_rng(seed)
+
+    parameters = fit_mle(candidate, fit_sample[np.newaxis, :])
+    log_likelihood = float(compute_log_likelihood(candidate, parameters, fit_sample[np.newaxis, :])[0])
+    aic = 2*CANDIDATE_PARAMETER_NUMBER[candidate] - 2*log_likelihood
+
+    gof_parameters = fit_mle(candidate, gof_sample[np.newaxis, :])
+    ks_statistic, ad_statistic = compute_gof_statistics(candidate, gof_parameters, gof_sample[np.newaxis, :])
+
+    bootstrap_matrix = generate_samples(candidate, gof_parameters, bootstrap_replicates, len(gof_sample), rng)
+    bootstrap_parameters = fit_mle(candidate, bootstrap_matrix)
+    bootstrap_ks, bootstrap_ad = compute_gof_statistics(candidate, bootstrap_parameters, bootstrap_matrix)
+
+    ks_p_value = (1 + np.sum(bootstrap_ks >= ks_statistic[0]))/(bootstrap_replicates + 1)
+    ad_p_value = (1 + np.sum(bootstrap_ad >= ad_statistic[0]))/(bootstrap_replicates + 1)
+
+    return {"candidate": candidate, "parameters": {name: float(value[0]) for name, value in parameters.items()},
+            "log_likelihood": log_likelihood, "aic": aic, "ks": float(ks_statistic[0]), "ks_p_value": ks_p_value,
+            "ad": float(ad_statistic[0]), "ad_p_value": ad_p_value}
+
+
+'''
+Evaluates all the candidate distributions in parallel (one process each) and returns their results ranked by AIC.
+'''
+def fit_candidates(vecvalue_list, candidate_list, fit_sample_size, gof_sample_size, bootstrap_replicates, seed):
+    fit_sample = get_stratified_subsample(vecvalue_list, fit_sample_size, seed)
+    gof_sample = get_stratified_subsample(vecvalue_list, gof_sample_size, seed + 1)
+
+    with ProcessPoolExecutor(max_workers=len(candidate_list)) as executor:
+        futures = [executor.submit(evaluate_candidate, candidate, fit_sample, gof_sample, bootstrap_replicates, seed + 2 + index)
+                   for index, candidate in enumerate(candidate_list)]
+        result_list = [future.result() for future in futures]
+
+    return sorted(result_list, key=lambda result: result["aic"])
+
+
+def main():
+    parameters = load_parameters()
+
+    csv_data = pd.read_csv(parameters["csv_file"], compression=get_file_compression(parameters["csv_file"]), low_memory=False)
+    interdeparture_dataframe = build_dataframe(csv_data)
+    vecvalue_list = get_vecvalues_per_repetition(interdeparture_dataframe)
+
+    result_list = fit_candidates(vecvalue_list, parameters["candidate_list"], parameters["fit_sample_size"],
+                                 parameters["gof_sample_size"], parameters["bootstrap_replicates"], parameters["seed"])
+
+    result_table = tt.Texttable()
+    result_table.header(["Rank", "Distribution", "Parameters", "AIC", "KS", "KS p-value", "AD", "AD p-value"])
+    result_table.set_cols_dtype(["t", "t", "t", "t", "t", "t", "t", "t"])
+
+    for rank, result in enumerate(result_list, start=1):
+        parameter_string = "\n".join(name + " = %.4g" % value for name, value in result["parameters"].items())
+        result_table.add_row([rank, result["candidate"], parameter_string, "%.2f" % result["aic"], "%.4f" % result["ks"],
+                              "%.4f" % result["ks_p_value"], "%.4f" % result["ad"], "%.4f" % result["ad_p_value"]])
+
+    print("Number of observations: " + str(sum(len(vecvalue) for vecvalue in vecvalue_list)))
+    print(result_table.draw())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
+from statistics import NormalDist
+from sharedtools.AutocorrelationDiagnostics import AutocorrelationDiagnostics
+from sharedtools.ResultReader import get_file_compression
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats
 import math
-import statsmodels.api as sm
+
+# scipy, statsmodels and matplotlib are imported by the functions that use them, so that importing this module
+# (e.g. from DistributionFittingSuite) does not pay for them
 
 
 def build_dataframe(csv_data):
@@ -29,7 +32,25 @@ def get_all_vecvalues(dataframe):
     return vecvalue_list
 
 
+'''
+Returns a list of numpy arrays, one for each repetition, containing the converted "vecvalue" elements.
+'''
+def get_vecvalues_per_repetition(dataframe):
+    return [np.array(vecvalue.split(), dtype=np.float64) for vecvalue in dataframe.sort_values(by=["repetition"])["vecvalue"]]
+
+
+'''
+Computes the integrated autocorrelation time of the observations, i.e. the factor by which the variance of the
+sample mean is inflated by the correlation between consecutive observations, with the estimator of the other tools
+(AutocorrelationDiagnostics: batched FFT autocovariances pooled across repetitions, automatic window of Sokal).
+'''
+def compute_integrated_autocorrelation_time(vecvalue_list, max_lag):
+    return AutocorrelationDiagnostics(vecvalue_list, max_lag).get_integrated_autocorrelation_time()
+
+
 def linear_regression_analysis(x_vector, y_vector):
+    import statsmodels.api as sm
+
     numpy_x = np.array(x_vector)
     numpy_y = np.array(y_vector)
 
@@ -41,6 +62,8 @@ def linear_regression_analysis(x_vector, y_vector):
 
 
 def compute_qq_plot_points(obs_vector):
+    import scipy.stats
+
     ordered_statistics = sorted(obs_vector)
     theoretical_quantiles = []
 
@@ -62,7 +85,7 @@ def compute_qq_plot_points(obs_vector):
 
 def compute_sample_mean(obs_vector, confidence_level):
     alpha = 1 - confidence_level
-    standard_normal_quantile = scipy.stats.norm.ppf(1 - alpha / 2)
+    standard_normal_quantile = NormalDist().inv_cdf(1 - alpha / 2)
     obs_number = len(obs_vector)
 
     sample_mean = np.mean(obs_vector, dtype=np.float64)
@@ -81,6 +104,8 @@ def compute_coefficient_of_variation(obs_vector):
 
 
 def plot_qq(theor_quant, ordered_stats, regr_x, regr_y, regr_equation):
+    import matplotlib.pyplot as plt
+
     figure = plt.figure(figsize=(13.66, 7.68))
     plot_axes = plt.gca()
 
@@ -105,15 +130,19 @@ it must be obtained from a scenario with static parameters, i.e. without iterati
 (it must be pre-filtered when exporting from Omnet++).
 '''
 def main():
-    csv_data = pd.read_csv("./InterDepartureTimes.csv", low_memory=False)
+    csv_data = pd.read_csv("./InterDepartureTimes.csv", compression=get_file_compression("./InterDepartureTimes.csv"), low_memory=False)
     interdeparture_dataframe = build_dataframe(csv_data)
     obs_vector = get_all_vecvalues(interdeparture_dataframe)
 
     sample_mean, error = compute_sample_mean(obs_vector, confidence_level=0.99)
+    integrated_autocorrelation_time = compute_integrated_autocorrelation_time(get_vecvalues_per_repetition(interdeparture_dataframe), max_lag=2000)
 
     print("Number of observations: " + str(len(obs_vector)))
     print("Coefficient of variation: " + str(compute_coefficient_of_variation(obs_vector)))
     print("Sample mean: " + str(sample_mean) + "\n" + "Error: " + str(error))
+    print("Integrated autocorrelation time: " + str(integrated_autocorrelation_time))
+    print("Effective sample size: " + str(len(obs_vector)/integrated_autocorrelation_time))
+    print("Error corrected for autocorrelation: " + str(error*math.sqrt(integrated_autocorrelation_time)))
 
     theor_quant, ordered_stats, regr_x, regr_y, regr_equation = compute_qq_plot_points(obs_vector)
 
@@ -0,0 +1,220 @@
+from sharedtools.ResultReader import get_file_compression
+import configparser
+import pandas as pd
+import numpy as np
+import json
+import math
+
+config = configparser.ConfigParser()
+config.read("settings.ini")
+
+CATEGORY_LIST = ["vip", "normal"]
+OCCUPANCY_STATISTIC = {"vip": "numberOfVipCustomersCashierQueueStatistic", "normal": "numberOfNormalCustomersCashierQueueStatistic"}
+WAITING_TIME_STATISTIC = {"vip": "waitingTimeVipCustomerCashierQueueStatistic", "normal": "waitingTimeNormalCustomerCashierQueueStatistic"}
+# Iteration variable of the interarrival time of each customer category
+INTERARRIVAL_ATTRIBUTE = {"vip": "VOP", "normal": "NOP"}
+ATTRIBUTE_LIST = ["CASH", "VOP", "NOP", "repetition"]
+
+
+'''
+Reads the vectors of statistic_list (with their times) from an Omnet++ exported CSV file, possibly compressed.
+Returns a dataframe with a row for each vector and columns ['run' 'statistic' 'vectime' 'vecvalue'], plus a column for
+each run attribute of ATTRIBUTE_LIST found in the file; the interarrival times which are not iteration variables of
+the file are filled with default_attribute_dict (e.g. the waiting time experiments, where only CASH varies).
+'''
+def read_vectors(file_name, statistic_list, default_attribute_dict, chunk_rows=2000):
+    categorical_columns = ["run", "name", "attrname", "attrvalue"]
+    vector_name_list = [statistic_name + ":vector" for statistic_name in statistic_list]
+    chunk_list = []
+
+    for chunk in pd.read_csv(file_name, compression=get_file_compression(file_name), chunksize=chunk_rows,
+                             usecols=categorical_columns + ["vectime", "vecvalue"], dtype={column: "category" for column in categorical_columns}):
+        chunk_list.append(chunk[chunk["attrname"].isin(ATTRIBUTE_LIST) | chunk["name"].isin(vector_name_list)])
+    csv_data = pd.concat(chunk_list, ignore_index=True).astype({column: "str" for column in categorical_columns})
+
+    vector_dataframe = csv_data[csv_data["name"].isin(vector_name_list)][["run", "name", "vectime", "vecvalue"]].dropna()
+    vector_dataframe = vector_dataframe.rename(columns={"name": "statistic"})
+    vector_dataframe["statistic"] = vector_dataframe["statistic"].str.replace(":vector", "", regex=False)
+
+    attribute_dataframe = csv_data[csv_data["attrname"].isin(ATTRIBUTE_LIST)].pivot(index="run", columns="attrname", values="attrvalue")
+    for attribute_name, attribute_value in default_attribute_dict.items():
+        if attribute_name not in attribute_dataframe.columns:
+            attribute_dataframe[attribute_name] = attribute_value
+
+    final_dataframe = vector_dataframe.merge(attribute_dataframe, left_on="run", right_index=True, validate="many_to_one")
+    final_dataframe["repetition"] = pd.to_numeric(final_dataframe["repetition"])
+
+    return final_dataframe
+
+
+'''
+Converts the whitespace separated strings of a column (one for each repetition) into a matrix with a row for each
+repetition, padded with fill_value, so that all the repetitions are processed at once.
+'''
+def get_padded_matrix(string_list, fill_value):
+    vector_list = [np.array(string.split(), dtype=np.float64) for string in string_list]
+    padded_matrix = np.full((len(vector_list), max(len(vector) for vector in vector_list)), fill_value=fill_value)
+    for row, vector in enumerate(vector_list):
+        padded_matrix[row, :len(vector)] = vector
+
+    return padded_matrix
+
+
+'''
+Computes the time average of the piecewise constant signals of each row (the value of a row holds from its time to
+the next one) in the window [start_vector, end_vector] of the row. The times are padded with +inf, so the padding
+lasts 0 once clipped to the window.
+'''
+def compute_time_average(time_matrix, value_matrix, start_vector, end_vector):
+    clipped_time = np.clip(time_matrix, start_vector[:, None], end_vector[:, None])
+    duration_matrix = np.diff(np.hstack((clipped_time, end_vector[:, None])), axis=1)
+
+    return np.sum(value_matrix*duration_matrix, axis=1)/(end_vector - start_vector)
+
+
+'''
+Returns the sample mean of the values across the repetitions and the half-width of its confidence interval
+(Student t, nan with a single repetition).
+'''
+def compute_mean_interval(value_vector, confidence_level):
+    import scipy.stats
+
+    number_repetitions = len(value_vector)
+    mean = float(np.mean(value_vector))
+    if number_repetitions < 2:
+        return mean, math.nan
+
+    student_quantile = scipy.stats.t.ppf(1 - (1 - confidence_level)/2, df=number_repetitions-1)
+    return mean, float(student_quantile*np.std(value_vector, ddof=1)/math.sqrt(number_repetitions))
+
+
+'''
+Computes, for each repetition of a scenario and in one pass over the matrices of all the repetitions:
+1) the time-averaged number of customers in the queue L, from the occupancy vector;
+2) the arrival rate lambda, i.e. the number of waiting times recorded (one when each customer leaves the queue)
+   divided by the length of the observation window;
+3) the mean waiting time W of those customers.
+The observation window of a repetition is the time interval covered by both vectors, so that the two families are
+compared on the same part of the run even if they were recorded with different warm-up periods.
+The occupancy is also averaged on the two halves of the window, to detect a drift due to an insufficient warm-up.
+Returns a dictionary {name: vector with one element for each repetition}.
+'''
+def compute_Little_quantities(occupancy_dataframe, waiting_dataframe):
+    occupancy_time = get_padded_matrix(occupancy_dataframe["vectime"], fill_value=np.inf)
+    occupancy_value = get_padded_matrix(occupancy_dataframe["vecvalue"], fill_value=0)
+    waiting_time = get_padded_matrix(waiting_dataframe["vectime"], fill_value=np.nan)
+    waiting_value = get_padded_matrix(waiting_dataframe["vecvalue"], fill_value=np.nan)
+
+    occupancy_end = np.max(np.where(np.isfinite(occupancy_time), occupancy_time, -np.inf), axis=1)
+    start_vector = np.maximum(occupancy_time[:, 0], waiting_time[:, 0])
+    end_vector = np.minimum(occupancy_end, np.nanmax(waiting_time, axis=1))
+    if np.any(end_vector <= start_vector):
+        exit("ERROR: the occupancy and waiting time vectors of a repetition do not overlap in time")
+    middle_vector = (start_vector + end_vector)/2
+
+    in_window = (waiting_time >= start_vector[:, None]) & (waiting_time <= end_vector[:, None])
+    number_departures = np.sum(in_window, axis=1)
+    if np.any(number_departures == 0):
+        exit("ERROR: no waiting time is recorded in the observation window of a repetition")
+
+    return {"occupancy": compute_time_average(occupancy_time, occupancy_value, start_vector, end_vector),
+            "arrival_rate": number_departures/(end_vector - start_vector),
+            "waiting_time": np.sum(np.where(in_window, waiting_value, 0), axis=1)/number_departures,
+            "first_half_occupancy": compute_time_average(occupancy_time, occupancy_value, start_vector, middle_vector),
+            "second_half_occupancy": compute_time_average(occupancy_time, occupancy_value, middle_vector, end_vector)}
+
+
+'''
+Checks Little's law L = lambda*W for a scenario, given the quantities of its repetitions (see compute_Little_quantities).
+The residual L - lambda*W of each repetition is averaged across the repetitions, with its confidence interval; it is
+relative to the mean occupancy. The scenario is flagged when:
+1) "residual": the residual is significant and its relative value exceeds relative_tolerance, i.e. the customers in
+   the queue at the boundaries of the window weigh too much (the run is too short) or the two families of vectors
+   do not come from the same scenario;
+2) "warm-up": the occupancy of the second half of the window differs significantly (more than relative_tolerance)
+   from the one of the first half, i.e. the transient is not over;
+3) "run length": the confidence interval of the occupancy is wider than relative_tolerance of its mean, so the
+   repetitions are too short (or too few) to estimate it.
+Returns a dictionary with the estimates, the half-widths of their confidence intervals and the list of the flags.
+'''
+def check_Little_law(quantity_dict, confidence_level, relative_tolerance):
+    occupancy, occupancy_error = compute_mean_interval(quantity_dict["occupancy"], confidence_level)
+    product_vector = quantity_dict["arrival_rate"]*quantity_dict["waiting_time"]
+    product, product_error = compute_mean_interval(product_vector, confidence_level)
+    residual, residual_error = compute_mean_interval(quantity_dict["occupancy"] - product_vector, confidence_level)
+    drift, drift_error = compute_mean_interval(quantity_dict["second_half_occupancy"] - quantity_dict["first_half_occupancy"], confidence_level)
+
+    flag_list = []
+    scale = occupancy if occupancy > 0 else 1
+    if abs(residual) > residual_error and abs(residual)/scale > relative_tolerance:
+        flag_list.append("residual")
+    if abs(drift) > drift_error and abs(drift)/scale > relative_tolerance:
+        flag_list.append("warm-up")
+    if not occupancy_error <= relative_tolerance*scale:  # Also when the error is nan
+        flag_list.append("run length")
+
+    return {"repetitions": len(product_vector),
+            "occupancy": occupancy, "occupancy_error": occupancy_error,
+            "arrival_rate": float(np.mean(quantity_dict["arrival_rate"])),
+            "waiting_time": float(np.mean(quantity_dict["waiting_time"])),
+            "Little_product": product, "Little_product_error": product_error,
+            "residual": residual, "residual_error": residual_error, "relative_residual": residual/scale,
+            "drift": drift, "drift_error": drift_error,
+            "flags": ", ".join(flag_list)}
+
+
+'''
+Matches the occupancy and waiting time vectors of the same scenario (customer category, cashier service time and
+interarrival time of the category) and repetition, and checks Little's law for each scenario.
+Returns a dataframe with a row for each scenario.
+'''
+def check_scenarios(occupancy_data, waiting_data, confidence_level, relative_tolerance):
+    report_list = []
+
+    for category in CATEGORY_LIST:
+        key_list = ["CASH", INTERARRIVAL_ATTRIBUTE[category]]
+        occupancy_dataframe = occupancy_data[occupancy_data["statistic"] == OCCUPANCY_STATISTIC[category]]
+        waiting_dataframe = waiting_data[waiting_data["statistic"] == WAITING_TIME_STATISTIC[category]]
+        matched_dataframe = occupancy_dataframe.merge(waiting_dataframe, on=key_list + ["repetition"], suffixes=("_occupancy", "_waiting"),
+                                                      validate="one_to_one")
+
+        for scenario_key, scenario_dataframe in matched_dataframe.groupby(key_list, sort=True):
+            scenario_dataframe = scenario_dataframe.sort_values(by="repetition")
+            quantity_dict = compute_Little_quantities(scenario_dataframe[["vectime_occupancy", "vecvalue_occupancy"]].set_axis(["vectime", "vecvalue"], axis=1),
+                                                      scenario_dataframe[["vectime_waiting", "vecvalue_waiting"]].set_axis(["vectime", "vecvalue"], axis=1))
+
+            report = {"category": category, "CASH": scenario_key[0], "interarrival_time": scenario_key[1]}
+            report.update(check_Little_law(quantity_dict, confidence_level, relative_tolerance))
+            report_list.append(report)
+
+    if len(report_list) == 0:
+        exit("ERROR: no scenario has both the occupancy and the waiting time vectors")
+
+    return pd.DataFrame(report_list)
+
+
+def main():
+    default_attribute_dict = {INTERARRIVAL_ATTRIBUTE["vip"]: config["General"]["vip_interarrival_time"],
+                              INTERARRIVAL_ATTRIBUTE["normal"]: config["General"]["normal_interarrival_time"]}
+    occupancy_file_dict = json.loads(config["General"]["occupancy_file_dict"])
+
+    waiting_data = read_vectors(config["General"]["waiting_time_file"], list(WAITING_TIME_STATISTIC.values()), default_attribute_dict)
+    occupancy_data = pd.concat([read_vectors(occupancy_file_dict[category], [OCCUPANCY_STATISTIC[category]], default_attribute_dict)
+                                for category in CATEGORY_LIST if category in occupancy_file_dict], ignore_index=True)
+
+    report = check_scenarios(occupancy_data, waiting_data, config["Check"].getfloat("confidence_level"), config["Check"].getfloat("relative_tolerance"))
+
+    with pd.option_context("display.max_columns", None, "display.width", 250):
+        print(report)
+
+    flagged_report = report[report["flags"] != ""]
+    print("--- %d of %d scenarios flagged ---" % (len(flagged_report), len(report)))
+    for index, row in flagged_report.iterrows():
+        print("%s, CASH = %s, interarrival time = %s: %s" % (row["category"], row["CASH"], row["interarrival_time"], row["flags"]))
+
+    if config["General"]["report_file"] != "":
+        report.to_csv(config["General"]["report_file"], index=False)
+
+
+if __name__ == "__main__":
+    main()
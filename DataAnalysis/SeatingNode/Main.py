@@ -0,0 +1,46 @@
+from analysistools.SeatNodeAnalysis import SeatNodeAnalysis
+import configparser as cp
+import texttable as tt
+import json
+
+
+config = cp.ConfigParser()
+config.read("settings.ini")
+
+
+def convert_min_to_sec(value):
+    return value * 60
+
+
+def print_comparison(title, header, comparison_list):
+    result_table = tt.Texttable()
+    result_table.header(header)
+    result_table.set_cols_dtype(["t", "e", "e", "e"])
+    result_table.set_precision(4)
+
+    for row in comparison_list:
+        result_table.add_row(row)
+
+    print(title)
+    print(result_table.draw())
+
+
+def main():
+    arrival_rate = 1 / convert_min_to_sec(config["Customer"].getfloat("vip_interarrival_time")) + \
+                   1 / convert_min_to_sec(config["Customer"].getfloat("normal_interarrival_time"))
+    eating_rate = 1 / convert_min_to_sec(config["Customer"].getfloat("eating_time"))
+    confidence_level = config["Analysis"].getfloat("confidence_level")
+    default_configuration = (config["SeatingNode"].getint("number_of_seats"), config["SeatingNode"].getint("queue_size"))
+
+    analysis = SeatNodeAnalysis(json.loads(config["General"]["result_list"]), default_configuration)
+    measure_comparison = analysis.get_measure_comparison(confidence_level, arrival_rate, eating_rate)
+    queue_distribution_comparison = analysis.get_queue_distribution_comparison(confidence_level, arrival_rate, eating_rate)
+
+    for number_of_seats, queue_size in analysis.get_configuration_list():
+        title = "Number of seats = %d, queue size = %d" % (number_of_seats, queue_size)
+        print_comparison(title, ["Measure", "Simulation", "CI half-width", "M/M/c/K"], measure_comparison[(number_of_seats, queue_size)])
+        print_comparison(title, ["Customers in queue", "Simulation", "CI half-width", "M/M/c/K"], queue_distribution_comparison[(number_of_seats, queue_size)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import numpy as np
+import math
+
+
+'''
+Returns the stationary probabilities p_0..p_K of the number of customers in an M/M/c/K node (K = c + queue_size),
+with offered load u = lambda/mu. The terms u^n/n! (n <= c) and u^c/c! (u/c)^(n-c) (n > c) are computed as logarithms
+and normalized with the log-sum-exp trick, so no overflow occurs even for large nodes.
+'''
+def compute_state_probabilities(offered_load, number_of_seats, queue_size):
+    if number_of_seats < 1 or queue_size < 0:
+        exit("ERROR: the M/M/c/K model needs at least one seat and a non-negative queue size")
+
+    state_vector = np.arange(0, number_of_seats + queue_size + 1)
+    log_seated_terms = state_vector[:number_of_seats + 1]*math.log(offered_load) - np.array([math.lgamma(n + 1) for n in state_vector[:number_of_seats + 1]])
+    log_queue_terms = log_seated_terms[-1] + np.arange(1, queue_size + 1)*math.log(offered_load/number_of_seats)
+
+    log_terms = np.concatenate((log_seated_terms, log_queue_terms))
+    log_terms -= np.max(log_terms)
+    state_probabilities = np.exp(log_terms)
+
+    return state_probabilities/np.sum(state_probabilities)
+
+
+'''
+Computes the analytical measures of the seating node as an M/M/c/K node with c = number_of_seats and
+K = number_of_seats + queue_size, fed by the Poisson arrivals of all the customers (arrival_rate) and with exponential
+eating times (eating_rate). The queue is FIFO for both customer categories, so they have the same waiting times.
+Returns a dictionary with the same measures of SeatRunAccumulator.get_measures (times in seconds) and the
+distribution of the number of customers in the queue ("queue_distribution", P(N_q = 0..queue_size)).
+'''
+def get_analytical_measures(arrival_rate, eating_rate, number_of_seats, queue_size):
+    state_probabilities = compute_state_probabilities(arrival_rate/eating_rate, number_of_seats, queue_size)
+    loss_probability = state_probabilities[-1]
+    effective_arrival_rate = arrival_rate*(1 - loss_probability)
+
+    queue_distribution = np.concatenate(([np.sum(state_probabilities[:number_of_seats + 1])], state_probabilities[number_of_seats + 1:]))
+    mean_queue_length = np.dot(np.arange(0, queue_size + 1), queue_distribution)
+    mean_waiting_time = mean_queue_length/effective_arrival_rate
+
+    return {"loss_probability": loss_probability,
+            "mean_queue_length": mean_queue_length,
+            "mean_customers": np.dot(np.arange(0, len(state_probabilities)), state_probabilities),
+            # Probability that an admitted customer finds all the seats taken
+            "waiting_probability": np.sum(state_probabilities[number_of_seats:-1])/(1 - loss_probability) if queue_size > 0 else 0.0,
+            "mean_waiting_time": mean_waiting_time,
+            "mean_waiting_time_vip": mean_waiting_time,
+            "mean_waiting_time_normal": mean_waiting_time,
+            "mean_response_time": mean_waiting_time + 1/eating_rate,
+            "queue_distribution": queue_distribution}
@@ -0,0 +1,58 @@
+from sharedtools.ResultReader import open_decompressed_stream, get_result_extension, stream_native_items, BLOCK_LINES
+import pandas as pd
+import numpy as np
+
+
+CHUNK_ROWS = 16
+
+
+'''
+Streams an Omnet++ CSV export, CHUNK_ROWS rows at a time, so that only a few vectors are in memory at once.
+Yields the same items of stream_results.
+'''
+def stream_csv(csv_stream):
+    for chunk in pd.read_csv(csv_stream, usecols=["run", "type", "name", "attrname", "attrvalue", "value", "vectime", "vecvalue"],
+                             chunksize=CHUNK_ROWS, dtype=str, keep_default_na=False):
+        for run, item_type, name, attrname, attrvalue, value, vectime, vecvalue in chunk.itertuples(index=False, name=None):
+            if attrname != "":
+                if name == "":  # The attributes of the result items (e.g. their title) are not needed
+                    yield "attribute", run, attrname, attrvalue
+            elif item_type == "scalar":
+                yield "scalar", run, name, float(value)
+            elif item_type == "vector" and vecvalue != "":
+                yield "vector", run, name, np.array(vectime.split(), dtype=np.float64), np.array(vecvalue.split(), dtype=np.float64)
+
+
+'''
+Streams a native Omnet++ result file, either a vector file (.vec) or a scalar file (.sca). The data lines of the
+vectors are converted in blocks of BLOCK_LINES lines, so each vector is yielded in chunks, in chronological order.
+Yields the same items of stream_results.
+'''
+def stream_native(native_stream):
+    for item in stream_native_items(native_stream, block_lines=BLOCK_LINES):
+        if item[0] == "vector":
+            yield "vector", item[1], item[2], item[3].astype(np.float64), item[4].astype(np.float64)
+        else:
+            yield item
+
+
+'''
+Streams the results of an Omnet++ result file (CSV export or native .vec/.sca file, optionally compressed with gzip,
+bz2, xz or zstd), without loading the whole file or a whole set of vectors in memory.
+Yields tuples with one of the formats:
+1) ("attribute", run, attribute_name, attribute_value), for the run attributes, iteration variables and configuration;
+2) ("scalar", run, name, value);
+3) ("vector", run, name, time_vector, value_vector), for a chunk of a vector: the chunks of a vector are yielded in
+   chronological order, but they can be interleaved with the ones of other vectors.
+'''
+def stream_results(file_name):
+    extension = get_result_extension(file_name)
+    if extension == ".csv":
+        parser = stream_csv
+    elif extension in [".vec", ".sca"]:
+        parser = stream_native
+    else:
+        exit("ERROR: the format of the result file " + file_name + " is not supported")
+
+    with open(file_name, "rb") as raw_file, open_decompressed_stream(raw_file) as result_stream:
+        yield from parser(result_stream)
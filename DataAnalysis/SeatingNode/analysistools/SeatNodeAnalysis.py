@@ -0,0 +1,121 @@
+from analysistools.ResultStream import stream_results
+from analysistools.SeatRunAccumulator import SeatRunAccumulator, MEASURE_LIST
+from analysistools.MMcKModel import get_analytical_measures
+import numpy as np
+import math
+
+
+'''
+Analysis of the seating node from the results of the seat manager (CSV exports or native .vec/.sca files, possibly
+compressed), compared with the M/M/c/K model.
+The result files are streamed: each run keeps only a SeatRunAccumulator, so the memory does not depend on the length
+of the runs. The runs are grouped by the configuration of the node (number_of_seats, queue_size), read from the
+configuration entries **.seatManager.numberOfSeats and **.seatManager.queueSize recorded in the results; the runs
+which do not record them belong to default_configuration.
+The confidence intervals are computed across the runs of each configuration, i.e. the independent repetitions.
+'''
+class SeatNodeAnalysis:
+    def __init__(self, file_list, default_configuration=None):
+        self.run_dict = dict()
+
+        for file_name in file_list:
+            for item in stream_results(file_name):
+                if item[1] not in self.run_dict:
+                    self.run_dict[item[1]] = SeatRunAccumulator()
+                self.run_dict[item[1]].add(item)
+
+        self.configuration_dict = dict()  # (number_of_seats, queue_size) -> list of run accumulators
+        for run in sorted(self.run_dict):
+            configuration = self.__get_configuration(self.run_dict[run], default_configuration)
+            self.configuration_dict.setdefault(configuration, []).append(self.run_dict[run])
+
+        if len(self.configuration_dict) == 0:
+            exit("ERROR: there are no results to analyse")
+
+    '''
+    Returns the integer value of a configuration entry of the seat manager, or None if it is not recorded or it is
+    not an integer (e.g. an unresolved iteration variable).
+    '''
+    def __get_integer_attribute(self, run_accumulator, name_suffix):
+        attribute_value = run_accumulator.get_attribute(name_suffix)
+        try:
+            return int(attribute_value.split("#")[0].strip())
+        except (AttributeError, ValueError):
+            return None
+
+    def __get_configuration(self, run_accumulator, default_configuration):
+        number_of_seats = self.__get_integer_attribute(run_accumulator, "seatManager.numberOfSeats")
+        queue_size = self.__get_integer_attribute(run_accumulator, "seatManager.queueSize")
+
+        if number_of_seats is None or queue_size is None:
+            if default_configuration is None:
+                exit("ERROR: the configuration of the seating node is not recorded in the results and no default is given")
+            return tuple(default_configuration)
+
+        return number_of_seats, queue_size
+
+    '''
+    Returns the mean of the values of the runs (the nan values are ignored) and the half-width of its confidence
+    interval (Student t); both are nan if there are no values, the half-width if there is a single value.
+    '''
+    def __compute_confidence_interval(self, value_vector, confidence_level):
+        import scipy.stats
+
+        value_vector = np.asarray(value_vector, dtype=np.float64)
+        value_vector = value_vector[~np.isnan(value_vector)]
+        if len(value_vector) == 0:
+            return math.nan, math.nan
+        if len(value_vector) == 1:
+            return float(value_vector[0]), math.nan
+
+        student_quantile = scipy.stats.t.ppf(1 - (1 - confidence_level)/2, df=len(value_vector)-1)
+        return float(np.mean(value_vector)), float(student_quantile*np.std(value_vector, ddof=1)/math.sqrt(len(value_vector)))
+
+    # PUBLIC INTERFACE
+
+    def get_configuration_list(self):
+        return sorted(self.configuration_dict)
+
+    '''
+    Compares the measures of MEASURE_LIST estimated from the runs of each configuration with the ones of the M/M/c/K
+    model with the given arrival rate (all the customers) and eating rate, in customers per second.
+    Returns a dictionary {(number_of_seats, queue_size): list of tuples (measure_name, estimate, error, analytical_value)},
+    where the confidence interval of the estimate is [estimate-error, estimate+error].
+    '''
+    def get_measure_comparison(self, confidence_level, arrival_rate, eating_rate):
+        comparison_dict = dict()
+
+        for (number_of_seats, queue_size), run_list in sorted(self.configuration_dict.items()):
+            measure_dict_list = [run_accumulator.get_measures(queue_size)[0] for run_accumulator in run_list]
+            analytical_dict = get_analytical_measures(arrival_rate, eating_rate, number_of_seats, queue_size)
+
+            comparison_list = []
+            for measure_name in MEASURE_LIST:
+                estimate, error = self.__compute_confidence_interval([measure_dict[measure_name] for measure_dict in measure_dict_list], confidence_level)
+                comparison_list.append((measure_name, estimate, error, float(analytical_dict[measure_name])))
+            comparison_dict[(number_of_seats, queue_size)] = comparison_list
+
+        return comparison_dict
+
+    '''
+    Compares the time-weighted distribution of the number of customers in the queue of each configuration with the
+    one of the M/M/c/K model; the levels above the queue size (possible only with an infinite queue) are added to the
+    last one. Returns a dictionary {(number_of_seats, queue_size): list of tuples (level, estimate, error, analytical_value)}.
+    '''
+    def get_queue_distribution_comparison(self, confidence_level, arrival_rate, eating_rate):
+        comparison_dict = dict()
+
+        for (number_of_seats, queue_size), run_list in sorted(self.configuration_dict.items()):
+            distribution_matrix = np.full((len(run_list), queue_size + 1), fill_value=np.nan)
+            for row, run_accumulator in enumerate(run_list):
+                queue_distribution = run_accumulator.get_measures(queue_size)[1]
+                if queue_distribution is not None:
+                    distribution_matrix[row, :] = 0
+                    distribution_matrix[row, :min(len(queue_distribution), queue_size + 1)] = queue_distribution[:queue_size + 1]
+                    distribution_matrix[row, -1] += np.sum(queue_distribution[queue_size + 1:])
+
+            analytical_distribution = get_analytical_measures(arrival_rate, eating_rate, number_of_seats, queue_size)["queue_distribution"]
+            comparison_dict[(number_of_seats, queue_size)] = [(level,) + self.__compute_confidence_interval(distribution_matrix[:, level], confidence_level) +
+                                                              (float(analytical_distribution[level]),) for level in range(queue_size + 1)]
+
+        return comparison_dict
@@ -0,0 +1,163 @@
+import numpy as np
+import math
+
+
+WAITING_TIME_STATISTIC = {"vip": "waitingTimeVipCustomerTableQueueStatistic:vector", "normal": "waitingTimeNormalCustomerTableQueueStatistic:vector"}
+RESPONSE_TIME_STATISTIC = {"vip": "responseTimeVipCustomerTableNodeStatistic:vector", "normal": "responseTimeNormalCustomerTableNodeStatistic:vector"}
+QUEUE_STATISTIC = "numberOfCustomersTableQueueStatistic:vector"
+DROP_RATE_STATISTIC = "customerDropRateTableStatistic:mean"
+MEASURE_LIST = ["loss_probability", "mean_queue_length", "mean_customers", "waiting_probability", "mean_waiting_time",
+                "mean_waiting_time_vip", "mean_waiting_time_normal", "mean_response_time"]
+
+
+'''
+Running moments of a vector, updated chunk by chunk: number of observations, sum, number of positive observations
+and time of the first and of the last observation.
+'''
+class VectorMoments:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.positive_count = 0
+        self.first_time = math.inf
+        self.last_time = -math.inf
+
+    def update(self, time_vector, value_vector):
+        if len(value_vector) == 0:
+            return
+
+        self.count += len(value_vector)
+        self.total += float(np.sum(value_vector))
+        self.positive_count += int(np.count_nonzero(value_vector > 0))
+        self.first_time = min(self.first_time, time_vector[0])
+        self.last_time = max(self.last_time, time_vector[-1])
+
+
+'''
+Time spent by a piecewise constant integer signal (e.g. the number of customers in a queue, recorded at each change)
+at each level, updated chunk by chunk: only the last recorded change is kept between two chunks, so the memory
+depends only on the largest level.
+'''
+class TimeWeightedOccupancy:
+    def __init__(self):
+        self.level_time = np.zeros(0)
+        self.first_time = None
+        self.last_time = None
+        self.last_value = None
+
+    def __add_segments(self, level_vector, duration_vector):
+        level_vector = level_vector.astype(np.int64)
+        if len(level_vector) > 0 and level_vector.min() < 0:
+            exit("ERROR: the occupancy of a queue cannot be negative")
+
+        chunk_time = np.bincount(level_vector, weights=duration_vector, minlength=len(self.level_time))
+        chunk_time[:len(self.level_time)] += self.level_time
+        self.level_time = chunk_time
+
+    def update(self, time_vector, value_vector):
+        if len(value_vector) == 0:
+            return
+
+        if self.last_time is None:
+            self.first_time = time_vector[0]
+        else:
+            time_vector = np.concatenate(([self.last_time], time_vector))
+            value_vector = np.concatenate(([self.last_value], value_vector))
+
+        # Each value holds until the next change
+        self.__add_segments(value_vector[:-1], np.diff(time_vector))
+        self.last_time = time_vector[-1]
+        self.last_value = value_vector[-1]
+
+    '''
+    Returns the fraction of time spent at each level from the first recorded change to end_time, or None if no
+    change was recorded.
+    '''
+    def get_distribution(self, end_time):
+        if self.last_time is None:
+            return None
+
+        # The final segment is not added to the accumulator, since more chunks may follow
+        last_level = int(self.last_value)
+        level_time = np.zeros(max(len(self.level_time), last_level + 1))
+        level_time[:len(self.level_time)] = self.level_time
+        level_time[last_level] += max(end_time - self.last_time, 0.0)
+
+        return level_time/np.sum(level_time) if np.sum(level_time) > 0 else None
+
+
+'''
+Compact accumulator of the results of a single run of the seating node: it keeps the run attributes, the scalars and,
+for each vector of the seat manager, only its running moments (waiting and response times) or its time-weighted
+distribution (number of customers in the queue), so the vectors are never materialized.
+'''
+class SeatRunAccumulator:
+    def __init__(self):
+        self.attribute_dict = dict()
+        self.scalar_dict = dict()
+        self.moment_dict = {name: VectorMoments() for name in list(WAITING_TIME_STATISTIC.values()) + list(RESPONSE_TIME_STATISTIC.values())}
+        self.queue_occupancy = TimeWeightedOccupancy()
+        self.end_time = -math.inf
+
+    '''
+    Adds an item yielded by stream_results.
+    '''
+    def add(self, item):
+        if item[0] == "attribute":
+            self.attribute_dict[item[2]] = item[3]
+        elif item[0] == "scalar":
+            self.scalar_dict[item[2]] = item[3]
+        else:
+            name, time_vector, value_vector = item[2:]
+            if len(time_vector) > 0:
+                self.end_time = max(self.end_time, time_vector[-1])
+
+            if name in self.moment_dict:
+                self.moment_dict[name].update(time_vector, value_vector)
+            elif name == QUEUE_STATISTIC:
+                self.queue_occupancy.update(time_vector, value_vector)
+
+    '''
+    Returns the value of the first run attribute whose name ends with name_suffix (e.g. the configuration entry
+    "**.seatManager.numberOfSeats"), or None.
+    '''
+    def get_attribute(self, name_suffix):
+        for attribute_name, attribute_value in self.attribute_dict.items():
+            if attribute_name.endswith(name_suffix):
+                return attribute_value
+
+        return None
+
+    '''
+    Returns a tuple (measure_dict, queue_distribution) with the measures of MEASURE_LIST estimated on the run and the
+    fraction of time with 0, 1, ... customers in the queue (a nan measure or a None distribution when the run does not
+    contain the needed results).
+    The mean number of customers in the node is obtained with Little's law, from the throughput and the mean response
+    time; the loss probability is the mean of customerDropRateTable (1 for each dropped customer, 0 otherwise).
+    '''
+    def get_measures(self, queue_size):
+        waiting_moments = [self.moment_dict[WAITING_TIME_STATISTIC[category]] for category in ["vip", "normal"]]
+        response_moments = [self.moment_dict[RESPONSE_TIME_STATISTIC[category]] for category in ["vip", "normal"]]
+
+        def ratio(numerator, denominator):
+            return numerator/denominator if denominator > 0 else math.nan
+
+        waiting_count = sum(moments.count for moments in waiting_moments)
+        response_count = sum(moments.count for moments in response_moments)
+        start_time = min(moments.first_time for moments in response_moments)
+        mean_response_time = ratio(sum(moments.total for moments in response_moments), response_count)
+
+        queue_distribution = self.queue_occupancy.get_distribution(self.end_time)
+        if queue_distribution is None and queue_size == 0:
+            queue_distribution = np.ones(1)  # Without a queue, its occupancy is always 0
+
+        measure_dict = {"loss_probability": self.scalar_dict.get(DROP_RATE_STATISTIC, math.nan),
+                        "mean_queue_length": math.nan if queue_distribution is None else float(np.dot(np.arange(len(queue_distribution)), queue_distribution)),
+                        "mean_customers": ratio(response_count, self.end_time - start_time)*mean_response_time,
+                        "waiting_probability": ratio(sum(moments.positive_count for moments in waiting_moments), waiting_count),
+                        "mean_waiting_time": ratio(sum(moments.total for moments in waiting_moments), waiting_count),
+                        "mean_waiting_time_vip": ratio(waiting_moments[0].total, waiting_moments[0].count),
+                        "mean_waiting_time_normal": ratio(waiting_moments[1].total, waiting_moments[1].count),
+                        "mean_response_time": mean_response_time}
+
+        return measure_dict, queue_distribution
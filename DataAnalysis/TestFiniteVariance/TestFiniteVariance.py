@@ -1,3 +1,4 @@
+from sharedtools.ResultReader import get_file_compression
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
@@ -29,14 +30,14 @@ def get_single_statistic_dataframe(statistic_name, statistic_dataframe):
 
 
 def get_all_vecvalues_obervations(dataframe, sort_values):
+    if sort_values:
+        return np.sort(np.concatenate([np.array(vecvalue.split(), dtype=np.float64) for vecvalue in dataframe["vecvalue"]]))
+
     veclist = []
     for i, row in dataframe.iterrows():
         vecvalue = [float(n) for n in row["vecvalue"].split()]
         veclist.extend(vecvalue)
 
-    if sort_values:
-        veclist.sort()
-
     return veclist
 
 
@@ -78,7 +79,7 @@ def main():
 
 
 
-    statistic_dataframe = build_dataframe(pd.read_csv(csv_name, low_memory=False))
+    statistic_dataframe = build_dataframe(pd.read_csv(csv_name, compression=get_file_compression(csv_name), low_memory=False))
     repetition_dataframe = get_single_statistic_dataframe(statistic_name, statistic_dataframe)
     repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_time]
 
@@ -64,7 +64,7 @@ def plot_histogram(plot_data, x_axis_name="", y_axis_name=""):
             x_axis_full_name = x_axis_name + " (" + cashier_time + ")"
             plot.set_axes_label(x_axis_full_name, y_axis_name)
 
-            plot.add_plot_line(hist_tuple[0], hist_tuple[1], bins=hist_tuple[2], color=color_list[color_index])
+            plot.add_plot_line(hist_tuple[0], hist_tuple[1], hist_tuple[2], color=color_list[color_index])
             color_index = color_index+1
 
             if config["General"].getboolean("save_to_file"):
@@ -104,23 +104,32 @@ def main():
     cashier_level = json.loads(config.get("Analysis", "cashier_level"))
     confidence_level = config["Analysis"].getfloat("confidence_level")
 
-    dataframe_vip = StatisticDataFrame(vip_csv, vip_enabled=True)
-    dataframe_normal = StatisticDataFrame(normal_csv, vip_enabled=False)
+    # Both the experiments are loaded concurrently in a single dataframe, the customer category selects the one to analyse
+    dataframe = StatisticDataFrame({"vip": vip_csv, "normal": normal_csv})
 
     '''************* DATA ANALYSIS *************'''
     start_time = time()
 
-    #sample_mean_vip = dataframe_vip.get_sample_mean(cashier_level, vip_customer_level, confidence_level)
-    #sample_IoD_vip = dataframe_vip.get_index_of_dispersion(cashier_level, vip_customer_level)
-    sample_quantile_vip = dataframe_vip.get_sample_quantile(cashier_level, vip_customer_level, quantile_number=0.95, confidence_level=confidence_level)
-    #histogram_data_vip = dataframe_vip.get_histogram_data(cashier_level, vip_customer_level, bins=np.arange(0, 50))
-    #qq_data_vip = dataframe_vip.get_qq_plot_data(cashier_level, vip_customer_level, theoretical_distribution="weibull", discrete_weibull_shape=3)
-
-    #sample_mean_normal = dataframe_normal.get_sample_mean(cashier_level, normal_customer_level, confidence_level)
-    #sample_IoD_normal = dataframe_normal.get_index_of_dispersion(cashier_level, normal_customer_level)
-    sample_quantile_normal = dataframe_normal.get_sample_quantile(cashier_level, normal_customer_level, quantile_number=0.95, confidence_level=confidence_level)
-    #histogram_data_normal = dataframe_normal.get_histogram_data(cashier_level, normal_customer_level,np.arange(0, 50))
-    #qq_data_normal = dataframe_normal.get_qq_plot_data(cashier_level, normal_customer_level, theoretical_distribution="weibull", discrete_weibull_shape=3)
+    dataframe.set_customer_category(vip_enabled=True)
+    #sample_mean_vip = dataframe.get_sample_mean(cashier_level, vip_customer_level, confidence_level)
+    #sample_IoD_vip = dataframe.get_index_of_dispersion(cashier_level, vip_customer_level)
+    sample_quantile_vip = dataframe.get_sample_quantile(cashier_level, vip_customer_level, quantile_number=0.95, confidence_level=confidence_level)
+    #histogram_data_vip = dataframe.get_histogram_data(cashier_level, vip_customer_level, bins=np.arange(0, 50), time_weighted=True)
+    #qq_data_vip = dataframe.get_qq_plot_data(cashier_level, vip_customer_level, theoretical_distribution="weibull", discrete_weibull_shape=3)
+    #paired_difference_vip = dataframe.get_all_paired_differences(cashier_level, vip_customer_level, confidence_level)
+    #loss_probability_vip = dataframe.get_loss_probability(cashier_level, vip_customer_level, confidence_level)
+    #windowed_loss_probability_vip = dataframe.get_windowed_loss_probability(cashier_level, vip_customer_level, "1d", confidence_level)
+
+    dataframe.set_customer_category(vip_enabled=False)
+    #sample_mean_normal = dataframe.get_sample_mean(cashier_level, normal_customer_level, confidence_level)
+    #sample_IoD_normal = dataframe.get_index_of_dispersion(cashier_level, normal_customer_level)
+    sample_quantile_normal = dataframe.get_sample_quantile(cashier_level, normal_customer_level, quantile_number=0.95, confidence_level=confidence_level)
+    #histogram_data_normal = dataframe.get_histogram_data(cashier_level, normal_customer_level, np.arange(0, 50), time_weighted=True)
+    #qq_data_normal = dataframe.get_qq_plot_data(cashier_level, normal_customer_level, theoretical_distribution="weibull", discrete_weibull_shape=3)
+    #paired_difference_normal = dataframe.get_all_paired_differences(cashier_level, normal_customer_level, confidence_level)
+    #loss_probability_normal = dataframe.get_loss_probability(cashier_level, normal_customer_level, confidence_level)
+    #windowed_loss_probability_normal = dataframe.get_windowed_loss_probability(cashier_level, normal_customer_level, "1d", confidence_level)
+    #paired_difference_vip_normal = dataframe.get_paired_difference(("2min", "5.5min", True), ("2min", "5.5min", False), confidence_level)
 
     print("Data analysis completed")
     print("--- %s seconds ---" % (time() - start_time))
@@ -133,6 +142,11 @@ def main():
     #pprint(sample_IoD_normal)
     #pprint(sample_quantile_vip)
     #pprint(sample_quantile_normal)
+    #pprint(paired_difference_vip)
+    #pprint(paired_difference_normal)
+    #pprint(paired_difference_vip_normal)
+    #pprint(loss_probability_vip)
+    #pprint(loss_probability_normal)
 
     """
     plot_vip = PlotBuilder(plot_profile="comparison")
@@ -0,0 +1,73 @@
+from analysistools.StatisticDataFrame import StatisticDataFrame
+from time import time
+import configparser as cp
+import json
+
+
+config = cp.ConfigParser()
+config.read("settings.ini")
+
+# Parameters of the cashier in omnetpp.ini for each customer category: (queue size, infinite queue flag)
+QUEUE_PARAMETER_DICT = {"vip": ("**.cashier.vipQueueSize", "**.cashier.infiniteVipCustomerQueue"),
+                        "normal": ("**.cashier.normalQueueSize", "**.cashier.infiniteNormalCustomerQueue")}
+
+
+'''
+Prints the queue size of each scenario and returns the largest one with the label of its scenario.
+'''
+def print_dimensioning(dimensioning_data, customer_category):
+    worst_size, worst_label = -1, ""
+
+    print("Queue size of the " + customer_category + " customers (overflow estimate, upper bound):")
+    for cashier_label, dimensioning_list in dimensioning_data.items():
+        for customer_label, queue_size, overflow_estimate, overflow_upper_bound in dimensioning_list:
+            scenario_label = cashier_label + ", " + customer_label
+            print("    %s: %d (%.4g, %.4g)" % (scenario_label, queue_size, overflow_estimate, overflow_upper_bound))
+
+            if queue_size > worst_size:
+                worst_size, worst_label = queue_size, scenario_label
+
+    return worst_size, worst_label
+
+
+'''
+Returns the lines of the omnetpp.ini fragment which sets the finite queue of a customer category.
+'''
+def get_fragment_lines(customer_category, queue_size, overflow_probability, scenario_label):
+    size_parameter, infinite_parameter = QUEUE_PARAMETER_DICT[customer_category]
+    plain_label = scenario_label.replace("$", "").replace("_{", "_").replace("}", "")
+
+    return [infinite_parameter + " = false",
+            size_parameter + " = " + str(queue_size) + " # overflow probability <= " + str(overflow_probability) + ", worst scenario " + plain_label]
+
+
+def main():
+    level_dict = {"vip": json.loads(config.get("Analysis", "vip_level")), "normal": json.loads(config.get("Analysis", "normal_level"))}
+    cashier_level = json.loads(config.get("Analysis", "cashier_level"))
+    confidence_level = config["Analysis"].getfloat("confidence_level")
+    fragment_file = config["Dimensioning"].get("fragment_file", "")
+
+    dataframe = StatisticDataFrame({"vip": config["General"]["vip_csv"], "normal": config["General"]["normal_csv"]})
+
+    start_time = time()
+    fragment_lines = ["# Queue sizes at confidence level " + str(confidence_level) + " over CASH = " + ", ".join(cashier_level)]
+
+    for customer_category in ["vip", "normal"]:
+        overflow_probability = config["Dimensioning"].getfloat(customer_category + "_overflow_probability")
+
+        dataframe.set_customer_category(vip_enabled=customer_category == "vip")
+        dimensioning_data = dataframe.get_queue_dimensioning(cashier_level, level_dict[customer_category], overflow_probability, confidence_level)
+
+        queue_size, scenario_label = print_dimensioning(dimensioning_data, customer_category)
+        fragment_lines += get_fragment_lines(customer_category, queue_size, overflow_probability, scenario_label)
+
+    print("--- %s seconds ---" % (time() - start_time))
+    print("\n".join(fragment_lines))
+
+    if fragment_file != "":
+        with open(fragment_file, "w") as output_file:
+            output_file.write("\n".join(fragment_lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import numpy as np
+
+# Vectors of the drop rate signals: the cashier emits 1 for each lost customer and 0 for each admitted one
+INDICATOR_STATISTIC_LIST = ["vipCustomerDropRateCashierStatistic:vector", "normalCustomerDropRateCashierStatistic:vector"]
+SPACE_CODE, DOT_CODE, ZERO_CODE, ONE_CODE = ord(" "), ord("."), ord("0"), ord("1")
+
+
+'''
+Compact form of a vector of 0/1 indicators (e.g. one element for each arriving customer, 1 if it is lost): only the
+number of elements and the positions of the ones are kept. The string of the times is kept as it is and converted only
+by the queries which need the time of each element (see get_window_counts).
+'''
+class IndicatorVector:
+    def __init__(self, count, one_index, vectime=None):
+        self.count = count
+        self.one_index = one_index
+        self.vectime = vectime
+
+    def get_count(self):
+        return self.count
+
+    def get_one_count(self):
+        return len(self.one_index)
+
+    '''
+    Returns the number of elements and the number of ones in each window [k*window_length, (k+1)*window_length) of
+    simulation time, for k = 0..number_windows-1 (the elements after the last window are not counted).
+    '''
+    def get_window_counts(self, window_length, number_windows):
+        if self.vectime is None:
+            exit("ERROR: the times of the indicator vector are not available")
+
+        window_index = np.floor(np.array(self.vectime.split(), dtype=np.float64)/window_length).astype(np.int64)
+        window_index = np.minimum(window_index, number_windows)  # The last bin collects the elements after the windows
+
+        count_vector = np.bincount(window_index, minlength=number_windows + 1)[:number_windows]
+        one_vector = np.bincount(window_index[self.one_index], minlength=number_windows + 1)[:number_windows]
+
+        return count_vector, one_vector
+
+    '''
+    Returns the time of the last element, or 0 if the times are not available.
+    '''
+    def get_end_time(self):
+        if self.vectime is None or len(self.vectime) == 0:
+            return 0.0
+
+        return float(self.vectime[self.vectime.rfind(" ") + 1:])
+
+
+'''
+Returns the IndicatorVector of a vector given as the string of its values (as in the "vecvalue" column of the Omnet++
+CSV export) and the string of its times, or None if some value is not 0 or 1.
+The values are never converted to numbers: the string is checked on its bytes, where each token (separated by single
+spaces) must be a 0 or a 1, optionally followed by a dot and zeros (e.g. "1", "0.0", "1.000"), and the index of each
+one is the number of spaces before it.
+'''
+def compact_indicator_vector(vecvalue, vectime=None):
+    byte_vector = np.frombuffer(vecvalue.encode("ascii", errors="replace"), dtype=np.uint8)
+    if len(byte_vector) == 0 or byte_vector[-1] == SPACE_CODE:
+        return None
+
+    is_space = byte_vector == SPACE_CODE
+    token_start = np.concatenate(([True], is_space[:-1]))  # A space is never a token start, because of the check below
+    if not np.all((byte_vector[token_start] == ZERO_CODE) | (byte_vector[token_start] == ONE_CODE)):
+        return None
+
+    # The second byte of a token can only be a dot, the following ones only zeros
+    token_second = np.concatenate(([False], token_start[:-1])) & ~is_space
+    if not np.all(byte_vector[token_second] == DOT_CODE):
+        return None
+    if not np.all(byte_vector[~(token_start | token_second | is_space)] == ZERO_CODE):
+        return None
+
+    space_position = np.flatnonzero(is_space)
+    one_position = np.flatnonzero(byte_vector == ONE_CODE)  # The ones can only be token starts
+
+    return IndicatorVector(len(space_position) + 1, np.searchsorted(space_position, one_position), vectime)
+
+
+'''
+Replaces the drop rate vectors (INDICATOR_STATISTIC_LIST) of a parsed result dataframe which contain only 0/1 values
+with their IndicatorVector, stored in the "indicator" column; their "vecvalue" string is released.
+'''
+def compact_indicator_vectors(result_dataframe):
+    indicator_row = result_dataframe["name"].isin(INDICATOR_STATISTIC_LIST) & result_dataframe["vecvalue"].notna()
+    if "indicator" not in result_dataframe.columns:
+        result_dataframe["indicator"] = None
+    result_dataframe["indicator"] = result_dataframe["indicator"].astype(object)
+
+    vecvalue_column, vectime_column, indicator_column = [result_dataframe.columns.get_loc(column) for column in ["vecvalue", "vectime", "indicator"]]
+    for row in np.flatnonzero(indicator_row.to_numpy()):
+        indicator_vector = compact_indicator_vector(result_dataframe.iat[row, vecvalue_column], result_dataframe.iat[row, vectime_column])
+        if indicator_vector is not None:
+            result_dataframe.iat[row, indicator_column] = indicator_vector
+            result_dataframe.iat[row, vecvalue_column] = np.nan
+
+    return result_dataframe
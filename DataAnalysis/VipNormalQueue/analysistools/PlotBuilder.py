@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import configparser as cp
+import numpy as np
 import json
 
 
@@ -19,7 +20,7 @@ class PlotBuilder:
         self.plot_axes.set_xlabel(x_axis_name, fontsize=12, labelpad=10)
         self.plot_axes.set_ylabel(y_axis_name, fontsize=12, labelpad=10, rotation=90)
 
-    def add_plot_line(self, label, x_axis_value, y_axis_value=None, y_error_bar=None, bins=None, regression_x=None, regression_y=None, color='r', marker=None):
+    def add_plot_line(self, label, x_axis_value, y_axis_value=None, y_error_bar=None, regression_x=None, regression_y=None, color='r', marker=None):
         if self.plot_profile["name"] == "COMPARISON":
             self.plot_axes.errorbar(x_axis_value, y_axis_value, yerr=y_error_bar,
                                     label=label, color=color, marker=marker,
@@ -28,9 +29,11 @@ class PlotBuilder:
             plt.xticks(x_axis_value)
 
         elif self.plot_profile["name"] == "HISTOGRAM":
-            self.plot_axes.hist(x_axis_value, bins=bins, range=(0, max(x_axis_value)),
-                                label=label, color=color, edgecolor=self.plot_profile["edgecolor"],
-                                lw=self.plot_profile["line_width"])
+            # Pre-binned histogram: x_axis_value are the bin edges and y_axis_value the counts
+            bin_edges = np.asarray(x_axis_value, dtype=np.float64)
+            self.plot_axes.bar(bin_edges[:-1], y_axis_value, width=np.diff(bin_edges), align="edge",
+                               label=label, color=color, edgecolor=self.plot_profile["edgecolor"],
+                               lw=self.plot_profile["line_width"])
 
         elif self.plot_profile["name"] == "QQ":
             # QQ points
@@ -0,0 +1,126 @@
+from analysistools.IndicatorVector import compact_indicator_vectors
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sharedtools.ResultReader import open_decompressed_stream, get_result_extension, stream_joined_native_items
+import pandas as pd
+
+
+COLUMN_LIST = ["source", "run", "name", "attrname", "attrvalue", "value", "vecvalue", "vectime", "indicator"]
+CATEGORICAL_COLUMN_LIST = ["source", "run", "name", "attrname", "attrvalue"]
+CHUNK_ROWS = 2000
+
+
+'''
+Parses an Omnet++ CSV export from a binary stream, in chunks of CHUNK_ROWS rows and reading only the columns
+needed by the analysis. Returns a dataframe with the columns of COLUMN_LIST (the "source" column is added by the loader).
+The drop rate vectors of each chunk are stored in compact form (see compact_indicator_vectors), so the strings of
+zeros are released as soon as they are read.
+'''
+def parse_csv(csv_stream):
+    chunk_list = []
+    for chunk in pd.read_csv(csv_stream, usecols=lambda column: column in COLUMN_LIST, chunksize=CHUNK_ROWS,
+                             dtype={column: "category" for column in CATEGORICAL_COLUMN_LIST}):
+        chunk_list.append(compact_indicator_vectors(chunk.reindex(columns=COLUMN_LIST[1:])))
+
+    return pd.concat(chunk_list, ignore_index=True)
+
+
+'''
+Parses a native Omnet++ result file, either a vector file (.vec) or a scalar file (.sca), in the same long format
+of the CSV export: one row for each run attribute, one for each scalar and one for each vector, whose observations
+and times are joined in the "vecvalue" and "vectime" strings exactly as they appear in the file (the drop rate
+vectors are then stored in compact form, as in parse_csv).
+'''
+def parse_native(native_stream):
+    row_list = []
+
+    for item in stream_joined_native_items(native_stream):
+        if item[0] == "attribute":
+            row_list.append({"run": item[1], "attrname": item[2], "attrvalue": item[3]})
+        elif item[0] == "scalar":
+            row_list.append({"run": item[1], "name": item[2], "value": item[3]})
+        else:
+            row_list.append({"run": item[1], "name": item[2], "vecvalue": item[4], "vectime": item[3]})
+
+    return compact_indicator_vectors(pd.DataFrame(row_list).reindex(columns=COLUMN_LIST[1:]))
+
+
+'''
+Returns the parser of a result file, chosen according to its extension (ignoring the one of the compression format).
+'''
+def get_parser(file_name):
+    extension = get_result_extension(file_name)
+    if extension == ".csv":
+        return parse_csv
+    if extension in [".vec", ".sca"]:
+        return parse_native
+
+    exit("ERROR: the format of the result file " + file_name + " is not supported")
+
+
+'''
+Parses a (possibly compressed) result file, streaming it from the disk and decompressing it on the fly.
+'''
+def parse_file(file_name):
+    with open(file_name, "rb") as raw_file, open_decompressed_stream(raw_file) as result_stream:
+        return get_parser(file_name)(result_stream)
+
+
+'''
+Loads a set of Omnet++ result files (CSV exports or native .vec/.sca files, optionally compressed with gzip, bz2, xz
+or zstd) into a single dataframe.
+The sources are given as a dictionary {source_name: file_name or list of file names}: every row of the returned
+dataframe has a "source" column identifying the source it comes from, so that the results of different
+experiments (e.g. the VIP and the normal queue configurations) can be stored and queried together.
+The files are parsed concurrently by a pool of processes: each worker receives only the name of a file, which it
+streams from the disk (decompressing it on the fly), so the content of the files is never transferred between
+processes. A single file is parsed in the current process.
+'''
+class ResultLoader:
+    def __init__(self, source_dict, parse_workers=None):
+        self.file_list = []
+        for source_name, file_names in source_dict.items():
+            file_names = [file_names] if isinstance(file_names, str) else file_names
+            self.file_list.extend((source_name, file_name) for file_name in file_names)
+
+        self.parse_workers = parse_workers
+
+    '''
+    Reads and parses all the files, returning a dictionary {(source_name, file_name): parsed dataframe}.
+    '''
+    def __load_all_files(self):
+        if len(self.file_list) == 1:
+            source_name, file_name = self.file_list[0]
+            return {(source_name, file_name): parse_file(file_name)}
+
+        parsed_dict = dict()
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_executor:
+            parse_futures = {parse_executor.submit(parse_file, file_name): (source_name, file_name) for source_name, file_name in self.file_list}
+
+            for parse_future in as_completed(parse_futures):
+                parsed_dict[parse_futures[parse_future]] = parse_future.result()
+
+        return parsed_dict
+
+    '''
+    Returns the dataframe with all the results, in the long format of the Omnet++ CSV export with the additional
+    "source" column (the attributes of a run appear only once per source): ['source' 'run' 'name' 'attrname' 'attrvalue' 'value' 'vecvalue' 'vectime' 'indicator'].
+    The identifiers and the names are stored as categorical codes; the "indicator" column contains the IndicatorVector
+    of the drop rate vectors (whose "vecvalue" is empty) and is empty for the other rows.
+    '''
+    def load(self):
+        parsed_dict = self.__load_all_files()
+
+        dataframe_list = []
+        for source_name, file_name in self.file_list:  # Same order of the sources, regardless of the completion order
+            parsed_dataframe = parsed_dict.pop((source_name, file_name))
+            dataframe_list.append(parsed_dataframe.assign(source=source_name))
+
+        result_dataframe = pd.concat(dataframe_list, ignore_index=True)[COLUMN_LIST]
+        del dataframe_list
+
+        # The run attributes are repeated in every file of the run (e.g. in both the .vec and the .sca file)
+        attribute_row = result_dataframe["attrname"].notna()
+        repeated_attribute = attribute_row & result_dataframe.duplicated(subset=["source", "run", "attrname"])
+        result_dataframe = result_dataframe[~repeated_attribute].reset_index(drop=True)
+
+        return result_dataframe.astype({column: "category" for column in CATEGORICAL_COLUMN_LIST})
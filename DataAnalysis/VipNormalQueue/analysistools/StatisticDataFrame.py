@@ -1,54 +1,126 @@
+from analysistools.ResultLoader import ResultLoader
+from sharedtools.Histogram import get_shared_bin_edges, compute_histogram
 import statsmodels.api as sm
 import configparser as cp
 import pandas as pd
 import numpy as np
 import scipy.stats
 import math
+import os
 
 
 class StatisticDataFrame:
-    def __init__(self, file_name, vip_enabled):
+    QUEUE_STATISTIC = {"VOP": "numberOfVipCustomersCashierQueueStatistic:vector",
+                       "NOP": "numberOfNormalCustomersCashierQueueStatistic:vector"}
+    DROP_RATE_STATISTIC = {"VOP": "vipCustomerDropRateCashierStatistic:vector",
+                           "NOP": "normalCustomerDropRateCashierStatistic:vector"}
+
+    def __init__(self, file_name, vip_enabled=True):
         self.config = cp.ConfigParser()
         self.config.read("settings.ini")
 
-        if vip_enabled:
-            self.customer_category = "VOP"
-        else:
-            self.customer_category = "NOP"
+        self.set_customer_category(vip_enabled)
+
+        # The raw data is not bound to any name here, so it is released as soon as the dataframes are built
+        self.statistic_dataframe, self.indicator_dataframe = self.__build_dataframe(ResultLoader(self.__get_source_dict(file_name)).load())
+
+    '''
+    The results can be given as a single file, as a list of files or as a dictionary {source_name: file or list of files};
+    in the first two cases the name of each source is the name of its file without extension, so that e.g. the .vec
+    and .sca files of the same experiment form a single source.
+    '''
+    def __get_source_dict(self, file_name):
+        if isinstance(file_name, dict):
+            return file_name
 
-        csv_data = pd.read_csv(file_name, low_memory=False)
-        self.statistic_dataframe = self.__build_dataframe(csv_data)
+        source_dict = dict()
+        for single_file in [file_name] if isinstance(file_name, str) else file_name:
+            source_dict.setdefault(os.path.splitext(os.path.basename(single_file))[0], []).append(single_file)
+
+        return source_dict
+
+    '''
+    Converts a time expressed as in the Omnet++ configuration (e.g. "30s", "1.5min", "2h", "5d") in seconds.
+    Values without a time unit are simply converted to float.
+    '''
+    def __convert_to_seconds(self, time_string):
+        unit_multiplier = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+
+        for unit in sorted(unit_multiplier, key=len, reverse=True):
+            if time_string.endswith(unit):
+                return float(time_string[:-len(unit)])*unit_multiplier[unit]
+
+        return float(time_string)
+
+    '''
+    Adds to the dataframe the column seconds_column with the time of time_column (e.g. "1.5min") converted in seconds;
+    each category is converted only once.
+    '''
+    def __add_seconds_column(self, dataframe, time_column, seconds_column):
+        dataframe[time_column] = dataframe[time_column].cat.remove_unused_categories()
+        category_seconds = np.array([self.__convert_to_seconds(category) for category in dataframe[time_column].cat.categories])
+        dataframe[seconds_column] = category_seconds[dataframe[time_column].cat.codes.to_numpy()]
 
     '''
-    Given an Omnet++ exported CSV file, it returns a dataframe in a suitable format for data analysis.
-    The dataframe has columns: ['run' 'cashiervalue' 'customervalue' 'repetition' 'statistic' 'vecvalue' 'vectime']
+    Given the Omnet++ results loaded by a ResultLoader, it returns a tuple of two dataframes in a suitable format for
+    data analysis. The first one has columns: ['source' 'run' 'cashiervalue' 'customercategory' 'customervalue' 'repetition'
+    'statistic' 'vecvalue' 'vectime' 'cashierseconds' 'customerseconds'], where:
+    1) customercategory is "VOP" for the runs iterating the VIP interarrival time and "NOP" for the normal one;
+    2) only the queue occupancy vector of the customer category of each run is kept;
+    3) the last two columns are the numeric values of cashiervalue and customervalue in seconds.
+    The second one has the same columns, except that it contains the drop rate vectors of the customer category of
+    each run (if recorded), stored in compact form in the column 'indicator' instead of 'vecvalue'.
     '''
     def __build_dataframe(self, csv_data):
-        cashier_column = csv_data[csv_data["attrname"] == "CASH"][["run", "attrvalue"]]
+        cashier_column = csv_data[csv_data["attrname"] == "CASH"][["source", "run", "attrvalue"]]
         cashier_column.rename(columns={'attrvalue': 'cashiervalue'}, inplace=True)
 
-        customer_column = csv_data[csv_data["attrname"] == self.customer_category][["run", "attrvalue"]]
-        customer_column.rename(columns={'attrvalue': 'customervalue'}, inplace=True)
+        customer_column = csv_data[csv_data["attrname"].isin(list(self.QUEUE_STATISTIC))][["source", "run", "attrname", "attrvalue"]]
+        customer_column.rename(columns={'attrname': 'customercategory', 'attrvalue': 'customervalue'}, inplace=True)
 
-        vector_column = csv_data[["run", "name", "vecvalue", "vectime"]].dropna()
+        vector_column = csv_data[["source", "run", "name", "vecvalue", "vectime", "indicator"]]
+        vector_column = vector_column[vector_column["vecvalue"].notna() | vector_column["indicator"].notna()]
         vector_column.rename(columns={'name': 'statistic'}, inplace=True)
 
-        repetition_column = csv_data[(csv_data["attrname"] == "repetition")][["run", "attrvalue"]]
+        repetition_column = csv_data[(csv_data["attrname"] == "repetition")][["source", "run", "attrvalue"]]
         repetition_column.rename(columns={'attrvalue': 'repetition'}, inplace=True)
+        del csv_data  # Only the selected rows are still referenced
 
-        final_dataframe = cashier_column.merge(customer_column, left_on="run", right_on="run", validate="one_to_one")
-        final_dataframe = final_dataframe.merge(repetition_column, left_on="run", right_on="run", validate="one_to_one")
-        final_dataframe = final_dataframe.merge(vector_column, left_on="run", right_on="run", validate="one_to_one")
-        final_dataframe["repetition"] = pd.to_numeric(final_dataframe["repetition"])
+        run_key = ["source", "run"]
+        final_dataframe = cashier_column.merge(customer_column, on=run_key, validate="one_to_one")
+        final_dataframe = final_dataframe.merge(repetition_column, on=run_key, validate="one_to_one")
+        final_dataframe = final_dataframe.merge(vector_column, on=run_key, validate="one_to_many")
 
-        return final_dataframe
+        final_dataframe["repetition"] = final_dataframe["repetition"].cat.remove_unused_categories().astype(np.int64)
+        self.__add_seconds_column(final_dataframe, "cashiervalue", "cashierseconds")
+        self.__add_seconds_column(final_dataframe, "customervalue", "customerseconds")
+
+        customer_category = final_dataframe["customercategory"].astype(str)
+        statistic_dataframe = final_dataframe[final_dataframe["statistic"].astype(str) == customer_category.map(self.QUEUE_STATISTIC)]
+        indicator_dataframe = final_dataframe[(final_dataframe["statistic"].astype(str) == customer_category.map(self.DROP_RATE_STATISTIC)) &
+                                              final_dataframe["indicator"].notna()]
+        del final_dataframe
+
+        dataframe_list = []
+        for dataframe, value_column in [(statistic_dataframe, "vecvalue"), (indicator_dataframe, "indicator")]:
+            dataframe = dataframe.drop(columns=["indicator" if value_column == "vecvalue" else "vecvalue"]).reset_index(drop=True)
+            for column in ["source", "run", "customercategory", "statistic"]:
+                dataframe[column] = dataframe[column].cat.remove_unused_categories()
+            dataframe_list.append(dataframe)
+
+        return tuple(dataframe_list)
 
     '''
-    Returns the dataframe rows associated to the specified combination of cashier service time and customer arrival time.
+    Returns the dataframe rows associated to the specified combination of cashier service time and customer arrival time,
+    for the given customer category ("VOP" or "NOP"; the current one if None).
     The rows are sorted by repetition number in ascending order. 
     '''
-    def __get_single_scenario_dataframe(self, cashier_time, customer_time):
-        single_scenario_dataframe = self.statistic_dataframe[(self.statistic_dataframe["cashiervalue"] == cashier_time) & (self.statistic_dataframe["customervalue"] == customer_time)]
+    def __get_single_scenario_dataframe(self, cashier_time, customer_time, customer_category=None):
+        if customer_category is None:
+            customer_category = self.customer_category
+
+        single_scenario_dataframe = self.statistic_dataframe[(self.statistic_dataframe["cashiervalue"] == cashier_time) & (self.statistic_dataframe["customervalue"] == customer_time) &
+                                                             (self.statistic_dataframe["customercategory"] == customer_category)]
         single_scenario_dataframe = single_scenario_dataframe.sort_values(by=["repetition"], ascending=True)
 
         return single_scenario_dataframe
@@ -89,6 +161,26 @@ class StatisticDataFrame:
 
         return veclist
 
+    '''
+    Returns the observations of all the repetitions of the dataframe as a single float64 array. If time_weighted is
+    True, it also returns the time spent in each observed state (the time until the next observation), so the last
+    observation of each repetition is discarded, as in the time averages; otherwise the weights are None.
+    '''
+    def __get_weighted_observations(self, dataframe, time_weighted):
+        obs_vector_list, weight_vector_list = [], []
+
+        for vecvalue, vectime in zip(dataframe["vecvalue"], dataframe["vectime"]):
+            obs_vector = np.array(vecvalue.split(), dtype=np.float64)
+            if time_weighted:
+                weight_vector_list.append(np.diff(np.array(vectime.split(), dtype=np.float64)))
+                obs_vector = obs_vector[:-1]
+            obs_vector_list.append(obs_vector)
+
+        obs_vector = np.concatenate(obs_vector_list) if len(obs_vector_list) > 0 else np.empty(0)
+        weight_vector = np.concatenate(weight_vector_list) if time_weighted and len(weight_vector_list) > 0 else None
+
+        return obs_vector, weight_vector
+
     '''
     Given a list of vecvalues and vectimes across repetitions, the method computes the time average of 
     the queue occupancy for each repetition and returns them in the form of a list. 
@@ -106,6 +198,78 @@ class StatisticDataFrame:
 
         return time_average_list
 
+    '''
+    Returns a tuple (repetition_vector, time_average_vector) for the given combination of cashier service time and
+    customer interarrival time, where the i-th time average of the queue occupancy refers to the i-th repetition number.
+    '''
+    def __get_time_average_per_repetition(self, cashier_time, customer_time, customer_category):
+        repetition_dataframe = self.__get_single_scenario_dataframe(cashier_time, customer_time, customer_category)
+
+        obs_vector_list = self.__get_list_of_converted_vecvalues(repetition_dataframe)
+        obs_time_vector_list = self.__get_list_of_converted_vecvalues(repetition_dataframe, vectime=True)
+        time_average_list = self.__compute_time_average(obs_vector_list, obs_time_vector_list)
+
+        return repetition_dataframe["repetition"].to_numpy(), np.array(time_average_list, dtype=np.float64)
+
+    '''
+    Given a list of scenarios in the form (cashier_time, customer_time, customer_category), builds a matrix where each row contains the
+    time averages of a scenario and each column refers to the same repetition number across all the scenarios.
+    Since the seed-set is bound to the repetition number, the values in the same column are obtained with
+    common random numbers. Repetitions not available in every scenario are discarded.
+    '''
+    def __build_paired_repetition_matrix(self, scenario_list):
+        repetition_per_scenario, time_average_per_scenario = [], []
+
+        for cashier_time, customer_time, customer_category in scenario_list:
+            repetition_vector, time_average_vector = self.__get_time_average_per_repetition(cashier_time, customer_time, customer_category)
+            repetition_per_scenario.append(repetition_vector)
+            time_average_per_scenario.append(time_average_vector)
+
+        common_repetitions = repetition_per_scenario[0]
+        for repetition_vector in repetition_per_scenario[1:]:
+            common_repetitions = np.intersect1d(common_repetitions, repetition_vector)
+
+        if any(len(repetition_vector) != len(common_repetitions) for repetition_vector in repetition_per_scenario):
+            print("WARNING: some repetitions are not available in every scenario and they are excluded from the paired analysis")
+
+        paired_matrix = np.empty(shape=(len(scenario_list), len(common_repetitions)), dtype=np.float64)
+        for scenario_index, repetition_vector in enumerate(repetition_per_scenario):
+            paired_matrix[scenario_index] = time_average_per_scenario[scenario_index][np.isin(repetition_vector, common_repetitions)]
+
+        return paired_matrix
+
+    '''
+    Given a matrix of time averages (scenarios x repetitions) obtained with common random numbers, computes at once
+    the paired differences between every couple of scenarios (i, j).
+    Returns a tuple (mean_matrix, error_matrix, variance_reduction_matrix) of square matrices, where:
+    1) mean_matrix[i][j] is the sample mean of the per-repetition differences X_i - X_j;
+    2) error_matrix[i][j] is such that the confidence interval is [mean-error, mean+error]. Since the paired design
+       is meant to reduce the number of repetitions, the Student's t quantile with r-1 degrees of freedom is used;
+    3) variance_reduction_matrix[i][j] is the ratio (Var(X_i) + Var(X_j)) / Var(X_i - X_j), i.e. how many times
+       the variance of the difference is reduced with respect to two independent sets of repetitions.
+    '''
+    def __compute_paired_differences(self, paired_matrix, confidence_level):
+        number_repetitions = paired_matrix.shape[1]
+        if number_repetitions < 2:
+            exit("ERROR: at least two common repetitions are needed to compute a paired difference")
+
+        alpha = 1 - confidence_level
+        student_quantile = scipy.stats.t.ppf(1 - alpha/2, df=number_repetitions-1)
+
+        # Shape (scenarios, scenarios, repetitions): all the per-repetition differences in a single broadcast
+        difference_tensor = paired_matrix[:, np.newaxis, :] - paired_matrix[np.newaxis, :, :]
+
+        mean_matrix = np.mean(difference_tensor, axis=2, dtype=np.float64)
+        difference_variance = np.var(difference_tensor, axis=2, ddof=1, dtype=np.float64)
+        error_matrix = np.sqrt(difference_variance/number_repetitions)*student_quantile
+
+        scenario_variance = np.var(paired_matrix, axis=1, ddof=1, dtype=np.float64)
+        independent_variance = scenario_variance[:, np.newaxis] + scenario_variance[np.newaxis, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance_reduction_matrix = np.where(difference_variance > 0, independent_variance/difference_variance, np.inf)
+
+        return mean_matrix, error_matrix, variance_reduction_matrix
+
     '''
     Computes the sample quantile of the given list of observations and its confidence interval at the specified level.
     Returns a tuple (sample_quantile, lower_error, upper_error), where the errors are in a format suitable for a plot.
@@ -187,8 +351,99 @@ class StatisticDataFrame:
         return theoretical_quantiles, ordered_statistics, regression_x.tolist(), regression_y.tolist(), regr_equation
 
 
+    '''
+    Returns the matrix (repetitions x levels) of the fraction of time that each repetition of the dataframe spends with
+    at least b customers in the queue, for b = 0..max_level+1, where max_level is the largest observed occupancy (so
+    the last column is 0). The time spent at each level is obtained with a weighted np.bincount of each vector.
+    The repetitions whose vector has less than two changes of occupancy (i.e. no time interval) are excluded.
+    '''
+    def __get_time_weighted_tail_matrix(self, dataframe):
+        level_time_list = []
+        for repetition, vecvalue, vectime in zip(dataframe["repetition"], dataframe["vecvalue"], dataframe["vectime"]):
+            obs_vector = np.array(vecvalue.split(), dtype=np.float64)
+            time_vector = np.array(vectime.split(), dtype=np.float64)
+            if len(obs_vector) < 2 or time_vector[-1] <= time_vector[0]:
+                print("WARNING: the repetition " + str(repetition) + " has less than two changes of the queue occupancy and it is excluded")
+                continue
+            level_time_list.append(np.bincount(obs_vector[:-1].astype(np.int64), weights=np.diff(time_vector)))
+
+        level_fraction_matrix = np.zeros((len(level_time_list), max((len(level_time) for level_time in level_time_list), default=0) + 1))
+        for row, level_time in enumerate(level_time_list):
+            level_fraction_matrix[row, :len(level_time)] = level_time/np.sum(level_time)
+
+        # P(N >= b) = 1 - P(N <= b-1), clipped to remove the rounding errors of the cumulative sum
+        cumulative_matrix = np.cumsum(level_fraction_matrix, axis=1)
+        return np.clip(1 - np.hstack((np.zeros((len(level_time_list), 1)), cumulative_matrix[:, :-1])), 0, 1)
+
+    '''
+    Returns the drop rate vectors (IndicatorVector) of the repetitions of the given scenario, sorted by repetition number.
+    '''
+    def __get_indicator_vector_list(self, cashier_time, customer_time):
+        indicator_dataframe = self.indicator_dataframe[(self.indicator_dataframe["cashiervalue"] == cashier_time) & (self.indicator_dataframe["customervalue"] == customer_time) &
+                                                       (self.indicator_dataframe["customercategory"] == self.customer_category)]
+        if len(indicator_dataframe) == 0:
+            exit("ERROR: the results do not contain the drop rate vectors of the scenario " + self.__get_scenario_label(cashier_time, customer_time, self.customer_category))
+
+        return indicator_dataframe.sort_values(by=["repetition"], ascending=True)["indicator"].tolist()
+
+    '''
+    Estimates a probability from the counts of the independent repetitions (e.g. lost and arrived customers), column by
+    column of the matrices (repetitions x windows): the estimate is the ratio of the totals and the half-width of its
+    confidence interval is obtained with the delta method, from the residuals one_r - estimate*count_r of the
+    repetitions, with the Student t quantile. It does not assume independent events within a repetition.
+    '''
+    def __compute_ratio_estimate(self, count_matrix, one_matrix, confidence_level):
+        count_matrix = np.asarray(count_matrix, dtype=np.float64)
+        one_matrix = np.asarray(one_matrix, dtype=np.float64)
+        number_repetitions = count_matrix.shape[0]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            estimate = np.sum(one_matrix, axis=0)/np.sum(count_matrix, axis=0)
+            if number_repetitions < 2:
+                return estimate, np.full(estimate.shape, fill_value=np.nan)
+
+            residual_matrix = one_matrix - estimate*count_matrix
+            standard_error = np.sqrt(np.sum(residual_matrix**2, axis=0)/(number_repetitions - 1)/number_repetitions)/np.mean(count_matrix, axis=0)
+
+        alpha = 1 - confidence_level
+        return estimate, scipy.stats.t.ppf(1 - alpha/2, df=number_repetitions - 1)*standard_error
+
+    '''
+    Returns a label identifying the combination of cashier service time and customer interarrival time.
+    '''
+    def __get_scenario_label(self, cashier_time, customer_time, customer_category):
+        customer_category = "VIP" if customer_category == "VOP" else "NORMAL"
+        return r'$T_{CASHIER} = ' + cashier_time + r', T_{' + customer_category + '} = ' + customer_time + '$'
+
+    '''
+    A scenario can be given as (cashier_time, customer_time), referring to the current customer category, or as
+    (cashier_time, customer_time, vip_enabled). Returns the tuple (cashier_time, customer_time, customer_category).
+    '''
+    def __get_full_scenario(self, scenario):
+        if len(scenario) == 2:
+            return scenario[0], scenario[1], self.customer_category
+
+        return scenario[0], scenario[1], "VOP" if scenario[2] else "NOP"
+
+
     # PUBLIC INTERFACE
 
+    '''
+    Selects the customer category (VIP if vip_enabled is True, normal otherwise) analysed by the following calls.
+    When several sources are loaded, the same object can analyse both the VIP and the normal experiments.
+    '''
+    def set_customer_category(self, vip_enabled):
+        if vip_enabled:
+            self.customer_category = "VOP"
+        else:
+            self.customer_category = "NOP"
+
+    '''
+    Returns the list of the names of the loaded sources.
+    '''
+    def get_source_list(self):
+        return self.statistic_dataframe["source"].cat.categories.tolist()
+
     '''
     Computes the sample mean and the relative confidence interval for the number of customers in the queue 
     for each combination of cashier service time and customer interarrival time_list.
@@ -289,26 +544,37 @@ class StatisticDataFrame:
         return quantile_dict
 
     '''
-    Gathers all the information needed to plot an histogram for each combination of cashier service time and customer
-    interarrival time: it returns a dictionary where each key represents a cashier level and 
-    each value is a list of tuples with the format (customer_label, x_vector, number_of_bins).
-    In particular:
-    1) x_vector contains all the observations (across repetitions) gathered with the associated customer time; 
-    2) number_of_bins is the number of buckets to be used in the histogram plot; it is the same passed as argument.
+    Computes the histogram of the number of customers in the queue for each combination of cashier service time and
+    customer interarrival time. bins is either the number of bins, which divide the range from 0 to the largest
+    observation in equal parts, or the sequence of the bin edges: the occupancy is integer-valued, so with unit
+    integer bins (e.g. np.arange(0, 50)) the counts are computed with np.bincount.
+    If time_weighted is True, each observation is weighted with the time spent in that state and the counts are
+    normalized, i.e. they are the fractions of time with each number of customers (whose mean is the time average
+    occupancy); otherwise they are the numbers of observations (changes of the occupancy).
+    If shared_bin_edges is True, the bins are the same for all the scenarios, so the histograms can be compared.
+    It returns a dictionary where each key represents a cashier level and each value is a list of tuples
+    with the format (customer_label, bin_edges, counts), where bin_edges has one element more than counts.
     '''
-    def get_histogram_data(self, cashier_level, customer_level, bins):
+    def get_histogram_data(self, cashier_level, customer_level, bins, time_weighted=False, shared_bin_edges=True):
+        scenario_list = [(cashier_time, customer_time) for cashier_time in cashier_level for customer_time in customer_level]
+        observation_dict = {scenario: self.__get_weighted_observations(self.__get_single_scenario_dataframe(*scenario), time_weighted)
+                            for scenario in scenario_list}
+        shared_edges = get_shared_bin_edges([obs_vector for obs_vector, _ in observation_dict.values()], bins) if shared_bin_edges else None
         histogram_dict = dict()
 
         for cashier_time in cashier_level:
             hist_data = []
 
             for customer_time in customer_level:
-                repetition_dataframe = self.__get_single_scenario_dataframe(cashier_time, customer_time)
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_dataframe)
+                obs_vector, weight_vector = observation_dict[(cashier_time, customer_time)]
+                bin_edges = shared_edges if shared_bin_edges else get_shared_bin_edges([obs_vector], bins)
+                counts = compute_histogram(obs_vector, bin_edges, weight_vector, integer_values=True)
+                if time_weighted and weight_vector.sum() > 0:
+                    counts = counts/weight_vector.sum()
 
                 customer_category = "VIP" if self.customer_category == "VOP" else "NORMAL"
                 customer_label = r'$T_{' + customer_category + '} = ' + customer_time + '$'
-                hist_data.append((customer_label, obs_vector, bins))
+                hist_data.append((customer_label, bin_edges, counts))
 
             cashier_label = r'$T_{CASHIER} = ' + cashier_time + '$'
             histogram_dict[cashier_label] = hist_data
@@ -348,6 +614,170 @@ class StatisticDataFrame:
 
         return qq_dict
 
+    '''
+    Computes the paired difference between the time average occupancy of two scenarios, each one specified as a tuple
+    (cashier_time, customer_time) or (cashier_time, customer_time, vip_enabled), so that scenarios of different
+    customer categories can be compared. The repetitions of the two scenarios are paired by repetition number, i.e. by
+    seed-set, so that the comparison exploits common random numbers.
+    Returns a tuple (difference_label, mean_difference, error, error, variance_reduction_factor), where the error
+    (replicated twice to help plotting) is such that the confidence interval is [mean-error, mean+error] and
+    variance_reduction_factor is the ratio between the variance of the difference obtained with independent
+    repetitions and the one obtained with the paired design.
+    '''
+    def get_paired_difference(self, first_scenario, second_scenario, confidence_level):
+        first_scenario, second_scenario = self.__get_full_scenario(first_scenario), self.__get_full_scenario(second_scenario)
+        paired_matrix = self.__build_paired_repetition_matrix([first_scenario, second_scenario])
+        mean_matrix, error_matrix, variance_reduction_matrix = self.__compute_paired_differences(paired_matrix, confidence_level)
+
+        difference_label = self.__get_scenario_label(*first_scenario) + " - " + self.__get_scenario_label(*second_scenario)
+
+        return difference_label, mean_matrix[0][1], error_matrix[0][1], error_matrix[0][1], variance_reduction_matrix[0][1]
+
+    '''
+    Computes the paired differences of the time average occupancy between all the couples of scenarios obtained
+    combining the given cashier and customer levels; all the differences are computed in a single vectorized pass.
+    Returns a dictionary where each key is the label of a scenario X and each value is a list of tuples with the
+    format (scenario_label, mean_difference, error, error, variance_reduction_factor), one for each other scenario Y.
+    The values refer to the difference X - Y and have the same meaning as in get_paired_difference().
+    '''
+    def get_all_paired_differences(self, cashier_level, customer_level, confidence_level):
+        scenario_list = [(cashier_time, customer_time, self.customer_category) for cashier_time in cashier_level for customer_time in customer_level]
+        scenario_label_list = [self.__get_scenario_label(*scenario) for scenario in scenario_list]
+
+        paired_matrix = self.__build_paired_repetition_matrix(scenario_list)
+        mean_matrix, error_matrix, variance_reduction_matrix = self.__compute_paired_differences(paired_matrix, confidence_level)
+
+        paired_difference_dict = dict()
+        for i, first_label in enumerate(scenario_label_list):
+            difference_data = []
+
+            for j, second_label in enumerate(scenario_label_list):
+                if i == j:
+                    continue
+                difference_data.append((second_label, mean_matrix[i][j], error_matrix[i][j], error_matrix[i][j], variance_reduction_matrix[i][j]))
+
+            paired_difference_dict[first_label] = difference_data
+
+        return paired_difference_dict
+
+    '''
+    Computes the smallest size of the queue of the current customer category such that the probability of overflow,
+    i.e. that an arriving customer finds the queue full, does not exceed overflow_probability with the given
+    confidence, for each combination of cashier service time and customer interarrival time.
+    The results must come from runs with an infinite queue: by PASTA, an arriving customer finds at least b customers
+    with probability equal to the fraction of time with at least b customers in the queue. This fraction is computed
+    for every b in each repetition (time-weighted occupancy distribution) and its upper confidence bound is the one-sided
+    Student t bound across the repetitions; the queue size is the smallest b whose bound does not exceed
+    overflow_probability, i.e. a conservative time-weighted (1-overflow_probability)-quantile of the occupancy plus one.
+    All the scenarios are obtained from a single pass over the vectors of the current customer category.
+    It returns a dictionary where each key represents a cashier level and each value is a list of tuples with the format
+    (customer_label, queue_size, overflow_estimate, overflow_upper_bound), where the last two refer to queue_size.
+    '''
+    def get_queue_dimensioning(self, cashier_level, customer_level, overflow_probability, confidence_level):
+        category_dataframe = self.statistic_dataframe[(self.statistic_dataframe["customercategory"] == self.customer_category) &
+                                                      self.statistic_dataframe["cashiervalue"].isin(cashier_level) &
+                                                      self.statistic_dataframe["customervalue"].isin(customer_level)]
+        scenario_dict = {scenario: scenario_dataframe for scenario, scenario_dataframe in
+                         category_dataframe.groupby(["cashiervalue", "customervalue"], observed=True, sort=False)}
+        dimensioning_dict = dict()
+
+        for cashier_time in cashier_level:
+            dimensioning_data = []
+
+            for customer_time in customer_level:
+                if (cashier_time, customer_time) not in scenario_dict:
+                    exit("ERROR: the results do not contain the scenario " + self.__get_scenario_label(cashier_time, customer_time, self.customer_category))
+                tail_matrix = self.__get_time_weighted_tail_matrix(scenario_dict[(cashier_time, customer_time)])
+
+                number_repetitions = tail_matrix.shape[0]
+                if number_repetitions < 2:
+                    exit("ERROR: at least two repetitions with more than one change of the queue occupancy are needed to dimension the queue with confidence")
+                student_quantile = scipy.stats.t.ppf(confidence_level, df=number_repetitions - 1)
+                tail_vector = np.mean(tail_matrix, axis=0)
+                upper_bound_vector = tail_vector + student_quantile*np.std(tail_matrix, axis=0, ddof=1)/math.sqrt(number_repetitions)
+
+                satisfying_size = np.flatnonzero(upper_bound_vector <= overflow_probability)
+                if len(satisfying_size) == 0:
+                    exit("ERROR: no queue size meets the overflow probability " + str(overflow_probability) + " in the scenario " +
+                         self.__get_scenario_label(cashier_time, customer_time, self.customer_category))
+                queue_size = int(satisfying_size[0])
+
+                customer_category = "VIP" if self.customer_category == "VOP" else "NORMAL"
+                customer_label = r'$T_{' + customer_category + '} = ' + customer_time + '$'
+                dimensioning_data.append((customer_label, queue_size, float(tail_vector[queue_size]), float(upper_bound_vector[queue_size])))
+
+            cashier_label = r'$T_{CASHIER} = ' + cashier_time + '$'
+            dimensioning_dict[cashier_label] = dimensioning_data
+
+        return dimensioning_dict
+
+    '''
+    Computes the loss probability of the customers at the cashier (dropped because their queue is full) for each
+    combination of cashier service time and customer interarrival time, from the drop rate vectors of the customer
+    category, which must be recorded as vectors (they are read in compact form, as counts and positions of the losses).
+    It returns a dictionary where each key represents a cashier level and each value is a list of tuples with the format
+    (customer_label, loss_probability, error, error, repetition_loss_vector), where:
+    1) loss_probability is the ratio between the lost and the arrived customers of all the repetitions and the error
+       (replicated twice to help plotting) is such that the confidence interval is [loss_probability-error, loss_probability+error];
+    2) repetition_loss_vector contains the loss probability of each repetition, in order of repetition number.
+    '''
+    def get_loss_probability(self, cashier_level, customer_level, confidence_level):
+        loss_dict = dict()
+
+        for cashier_time in cashier_level:
+            loss_data = []
+
+            for customer_time in customer_level:
+                indicator_vector_list = self.__get_indicator_vector_list(cashier_time, customer_time)
+                count_vector = np.array([indicator_vector.get_count() for indicator_vector in indicator_vector_list])
+                loss_vector = np.array([indicator_vector.get_one_count() for indicator_vector in indicator_vector_list])
+
+                loss_probability, error = self.__compute_ratio_estimate(count_vector[:, np.newaxis], loss_vector[:, np.newaxis], confidence_level)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    repetition_loss_vector = loss_vector/count_vector
+
+                customer_category = "VIP" if self.customer_category == "VOP" else "NORMAL"
+                customer_label = r'$T_{' + customer_category + '} = ' + customer_time + '$'
+                loss_data.append((customer_label, loss_probability[0], error[0], error[0], repetition_loss_vector))
+
+            cashier_label = r'$T_{CASHIER} = ' + cashier_time + '$'
+            loss_dict[cashier_label] = loss_data
+
+        return loss_dict
+
+    '''
+    Computes the loss probability of the customers at the cashier (see get_loss_probability) in consecutive windows of
+    simulation time of length window_length (in seconds or as in the Omnet++ configuration, e.g. "1h"), e.g. to check
+    that the warm-up period is over. The windows start at time 0 and cover the longest repetition.
+    It returns a dictionary where each key represents a cashier level and each value is a list of tuples with the format
+    (customer_label, window_start_vector, loss_vector, error_vector); the loss probability of a window without
+    arrivals is nan.
+    '''
+    def get_windowed_loss_probability(self, cashier_level, customer_level, window_length, confidence_level):
+        if isinstance(window_length, str):
+            window_length = self.__convert_to_seconds(window_length)
+        loss_dict = dict()
+
+        for cashier_time in cashier_level:
+            loss_data = []
+
+            for customer_time in customer_level:
+                indicator_vector_list = self.__get_indicator_vector_list(cashier_time, customer_time)
+                number_windows = max(int(math.floor(max(indicator_vector.get_end_time() for indicator_vector in indicator_vector_list)/window_length)) + 1, 1)
+                window_count_list = [indicator_vector.get_window_counts(window_length, number_windows) for indicator_vector in indicator_vector_list]
+
+                loss_vector, error_vector = self.__compute_ratio_estimate([count_vector for count_vector, _ in window_count_list],
+                                                                          [one_vector for _, one_vector in window_count_list], confidence_level)
+
+                customer_category = "VIP" if self.customer_category == "VOP" else "NORMAL"
+                customer_label = r'$T_{' + customer_category + '} = ' + customer_time + '$'
+                loss_data.append((customer_label, np.arange(number_windows)*window_length, loss_vector, error_vector))
+
+            cashier_label = r'$T_{CASHIER} = ' + cashier_time + '$'
+            loss_dict[cashier_label] = loss_data
+
+        return loss_dict
+
     '''
     Convert a list in the corresponding numpy array and saves the latter in an excel file
     '''
@@ -1,13 +1,15 @@
 from analysistools.StatisticDataFrame import StatisticDataFrame
 from analysistools.PlotBuilder import PlotBuilder
+from analysistools.ResultWatcher import ResultWatcher
+from analysistools.StageProfiler import profiler
+from analysistools.Settings import get_config
 from pprint import pprint
 from time import time
-import configparser as cp
+import numpy as np
 import json
 
 
-config = cp.ConfigParser()
-config.read("settings.ini")
+config = get_config()
 
 
 def load_plot_lines(plot_data, statistic_name, statistic_plot):
@@ -37,6 +39,22 @@ def plot_statistic(statistic_name, plot_data, plot_profile, x_axis_name="", y_ax
         plot.draw()
 
 
+def plot_ECDF_grid(statistic_name, plot_data, x_axis_name="", y_axis_name="", replication_band=True):
+    color_list = json.loads(config.get("Plot_Profile", "color_list"))
+    plot = PlotBuilder(plot_profile="ecdf_grid")
+    plot.set_axes_label(x_axis_name, y_axis_name)
+
+    for color_index, statistic_data in enumerate(plot_data[statistic_name]):
+        y_error_bar = statistic_data[4] if replication_band else statistic_data[3]
+        plot.add_plot_line(statistic_data[0], statistic_data[1], statistic_data[2], y_error_bar=y_error_bar, color=color_list[color_index])
+
+    if config["General"].getboolean("save_to_file"):
+        plot.to_image(directory=config["General"]["export_directory"], file_name=statistic_name + "_" + str(time()), image_format="png")
+
+    if config["General"].getboolean("draw_plots"):
+        plot.draw()
+
+
 def plot_histogram(statistic_name, plot_data, x_axis_name="", y_axis_name=""):
     color_list = json.loads(config.get("Plot_Profile", "color_list"))
     color_index = 0
@@ -45,7 +63,7 @@ def plot_histogram(statistic_name, plot_data, x_axis_name="", y_axis_name=""):
         plot = PlotBuilder(plot_profile="histogram")
         plot.set_axes_label(x_axis_name, y_axis_name)
 
-        plot.add_plot_line(statistic_data[0], statistic_data[1], num_bins=statistic_data[2], color=color_list[color_index])
+        plot.add_plot_line(statistic_data[0], statistic_data[1], statistic_data[2], color=color_list[color_index])
         color_index = color_index+1
 
         if config["General"].getboolean("save_to_file"):
@@ -73,33 +91,98 @@ def plot_qq(statistic_name, plot_data, x_axis_name="", y_axis_name=""):
             plot.draw()
 
 
+def print_convergence_table(dataframe, statistic_list, confidence_level, x_grid, probability_levels):
+    cashier_list = dataframe.get_cashier_list()
+    number_repetitions = dataframe.get_number_repetitions(cashier_list)
+    sample_mean = dataframe.get_sample_mean(statistic_list, cashier_list, confidence_level)
+    quantile_data = dataframe.get_quantile_grid_data(statistic_list, cashier_list, x_grid, probability_levels, confidence_level)
+
+    for statistic_name in statistic_list:
+        print("\n" + statistic_name)
+        header = "{:>8} {:>6} {:>22} {:>10}".format("CASH", "reps", "mean", "rel.prec.")
+        header += "".join(" {:>20}".format("q" + str(probability)) for probability in probability_levels)
+        print(header)
+
+        for cashier_value, (_, mean, error), (_, _, quantile_vector, error_vector) in zip(cashier_list, sample_mean[statistic_name], quantile_data[statistic_name]):
+            line = "{:>8} {:>6} {:>22} {:>10.4f}".format(cashier_value, number_repetitions[cashier_value], "%.2f +- %.2f" % (mean, error), error/mean)
+            line += "".join(" {:>20}".format("%.1f +- %.1f" % (quantile, quantile_error)) for quantile, quantile_error in zip(quantile_vector, error_vector))
+            print(line)
+
+
+def watch_results(statistic_list, confidence_level, store_directory):
+    watch_config = config["Watch"]
+    x_grid = np.arange(*json.loads(config.get("Analysis", "ECDF_grid")))
+    probability_levels = json.loads(watch_config["probability_levels"])
+    max_idle_time = watch_config.getfloat("max_idle_time") if watch_config.get("max_idle_time") else None
+
+    watcher = ResultWatcher(watch_config["results_directory"], file_pattern=watch_config["file_pattern"],
+                            poll_interval=watch_config.getfloat("poll_interval"), stable_polls=watch_config.getint("stable_polls"))
+    dataframe = None
+
+    def ingest(new_file_list):
+        nonlocal dataframe
+        start_time = time()
+        for file_name in new_file_list:
+            if dataframe is None:
+                dataframe = StatisticDataFrame(file_name, store_directory=store_directory)
+            else:
+                dataframe.append_results(file_name)
+
+        print("\n--- %d new runs ingested in %s seconds ---" % (len(new_file_list), time() - start_time))
+        print_convergence_table(dataframe, statistic_list, confidence_level, x_grid, probability_levels)
+        dataframe.save_aggregates()
+
+    watcher.watch(ingest, max_idle_time)
+
+
 def main():
+    profiler.configure(enabled=config["Profiling"].getboolean("enabled"), trace_memory=config["Profiling"].getboolean("trace_memory"),
+                       cprofile_file=config["Profiling"].get("cprofile_file") or None)
     cashier_level = json.loads(config.get("Analysis", "cashier_level"))
     statistic_list = json.loads(config.get("Analysis", "statistic_list"))
     confidence_level = config["Analysis"].getfloat("confidence_level")
-    dataframe = StatisticDataFrame(config["General"]["working_csv"])
+    store_directory = config["General"].get("store_directory") or None
+
+    if config["Watch"].getboolean("watch_results"):
+        watch_results(statistic_list, confidence_level, store_directory)
+        return
+
+    cache_directory = config["General"].get("cache_directory") or None
+    dataframe = StatisticDataFrame(config["General"]["working_csv"], store_directory=store_directory, cache_directory=cache_directory,
+                                   disk_cache_size=config["General"].getint("cache_size_mb")*1024**2)
 
     '''************* DATA ANALYSIS *************'''
     start_time = time()
 
     #ECDF_data = dataframe.get_ECDF_data(statistic_list, cashier_level, confidence_level)
     #ECDF_no_error = dataframe.get_ECDF_data(statistic_list, cashier_level, confidence_level=None)
+    #ECDF_grid = dataframe.get_ECDF_grid_data(statistic_list, cashier_level, np.arange(*json.loads(config.get("Analysis", "ECDF_grid"))), confidence_level)
     #Lorenz_data = dataframe.get_Lorenz_Curve_data(statistic_list, cashier_level)
+    #inequality_indices = dataframe.get_inequality_indices(statistic_list, cashier_level, confidence_level)
     #histogram_data = dataframe.get_histogram_data(statistic_list, cashier_level, number_bins=200)
     #qq_data = dataframe.get_qq_plot_data(statistic_list, cashier_level, theoretical_distribution="weibull", weibull_shape=0.8)
     #sample_mean = dataframe.get_sample_mean(statistic_list, cashier_level, confidence_level)
+    #sample_mean_corrected = dataframe.get_sample_mean(statistic_list, cashier_level, confidence_level, autocorrelation_correction=True, max_lag=config["Analysis"].getint("max_lag"))
+    #autocorrelation_data = dataframe.get_autocorrelation_diagnostics(statistic_list, cashier_level, max_lag=config["Analysis"].getint("max_lag"))
+    #sample_mean_cv = dataframe.get_sample_mean_control_variate(statistic_list, cashier_level, confidence_level, config["Analysis"]["vip_interarrival_time"], config["Analysis"]["normal_interarrival_time"])
     #sample_median = dataframe.get_sample_median(statistic_list, cashier_level, confidence_level)
     #sample_CoV = dataframe.get_sample_coefficient_of_variation(statistic_list, cashier_level)
 
+    if store_directory is not None:
+        dataframe.save_aggregates()
+
     print("Data analysis completed")
     print("--- %s seconds ---" % (time() - start_time))
+    print("Query cache: " + str(dataframe.get_cache_statistics()))
 
     '''************* DATA PLOT *************'''
 
     """
     pprint(sample_mean)
+    pprint(sample_mean_cv)
     pprint(sample_median)
     pprint(sample_CoV)
+    pprint(inequality_indices)
     """
 
     """
@@ -116,6 +199,13 @@ def main():
     plot_statistic("responseTimeNormalCustomerCashierNodeStatistic", ECDF_no_error, plot_profile="ecdf", x_axis_name="Response time normal customer [s]", y_axis_name="Probability")
     """
 
+    """
+    plot_ECDF_grid("waitingTimeVipCustomerCashierQueueStatistic", ECDF_grid, x_axis_name=r'$W^{VIP}_{CASHIER} [min]$', y_axis_name="Probability")
+    plot_ECDF_grid("responseTimeVipCustomerCashierNodeStatistic", ECDF_grid, x_axis_name=r'$R^{VIP}_{CASHIER} [min]$', y_axis_name="Probability")
+    plot_ECDF_grid("waitingTimeNormalCustomerCashierQueueStatistic", ECDF_grid, x_axis_name=r'$W^{NORMAL}_{CASHIER} [min]$', y_axis_name="Probability")
+    plot_ECDF_grid("responseTimeNormalCustomerCashierNodeStatistic", ECDF_grid, x_axis_name=r'$R^{NORMAL}_{CASHIER} [min]$', y_axis_name="Probability")
+    """
+
     """
     plot_statistic("waitingTimeVipCustomerCashierQueueStatistic", Lorenz_data, plot_profile="lorenz", x_axis_name="Waiting time VIP customer")
     plot_statistic("responseTimeVipCustomerCashierNodeStatistic", Lorenz_data, plot_profile="lorenz", x_axis_name="Response time VIP customer")
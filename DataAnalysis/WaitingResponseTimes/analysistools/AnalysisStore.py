@@ -0,0 +1,118 @@
+import pandas as pd
+import pickle
+import json
+import os
+
+
+'''
+Persists on disk the dataframe built by StatisticDataFrame and the aggregates computed on it, so that an experiment
+can be extended (more repetitions, new cashier levels) without parsing and analysing again the results already stored.
+The data is stored as a sequence of segments, one for each append: an append writes only the runs not yet stored
+(deduplicated by run identifier) and never rewrites the existing segments. Every append increases the version
+of the store; the aggregates are saved together with the version they refer to.
+Content of the store directory:
+1) metadata.json: version, list of segments, stored run identifiers and signatures of the ingested files;
+2) segment_<version>.pkl: the rows appended at that version;
+3) aggregates.pkl: the tuple (version, aggregate dictionary).
+'''
+class AnalysisStore:
+    def __init__(self, store_directory):
+        self.store_directory = store_directory
+        os.makedirs(store_directory, exist_ok=True)
+
+        self.metadata = {"version": 0, "segment_list": [], "run_list": [], "file_signature_list": []}
+        if os.path.exists(self.__get_path("metadata.json")):
+            with open(self.__get_path("metadata.json"), "r") as metadata_file:
+                self.metadata = json.load(metadata_file)
+
+        self.run_set = set(self.metadata["run_list"])
+
+    def __get_path(self, file_name):
+        return os.path.join(self.store_directory, file_name)
+
+    '''
+    Writes a file atomically: the content is written in a temporary file which then replaces the old one,
+    so that an interrupted write never leaves the store in an inconsistent state.
+    '''
+    def __write_atomically(self, file_name, content, binary):
+        temporary_path = self.__get_path(file_name + ".tmp")
+        with open(temporary_path, "wb" if binary else "w") as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary_path, self.__get_path(file_name))
+
+    '''
+    Returns a signature of a result file (absolute path, size and modification time), used to skip the files
+    already ingested and not modified since then.
+    '''
+    def get_file_signature(self, file_name):
+        file_stat = os.stat(file_name)
+        return [os.path.abspath(file_name), file_stat.st_size, file_stat.st_mtime_ns]
+
+    '''
+    Returns True if the given result file has already been ingested and it has not been modified since then.
+    '''
+    def is_ingested(self, file_name):
+        return self.get_file_signature(file_name) in self.metadata["file_signature_list"]
+
+    '''
+    Returns the version of the store, i.e. the number of appends that added new runs.
+    '''
+    def get_version(self):
+        return self.metadata["version"]
+
+    '''
+    Returns the set of the identifiers of the stored runs.
+    '''
+    def get_run_set(self):
+        return self.run_set
+
+    '''
+    Returns the dataframe with all the stored rows (None if the store is empty).
+    '''
+    def load(self):
+        if len(self.metadata["segment_list"]) == 0:
+            return None
+
+        return pd.concat([pd.read_pickle(self.__get_path(segment)) for segment in self.metadata["segment_list"]], ignore_index=True)
+
+    '''
+    Appends to the store the rows of the given dataframe whose run is not stored yet, recording the signature of
+    the result file they come from (if any). Returns the dataframe of the rows actually appended.
+    '''
+    def append(self, dataframe, file_name=None):
+        new_dataframe = dataframe[~dataframe["run"].astype(str).isin(self.run_set)]
+
+        if len(new_dataframe) > 0:
+            segment = "segment_" + str(self.metadata["version"] + 1) + ".pkl"
+            new_dataframe.to_pickle(self.__get_path(segment))
+
+            new_run_list = new_dataframe["run"].astype(str).unique().tolist()
+            self.run_set.update(new_run_list)
+            self.metadata["run_list"].extend(new_run_list)
+            self.metadata["segment_list"].append(segment)
+            self.metadata["version"] += 1
+
+        if file_name is not None:
+            self.metadata["file_signature_list"].append(self.get_file_signature(file_name))
+
+        self.__write_atomically("metadata.json", json.dumps(self.metadata), binary=False)
+
+        return new_dataframe
+
+    '''
+    Returns the stored aggregates if they refer to the current version of the store, an empty dictionary otherwise.
+    '''
+    def load_aggregates(self):
+        if not os.path.exists(self.__get_path("aggregates.pkl")):
+            return dict()
+
+        with open(self.__get_path("aggregates.pkl"), "rb") as aggregate_file:
+            version, aggregate_dict = pickle.load(aggregate_file)
+
+        return aggregate_dict if version == self.get_version() else dict()
+
+    '''
+    Saves the aggregates, which must refer to the current version of the store.
+    '''
+    def save_aggregates(self, aggregate_dict):
+        self.__write_atomically("aggregates.pkl", pickle.dumps((self.get_version(), aggregate_dict)), binary=True)
@@ -0,0 +1,110 @@
+from analysistools.LazyModule import LazyModule
+import numpy as np
+import math
+
+scipy = LazyModule("scipy")  # scipy.stats is needed only for the confidence bands
+
+
+'''
+Accumulates the ECDF of the repetitions of a scenario on a fixed grid of x values.
+For each repetition, only the histogram counts of the observations in the intervals
+(-inf, x_0], (x_0, x_1], ..., (x_(G-1), +inf) are kept, so the memory depends only on the grid resolution.
+The counts are mergeable: the observations of a repetition can be added in chunks (update) and accumulators built
+on different parts of the data, e.g. by different workers, can be combined (merge).
+'''
+class GridECDF:
+    def __init__(self, x_grid):
+        self.x_grid = np.asarray(x_grid, dtype=np.float64)
+        if np.any(np.diff(self.x_grid) <= 0):
+            exit("ERROR: the grid of the ECDF must be strictly increasing")
+
+        self.repetition_counts = dict()
+
+    '''
+    Adds a chunk of observations of the given repetition.
+    '''
+    def update(self, repetition, obs_vector):
+        bin_index = np.searchsorted(self.x_grid, np.asarray(obs_vector, dtype=np.float64), side="left")
+        chunk_counts = np.bincount(bin_index, minlength=len(self.x_grid) + 1).astype(np.int64)
+
+        if repetition in self.repetition_counts:
+            self.repetition_counts[repetition] += chunk_counts
+        else:
+            self.repetition_counts[repetition] = chunk_counts
+
+    '''
+    Adds the counts of another accumulator built on the same grid.
+    '''
+    def merge(self, other):
+        if not np.array_equal(self.x_grid, other.x_grid):
+            exit("ERROR: only ECDFs computed on the same grid can be merged")
+
+        for repetition, counts in other.repetition_counts.items():
+            if repetition in self.repetition_counts:
+                self.repetition_counts[repetition] += counts
+            else:
+                self.repetition_counts[repetition] = counts.copy()
+
+    '''
+    Returns the matrix (repetitions x grid points) of the ECDF of each repetition and the vector of the number of
+    observations of each repetition.
+    '''
+    def __get_repetition_ECDF_matrix(self):
+        count_matrix = np.array([self.repetition_counts[repetition] for repetition in sorted(self.repetition_counts)])
+        cumulative_matrix = np.cumsum(count_matrix, axis=1)[:, :len(self.x_grid)]
+        observation_vector = np.sum(count_matrix, axis=1)
+
+        return cumulative_matrix/observation_vector[:, np.newaxis], observation_vector
+
+    '''
+    Computes the ECDF on the grid and its confidence bands at the given level.
+    Returns a tuple (ECDF_vector, DKW_error, replication_error_vector), where:
+    1) ECDF_vector is the ECDF of all the observations pooled across the repetitions;
+    2) DKW_error is the half-width of the Dvoretzky-Kiefer-Wolfowitz band, valid simultaneously for all the points
+       under the hypothesis of independent observations;
+    3) replication_error_vector is the half-width of the pointwise confidence interval obtained from the
+       independent repetitions (mean of the ECDFs of the repetitions), which does not require independent
+       observations within a repetition.
+    '''
+    def get_ECDF(self, confidence_level):
+        repetition_ECDF_matrix, observation_vector = self.__get_repetition_ECDF_matrix()
+        number_repetitions = repetition_ECDF_matrix.shape[0]
+        total_observations = np.sum(observation_vector)
+        alpha = 1 - confidence_level
+
+        ECDF_vector = np.sum(repetition_ECDF_matrix*observation_vector[:, np.newaxis], axis=0)/total_observations
+        DKW_error = math.sqrt(math.log(2/alpha)/(2*total_observations))
+
+        if number_repetitions < 2:
+            replication_error_vector = np.full(len(self.x_grid), fill_value=np.nan)
+        else:
+            student_quantile = scipy.stats.t.ppf(1 - alpha/2, df=number_repetitions-1)
+            replication_std = np.std(repetition_ECDF_matrix, axis=0, ddof=1)
+            replication_error_vector = student_quantile*replication_std/math.sqrt(number_repetitions)
+
+        return ECDF_vector, DKW_error, replication_error_vector
+
+    '''
+    Computes the quantiles at the given probability levels and their replication-based confidence intervals.
+    The quantiles of each repetition are obtained by inverting its ECDF on the grid with linear interpolation,
+    so their resolution depends on the grid. Returns a tuple (quantile_vector, error_vector), where the error
+    is such that the confidence interval is [quantile-error, quantile+error].
+    '''
+    def get_quantiles(self, probability_levels, confidence_level):
+        repetition_ECDF_matrix, observation_vector = self.__get_repetition_ECDF_matrix()
+        number_repetitions = repetition_ECDF_matrix.shape[0]
+        probability_levels = np.asarray(probability_levels, dtype=np.float64)
+
+        # The ECDF is non-decreasing: np.maximum.accumulate removes nothing but guarantees a valid interpolation table
+        repetition_quantile_matrix = np.array([np.interp(probability_levels, np.maximum.accumulate(ECDF_row), self.x_grid)
+                                               for ECDF_row in repetition_ECDF_matrix])
+        quantile_vector = np.mean(repetition_quantile_matrix, axis=0)
+
+        if number_repetitions < 2:
+            return quantile_vector, np.full(len(probability_levels), fill_value=np.nan)
+
+        alpha = 1 - confidence_level
+        student_quantile = scipy.stats.t.ppf(1 - alpha/2, df=number_repetitions-1)
+        error_vector = student_quantile*np.std(repetition_quantile_matrix, axis=0, ddof=1)/math.sqrt(number_repetitions)
+
+        return quantile_vector, error_vector
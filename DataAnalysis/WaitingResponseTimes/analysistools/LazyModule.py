@@ -0,0 +1,29 @@
+import importlib
+
+
+'''
+Placeholder of a module that is imported only when one of its attributes is used for the first time, so that the
+heavy dependencies (scipy.stats, statsmodels, matplotlib) are loaded only by the features that need them and not at
+the startup of every entry point. The submodules of a package are imported on demand as well (e.g. scipy.stats on
+a LazyModule("scipy")).
+'''
+class LazyModule:
+    def __init__(self, module_name):
+        self.__dict__["_module_name"] = module_name
+        self.__dict__["_module"] = None
+
+    def __get_module(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._module_name)
+
+        return self._module
+
+    def __getattr__(self, attribute_name):
+        module = self.__get_module()
+        try:
+            attribute = getattr(module, attribute_name)
+        except AttributeError:
+            attribute = importlib.import_module(self._module_name + "." + attribute_name)
+
+        self.__dict__[attribute_name] = attribute  # The following accesses do not go through __getattr__
+        return attribute
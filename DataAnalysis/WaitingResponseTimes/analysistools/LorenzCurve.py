@@ -0,0 +1,130 @@
+from analysistools.LazyModule import LazyModule
+import numpy as np
+import math
+
+scipy = LazyModule("scipy")  # scipy.stats is needed only for the confidence intervals
+
+INEQUALITY_INDEX_LIST = ["gini", "theil", "hoover", "top_10_share"]
+
+
+'''
+Computes the Lorenz curve of the sorted (ascending) observations on the grid of population shares: the share of the
+total held by the smallest p*n observations, interpolated linearly between the observations.
+Only the sums of the segments between the grid points are computed, so no array as long as the observations is built.
+If the total is 0, the curve is the line of maximum fairness.
+'''
+def compute_Lorenz_points(sorted_obs, population_grid):
+    sorted_obs = np.asarray(sorted_obs, dtype=np.float64)
+    population_grid = np.asarray(population_grid, dtype=np.float64)
+    number_observations = len(sorted_obs)
+
+    position_vector = population_grid*number_observations
+    index_vector = np.minimum(np.floor(position_vector).astype(np.int64), number_observations)
+    inner_index = np.unique(index_vector[index_vector < number_observations])
+    if len(inner_index) == 0:
+        return population_grid.copy()
+
+    # Sum of the observations before each inner index: segment sums [index_i, index_(i+1)) accumulated
+    segment_sums = np.add.reduceat(sorted_obs, inner_index)
+    partial_sums = np.sum(sorted_obs[:inner_index[0]]) + np.concatenate(([0.0], np.cumsum(segment_sums)[:-1]))
+    total = partial_sums[-1] + segment_sums[-1]
+    if total == 0:
+        return population_grid.copy()
+
+    Lorenz_vector = np.ones(len(population_grid), dtype=np.float64)
+    is_inner = index_vector < number_observations
+    inner_position = np.searchsorted(inner_index, index_vector[is_inner])
+    Lorenz_vector[is_inner] = (partial_sums[inner_position] + (position_vector[is_inner] - index_vector[is_inner])*sorted_obs[index_vector[is_inner]])/total
+
+    return Lorenz_vector
+
+
+'''
+Computes the inequality indices of the sorted (ascending) observations, in the order of INEQUALITY_INDEX_LIST:
+1) the Gini coefficient, i.e. twice the area between the line of maximum fairness and the Lorenz curve;
+2) the Theil index, mean of (x/mean)*ln(x/mean), where the null observations contribute 0;
+3) the Hoover index, i.e. the share of the total that should be moved to reach maximum fairness;
+4) the share of the total held by the largest 10% of the observations.
+All the indices are 0 if the total is 0.
+'''
+def compute_inequality_indices(sorted_obs):
+    sorted_obs = np.asarray(sorted_obs, dtype=np.float64)
+    number_observations = len(sorted_obs)
+    total = np.sum(sorted_obs)
+    if number_observations == 0 or total == 0:
+        return np.zeros(len(INEQUALITY_INDEX_LIST))
+
+    mean = total/number_observations
+    rank_weighted_sum = np.dot(sorted_obs, np.arange(1, number_observations + 1, dtype=np.float64))
+    gini = 2*rank_weighted_sum/(number_observations*total) - (number_observations + 1)/number_observations
+
+    positive_ratio = sorted_obs[sorted_obs > 0]/mean
+    theil = np.sum(positive_ratio*np.log(positive_ratio))/number_observations
+    hoover = 0.5*np.sum(np.abs(sorted_obs - mean))/total
+    top_10_share = 1 - compute_Lorenz_points(sorted_obs, [0.9])[0]
+
+    return np.array([gini, theil, hoover, top_10_share])
+
+
+'''
+Accumulates the Lorenz curve (on a fixed grid of population shares) and the inequality indices of each repetition of
+a scenario, so the memory depends only on the grid resolution. Like GridECDF, the accumulators are mergeable.
+The point estimates are computed on the pooled observations, while their confidence intervals are obtained from the
+independent repetitions, so they do not require independent observations within a repetition.
+'''
+class LorenzCurve:
+    def __init__(self, population_grid):
+        self.population_grid = np.asarray(population_grid, dtype=np.float64)
+        if np.any(np.diff(self.population_grid) <= 0) or self.population_grid[0] < 0 or self.population_grid[-1] > 1:
+            exit("ERROR: the grid of the Lorenz curve must be strictly increasing in [0, 1]")
+
+        self.repetition_curves = dict()
+        self.repetition_indices = dict()
+
+    '''
+    Adds the sorted observations of a repetition.
+    '''
+    def update(self, repetition, sorted_obs):
+        self.repetition_curves[repetition] = compute_Lorenz_points(sorted_obs, self.population_grid)
+        self.repetition_indices[repetition] = compute_inequality_indices(sorted_obs)
+
+    '''
+    Adds the repetitions of another accumulator built on the same grid.
+    '''
+    def merge(self, other):
+        if not np.array_equal(self.population_grid, other.population_grid):
+            exit("ERROR: only Lorenz curves computed on the same grid can be merged")
+
+        self.repetition_curves.update(other.repetition_curves)
+        self.repetition_indices.update(other.repetition_indices)
+
+    '''
+    Returns the half-widths of the confidence intervals of the columns of the matrix (repetitions x values).
+    '''
+    def __get_replication_error(self, repetition_matrix, confidence_level):
+        number_repetitions = repetition_matrix.shape[0]
+        if number_repetitions < 2:
+            return np.full(repetition_matrix.shape[1], fill_value=np.nan)
+
+        alpha = 1 - confidence_level
+        student_quantile = scipy.stats.t.ppf(1 - alpha/2, df=number_repetitions-1)
+        return student_quantile*np.std(repetition_matrix, axis=0, ddof=1)/math.sqrt(number_repetitions)
+
+    '''
+    Returns a tuple (Lorenz_vector, error_vector): the Lorenz curve on the grid of the pooled sorted observations and
+    the half-widths of its pointwise replication-based confidence intervals.
+    '''
+    def get_curve(self, pooled_sorted_obs, confidence_level):
+        curve_matrix = np.array([self.repetition_curves[repetition] for repetition in sorted(self.repetition_curves)])
+        return compute_Lorenz_points(pooled_sorted_obs, self.population_grid), self.__get_replication_error(curve_matrix, confidence_level)
+
+    '''
+    Returns a dictionary {index_name: (estimate, error)} with the inequality indices of the pooled sorted observations
+    and the half-widths of their replication-based confidence intervals.
+    '''
+    def get_indices(self, pooled_sorted_obs, confidence_level):
+        index_matrix = np.array([self.repetition_indices[repetition] for repetition in sorted(self.repetition_indices)])
+        error_vector = self.__get_replication_error(index_matrix, confidence_level)
+
+        return {index_name: (float(estimate), float(error)) for index_name, estimate, error
+                in zip(INEQUALITY_INDEX_LIST, compute_inequality_indices(pooled_sorted_obs), error_vector)}
@@ -1,14 +1,17 @@
-import matplotlib.ticker as ticker
-import matplotlib.pyplot as plt
-import configparser as cp
+from analysistools.StageProfiler import profiled
+from analysistools.LazyModule import LazyModule
+from analysistools.Settings import get_config
 import numpy as np
 import json
 
+# matplotlib is imported only when the first plot is built
+ticker = LazyModule("matplotlib.ticker")
+plt = LazyModule("matplotlib.pyplot")
+
 
 class PlotBuilder:
     def __init__(self, plot_profile):
-        self.config = cp.ConfigParser()
-        self.config.read("settings.ini")
+        self.config = get_config()
         plt.style.use(self.config["Plot_Profile"]["matplotlib_style"])
 
         self.figure = plt.figure(figsize=(13.66, 7.68))
@@ -24,25 +27,42 @@ class PlotBuilder:
         self.plot_axes.set_xlabel(x_axis_name, fontsize=14, labelpad=10)
         self.plot_axes.set_ylabel(y_axis_name, fontsize=14, labelpad=10, rotation=90)
 
-    def add_plot_line(self, label, x_axis_value, y_axis_value=None, x_error_bar=None, num_bins=None, regression_x=None, regression_y=None, color='r'):
+    def add_plot_line(self, label, x_axis_value, y_axis_value=None, x_error_bar=None, regression_x=None, regression_y=None, color='r', y_error_bar=None):
         if self.plot_profile["name"] == "ECDF":
             # Conversion to minutes
             x_axis_value = (np.array(x_axis_value))/60
-            x_error_bar = (np.array(x_error_bar))/60
+            if x_error_bar is not None:
+                x_error_bar = (np.array(x_error_bar))/60
 
             self.plot_axes.errorbar(x_axis_value, y_axis_value, xerr=x_error_bar,
                                     label=label, color=color, marker=self.plot_profile["marker"],
                                     lw=self.plot_profile["line_width"], elinewidth=self.plot_profile["error_line_width"],
                                     capsize=self.plot_profile["error_capsize"], errorevery=self.plot_profile["errorevery"])
 
+        elif self.plot_profile["name"] == "ECDF_GRID":
+            # Conversion to minutes
+            x_axis_value = (np.array(x_axis_value))/60
+            y_axis_value = np.array(y_axis_value)
+
+            self.plot_axes.step(x_axis_value, y_axis_value, where="post", label=label, color=color, lw=self.plot_profile["line_width"])
+            if y_error_bar is not None:
+                self.plot_axes.fill_between(x_axis_value, np.clip(y_axis_value - y_error_bar, 0, 1), np.clip(y_axis_value + y_error_bar, 0, 1),
+                                            step="post", color=color, alpha=self.plot_profile["band_alpha"], lw=0)
+
         elif self.plot_profile["name"] == "LORENZ":
             self.plot_axes.plot(x_axis_value, y_axis_value, label=label, color=color,
                                 marker=self.plot_profile["marker"], lw=self.plot_profile["line_width"])
+            if y_error_bar is not None:
+                y_axis_value = np.asarray(y_axis_value)
+                self.plot_axes.fill_between(x_axis_value, np.clip(y_axis_value - y_error_bar, 0, 1), np.clip(y_axis_value + y_error_bar, 0, 1),
+                                            color=color, alpha=self.plot_profile["band_alpha"], lw=0)
 
         elif self.plot_profile["name"] == "HISTOGRAM":
-            self.plot_axes.hist(x_axis_value, bins=num_bins, range=(0, max(x_axis_value)),
-                                label=label, color=color, edgecolor=self.plot_profile["edgecolor"],
-                                lw=self.plot_profile["line_width"])
+            # Pre-binned histogram: x_axis_value are the bin edges and y_axis_value the counts
+            bin_edges = np.asarray(x_axis_value, dtype=np.float64)
+            self.plot_axes.bar(bin_edges[:-1], y_axis_value, width=np.diff(bin_edges), align="edge",
+                               label=label, color=color, edgecolor=self.plot_profile["edgecolor"],
+                               lw=self.plot_profile["line_width"])
 
         elif self.plot_profile["name"] == "QQ":
             # QQ points
@@ -61,6 +81,7 @@ class PlotBuilder:
         self.plot_axes.plot(np.arange(0, 2), np.array([0, 0]), lw=self.plot_profile["line_width"], color="black")
         self.plot_axes.plot(np.array([1, 1]), np.array([0, 1]), lw=self.plot_profile["line_width"], color="black")
 
+    @profiled("savefig")
     def to_image(self, directory, file_name, image_format):
         plt.legend(loc=self.plot_profile["legend_position"], prop={'size': 14})
         export_name = directory + file_name + "." + image_format
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+import threading
+import functools
+import inspect
+import hashlib
+import pickle
+import glob
+import os
+
+# Packages whose sources define the results of the queries
+SOURCE_DIRECTORY_LIST = [os.path.dirname(os.path.abspath(__file__)),
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "sharedtools")]
+
+
+'''
+Returns the digest of the sources of the packages of the queries (SOURCE_DIRECTORY_LIST), so that any change of the
+code of a query changes the keys of its results.
+'''
+def get_code_version():
+    source_digest = hashlib.sha256()
+    for source_directory in SOURCE_DIRECTORY_LIST:
+        for file_name in sorted(glob.glob(os.path.join(source_directory, "*.py"))):
+            source_digest.update(os.path.basename(file_name).encode("utf-8"))
+            with open(file_name, "rb") as source_file:
+                source_digest.update(source_file.read())
+
+    return source_digest.hexdigest()
+
+
+'''
+Two-tier cache of the results of the queries of StatisticDataFrame, keyed by the version of the analysed data,
+the version of the code (digest of its sources), the name of the query and its arguments:
+1) an in-memory tier holding the memory_entries most recently used results (LRU eviction);
+2) an optional on-disk tier in cache_directory, one pickle file per result, whose total size is kept below
+   disk_size_limit bytes by removing the least recently used files, so that the results survive between runs.
+The results returned by the cache are shared, so they must not be modified by the caller.
+The cache can be used by several threads: a result missing from the cache is computed outside the lock, so the
+same query issued concurrently may be computed more than once.
+'''
+class QueryCache:
+    def __init__(self, cache_directory=None, memory_entries=32, disk_size_limit=512*1024**2):
+        self.cache_directory = cache_directory
+        self.memory_entries = memory_entries
+        self.disk_size_limit = disk_size_limit
+        self.memory_cache = OrderedDict()
+        self.statistics = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.lock = threading.RLock()
+        self.code_version = get_code_version()  # The results cached on disk by another version of the code are ignored
+
+        if cache_directory is not None:
+            os.makedirs(cache_directory, exist_ok=True)
+
+    '''
+    Returns the key of a query: the digest of the data version, the code version, the query name and its arguments.
+    '''
+    def get_key(self, data_version, query_name, argument_dict):
+        key_content = pickle.dumps((data_version, self.code_version, query_name, sorted(argument_dict.items())), protocol=4)
+        return hashlib.sha256(key_content).hexdigest()
+
+    def __get_path(self, key):
+        return os.path.join(self.cache_directory, key + ".pkl")
+
+    def __store_in_memory(self, key, result):
+        self.memory_cache[key] = result
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.memory_entries:
+            self.memory_cache.popitem(last=False)
+
+    '''
+    Removes the least recently used files of the on-disk tier until its size is below the limit.
+    The last use of a file is its modification time, which is updated at each hit.
+    '''
+    def __evict_from_disk(self):
+        file_list = []
+        for file_name in os.listdir(self.cache_directory):
+            if file_name.endswith(".pkl"):
+                file_stat = os.stat(os.path.join(self.cache_directory, file_name))
+                file_list.append((file_stat.st_mtime_ns, file_stat.st_size, file_name))
+
+        total_size = sum(file_size for _, file_size, _ in file_list)
+        for _, file_size, file_name in sorted(file_list):
+            if total_size <= self.disk_size_limit:
+                break
+            os.remove(os.path.join(self.cache_directory, file_name))
+            total_size -= file_size
+
+    '''
+    Returns the cached result of the key, computing it with compute_result (and caching it) if not available.
+    '''
+    def get_or_compute(self, key, compute_result):
+        with self.lock:
+            if key in self.memory_cache:
+                self.statistics["memory_hits"] += 1
+                self.memory_cache.move_to_end(key)
+                return self.memory_cache[key]
+
+            if self.cache_directory is not None and os.path.exists(self.__get_path(key)):
+                self.statistics["disk_hits"] += 1
+                with open(self.__get_path(key), "rb") as cache_file:
+                    result = pickle.load(cache_file)
+                os.utime(self.__get_path(key))
+                self.__store_in_memory(key, result)
+                return result
+
+            self.statistics["misses"] += 1
+
+        result = compute_result()
+
+        with self.lock:
+            self.__store_in_memory(key, result)
+
+            if self.cache_directory is not None:
+                # Written atomically, so that an interrupted run never leaves a truncated result in the cache
+                temporary_path = self.__get_path(key) + "." + str(threading.get_ident()) + ".tmp"
+                with open(temporary_path, "wb") as cache_file:
+                    pickle.dump(result, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary_path, self.__get_path(key))
+                self.__evict_from_disk()
+
+        return result
+
+    '''
+    Returns a dictionary with the number of memory hits, disk hits and misses, and the hit ratio.
+    '''
+    def get_statistics(self):
+        statistics = dict(self.statistics)
+        number_queries = sum(self.statistics.values())
+        statistics["hit_ratio"] = (statistics["memory_hits"] + statistics["disk_hits"])/number_queries if number_queries > 0 else None
+
+        return statistics
+
+
+'''
+Decorator of the query methods of StatisticDataFrame: the result is looked up in the query_cache of the instance,
+using as key the data_version of the instance, the name of the method and its arguments (defaults included, so
+that equivalent calls share the same entry).
+'''
+def memoized_query(method):
+    method_signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def memoized_method(self, *args, **kwargs):
+        bound_arguments = method_signature.bind(self, *args, **kwargs)
+        bound_arguments.apply_defaults()
+        argument_dict = {name: value for name, value in bound_arguments.arguments.items() if name != "self"}
+
+        key = self.query_cache.get_key(self.data_version, method.__name__, argument_dict)
+        return self.query_cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+
+    return memoized_method
@@ -0,0 +1,91 @@
+from analysistools.StageProfiler import profiler, profiled
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+'''
+Stores the observation vectors of the repetitions of a scenario, which usually have different lengths, as ragged
+rows: each repetition is parsed straight into its own float64 array, so the observations are stored only once and
+never padded to the length of the longest repetition.
+The balanced matrix (repetitions x minimum length) is read in blocks of columns (see get_balanced_columns), so only
+one block at a time is materialized.
+'''
+class RepetitionMatrix:
+    def __init__(self, vecvalue_list, sort_values=False):
+        with profiler.stage("parse_vectors"):
+            self.row_list = [self.__convert_vecvalue(vecvalue) for vecvalue in vecvalue_list]
+            self.length_vector = np.array([len(vector) for vector in self.row_list], dtype=np.int64)
+
+        if sort_values:
+            # numpy releases the GIL while sorting, so the rows are sorted in place concurrently
+            with profiler.stage("sort"), ThreadPoolExecutor() as executor:
+                list(executor.map(lambda row: row.sort(), self.row_list))
+
+    '''
+    Each element of the "vecvalue" column is a string of values separated by a whitespace; already converted
+    vectors are accepted as they are.
+    '''
+    def __convert_vecvalue(self, vecvalue):
+        if isinstance(vecvalue, str):
+            return np.array(vecvalue.split(), dtype=np.float64)
+
+        return np.array(vecvalue, dtype=np.float64)  # Copied, since the rows may be sorted in place
+
+    '''
+    Returns the number of repetitions.
+    '''
+    def get_number_repetitions(self):
+        return len(self.row_list)
+
+    '''
+    Returns the number of observations of each repetition.
+    '''
+    def get_lengths(self):
+        return self.length_vector
+
+    '''
+    Returns the observations of a single repetition.
+    '''
+    def get_row(self, row):
+        return self.row_list[row]
+
+    '''
+    Returns the list of the observations of each repetition.
+    '''
+    def get_row_list(self):
+        return self.row_list
+
+    '''
+    Returns the number of columns of the balanced matrix of the repetitions, where each row is truncated to the same
+    number of observations: the minimum between the minimum size across all the repetitions and the given max size.
+    '''
+    def get_balance_level(self, max_observations=None):
+        balance_level = int(np.min(self.length_vector))
+
+        if max_observations is not None:
+            balance_level = min(balance_level, max_observations)
+
+        return balance_level
+
+    '''
+    Returns the columns [column_start, column_stop) of the balanced matrix of the repetitions (repetitions x columns),
+    copied from the rows; the stop is clipped to the minimum size across all the repetitions.
+    '''
+    def get_balanced_columns(self, column_start, column_stop):
+        column_stop = min(column_stop, self.get_balance_level())
+        column_block = np.empty(shape=(self.get_number_repetitions(), max(column_stop - column_start, 0)), dtype=np.float64)
+        for row, vector in enumerate(self.row_list):
+            column_block[row] = vector[column_start:column_stop]
+
+        return column_block
+
+    '''
+    Returns all the observations of all the repetitions in a single vector sorted in ascending order: the rows are
+    concatenated and the pooled vector is sorted once, which is faster than sorting the rows and merging them.
+    '''
+    @profiled("sort_pooled")
+    def get_sorted_observations(self):
+        if len(self.row_list) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        return np.sort(np.concatenate(self.row_list))
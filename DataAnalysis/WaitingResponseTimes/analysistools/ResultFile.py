@@ -0,0 +1,20 @@
+from sharedtools.ResultReader import stream_joined_native_items
+import pandas as pd
+
+
+'''
+Parses a native Omnet++ vector file (.vec), as written in the results directory at the end of each run, in the same
+long format of the CSV export: one row for each run attribute and one for each vector, whose observations and times
+are joined in the "vecvalue" and "vectime" strings exactly as they appear in the file.
+Returns a dataframe with columns ['run' 'name' 'attrname' 'attrvalue' 'vecvalue' 'vectime'].
+'''
+def parse_native_vectors(native_stream):
+    row_list = []
+
+    for item in stream_joined_native_items(native_stream):
+        if item[0] == "attribute":
+            row_list.append({"run": item[1], "attrname": item[2], "attrvalue": item[3]})
+        elif item[0] == "vector":
+            row_list.append({"run": item[1], "name": item[2], "vecvalue": item[4], "vectime": item[3]})
+
+    return pd.DataFrame(row_list).reindex(columns=["run", "name", "attrname", "attrvalue", "vecvalue", "vectime"])
@@ -0,0 +1,80 @@
+import glob
+import time
+import os
+
+
+'''
+Monitors the results directory of the simulator and reports the vector files (.vec) of the runs completed since the
+last check, so that they can be analysed while the other repetitions are still running.
+Omnet++ appends to the vector file and to its index (.vci) while the run is in progress, so a run is considered
+completed only when both files exist and have kept the same size and modification time for stable_polls consecutive
+checks; poll_interval must therefore be longer than the time between two writes of the vector buffers of a run.
+'''
+class ResultWatcher:
+    def __init__(self, results_directory, file_pattern="*.vec", poll_interval=30, stable_polls=2):
+        self.results_directory = results_directory
+        self.file_pattern = file_pattern
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.reported_file_set = set()
+        self.file_state_dict = dict()  # vector file -> (state of the files, number of consecutive checks with that state)
+
+    '''
+    Returns the size and the modification time of a vector file and of its index, or None if one of them does not exist.
+    '''
+    def __get_file_state(self, file_name):
+        try:
+            vector_stat = os.stat(file_name)
+            index_stat = os.stat(os.path.splitext(file_name)[0] + ".vci")
+        except FileNotFoundError:
+            return None
+
+        return vector_stat.st_size, vector_stat.st_mtime_ns, index_stat.st_size, index_stat.st_mtime_ns
+
+    def __is_completed(self, file_name):
+        file_state = self.__get_file_state(file_name)
+        previous_state, stable_count = self.file_state_dict.get(file_name, (None, 0))
+
+        stable_count = stable_count + 1 if file_state is not None and file_state == previous_state else 1
+        self.file_state_dict[file_name] = (file_state, stable_count)
+
+        return file_state is not None and stable_count >= self.stable_polls
+
+    '''
+    Returns the sorted list of the vector files of the runs completed and not yet reported. The files are not marked
+    as reported (see mark_reported), so they are returned again until they have been processed.
+    '''
+    def get_new_files(self):
+        file_list = sorted(glob.glob(os.path.join(self.results_directory, self.file_pattern)))
+
+        return [file_name for file_name in file_list if file_name not in self.reported_file_set and self.__is_completed(file_name)]
+
+    '''
+    Marks the vector files as reported, so that they are not returned by the following checks.
+    '''
+    def mark_reported(self, file_list):
+        for file_name in file_list:
+            self.reported_file_set.add(file_name)
+            self.file_state_dict.pop(file_name, None)
+
+    '''
+    Checks the results directory every poll_interval seconds and calls on_new_files with the list of the new completed
+    vector files, which are marked as reported only when on_new_files returns. The watch ends after max_idle_time
+    seconds without new files (never if None) or on KeyboardInterrupt.
+    '''
+    def watch(self, on_new_files, max_idle_time=None):
+        last_new_time = time.time()
+
+        try:
+            while True:
+                new_file_list = self.get_new_files()
+                if len(new_file_list) > 0:
+                    on_new_files(new_file_list)
+                    self.mark_reported(new_file_list)
+                    last_new_time = time.time()
+                elif max_idle_time is not None and time.time() - last_new_time > max_idle_time:
+                    break
+
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,14 @@
+import configparser as cp
+import functools
+
+
+'''
+Returns the configuration of settings.ini, parsed only at the first call and then shared by Main.py and by all the
+objects that need it (e.g. each PlotBuilder), so that the file is never parsed again.
+'''
+@functools.lru_cache(maxsize=None)
+def get_config(file_name="settings.ini"):
+    config = cp.ConfigParser()
+    config.read(file_name)
+
+    return config
@@ -0,0 +1,171 @@
+from contextlib import contextmanager
+import functools
+import tracemalloc
+import cProfile
+import atexit
+import time
+
+try:
+    import resource  # Not available on Windows: the peak RSS is not recorded
+except ImportError:
+    resource = None
+
+
+'''
+Records the cost of the stages of the analysis pipeline (reading the CSV file, building the dataframe, parsing the
+vectors, sorting, scipy quantile functions, saving the plots...), both in total and for each (statistic, cashier) cell.
+For each stage and cell it accumulates the number of calls, the wall clock time, the CPU time, the memory allocated
+(net, i.e. still allocated at the end of the stage) and the peak of the memory traced by tracemalloc during the stage,
+and the peak RSS of the process at the end of the stage.
+The stages are delimited by the context manager stage() or by the decorator profiled(); they can be nested, so the
+time of a stage includes the one of its inner stages. Inside a query, set_cell() opens the segment of a new cell:
+the inner stages opened afterwards are attributed to that cell.
+The profiler is disabled by default, so that the hooks cost only a check of a flag.
+'''
+class StageProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.cprofile = None
+        self.cprofile_file = None
+        self.stage_stack = []  # Open frames: [stage_name, cell, start wall, start cpu, start traced, peak traced, is cell segment]
+        self.measurement_dict = dict()
+
+    '''
+    Enables the profiler. If trace_memory is True, the allocations are traced with tracemalloc (which slows down the
+    code); if cprofile_file is given, the whole execution is also profiled with cProfile and the statistics are
+    dumped to that file at exit, where the summary table is printed.
+    '''
+    def configure(self, enabled=True, trace_memory=True, cprofile_file=None):
+        self.enabled = enabled
+        if not enabled:
+            return
+
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        if cprofile_file:
+            self.cprofile_file = cprofile_file
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+        atexit.register(self.finish)
+
+    def __get_current_cell(self):
+        return self.stage_stack[-1][1] if len(self.stage_stack) > 0 else None
+
+    def __open_frame(self, stage_name, cell, is_cell_segment):
+        traced_current = 0
+        if self.trace_memory:
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+            if len(self.stage_stack) > 0:
+                # The peak is reset for the new frame, so the peak reached so far is kept by the enclosing one
+                self.stage_stack[-1][5] = max(self.stage_stack[-1][5], traced_peak)
+            tracemalloc.reset_peak()
+
+        self.stage_stack.append([stage_name, cell, time.perf_counter(), time.process_time(), traced_current, traced_current, is_cell_segment])
+
+    def __close_frame(self):
+        stage_name, cell, start_wall, start_cpu, start_traced, frame_peak, _ = self.stage_stack.pop()
+        measurement = self.measurement_dict.setdefault((stage_name, cell), {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0,
+                                                                           "allocated": 0, "peak_traced": 0, "peak_rss": 0})
+        measurement["calls"] += 1
+        measurement["wall_time"] += time.perf_counter() - start_wall
+        measurement["cpu_time"] += time.process_time() - start_cpu
+
+        if self.trace_memory:
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+            frame_peak = max(frame_peak, traced_peak)
+            measurement["allocated"] += traced_current - start_traced
+            measurement["peak_traced"] = max(measurement["peak_traced"], frame_peak - start_traced)
+            if len(self.stage_stack) > 0:
+                self.stage_stack[-1][5] = max(self.stage_stack[-1][5], frame_peak)
+
+        if resource is not None:
+            # ru_maxrss is expressed in kilobytes on Linux
+            measurement["peak_rss"] = max(measurement["peak_rss"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024)
+
+    '''
+    Context manager delimiting a stage. The stage is attributed to the given cell, e.g. (statistic_name, cashier_value),
+    or to the cell of the enclosing stage if None.
+    '''
+    @contextmanager
+    def stage(self, stage_name, cell=None):
+        if not self.enabled:
+            yield
+            return
+
+        self.__open_frame(stage_name, cell if cell is not None else self.__get_current_cell(), is_cell_segment=False)
+        try:
+            yield
+        finally:
+            while self.stage_stack[-1][6]:  # Segment of the last cell opened inside the stage
+                self.__close_frame()
+            self.__close_frame()
+
+    '''
+    Inside a stage, closes the segment of the previous cell (if any) and opens the one of the given cell, recorded
+    with the name of the enclosing stage.
+    '''
+    def set_cell(self, statistic_name, cashier_value):
+        if not self.enabled or len(self.stage_stack) == 0:
+            return
+
+        if self.stage_stack[-1][6]:
+            self.__close_frame()
+        self.__open_frame(self.stage_stack[-1][0], (statistic_name, cashier_value), is_cell_segment=True)
+
+    '''
+    Returns the measurements as a dictionary {(stage_name, cell): measurement}.
+    '''
+    def get_measurements(self):
+        return self.measurement_dict
+
+    '''
+    Returns the summary table of the measurements, sorted by wall clock time; the memory is expressed in MB.
+    '''
+    def get_summary_table(self):
+        header = "{:<32} {:<62} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}".format("Stage", "Cell", "Calls", "Wall [s]", "CPU [s]",
+                                                                                "Alloc [MB]", "Peak [MB]", "RSS [MB]")
+        line_list = [header, "-"*len(header)]
+
+        sorted_measurements = sorted(self.measurement_dict.items(), key=lambda item: item[1]["wall_time"], reverse=True)
+        for (stage_name, cell), measurement in sorted_measurements:
+            cell_label = "all" if cell is None else cell[0] + " @ " + cell[1]
+            line_list.append("{:<32} {:<62} {:>7} {:>10.4f} {:>10.4f} {:>10.2f} {:>10.2f} {:>10.1f}".format(
+                stage_name, cell_label, measurement["calls"], measurement["wall_time"], measurement["cpu_time"],
+                measurement["allocated"]/1024**2, measurement["peak_traced"]/1024**2, measurement["peak_rss"]/1024**2))
+
+        return "\n".join(line_list)
+
+    '''
+    Called at exit: dumps the cProfile statistics (if enabled) and prints the summary table.
+    '''
+    def finish(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_file)
+            print("cProfile statistics saved in " + self.cprofile_file)
+
+        if len(self.measurement_dict) > 0:
+            print("\n" + self.get_summary_table())
+
+
+# Profiler shared by all the modules of the package
+profiler = StageProfiler()
+
+
+'''
+Decorator delimiting a stage around a function or method, with the given stage name.
+'''
+def profiled(stage_name):
+    def decorator(function):
+        @functools.wraps(function)
+        def profiled_function(*args, **kwargs):
+            with profiler.stage(stage_name):
+                return function(*args, **kwargs)
+
+        return profiled_function
+
+    return decorator
@@ -1,118 +1,198 @@
-from collections import Counter
-import statsmodels.api as sm
+from sharedtools.AutocorrelationDiagnostics import AutocorrelationDiagnostics
+from analysistools.RepetitionMatrix import RepetitionMatrix
+from analysistools.GridECDF import GridECDF
+from analysistools.LorenzCurve import LorenzCurve, compute_Lorenz_points
+from sharedtools.Histogram import get_shared_bin_edges, compute_histogram
+from analysistools.ResultFile import parse_native_vectors
+from sharedtools.ResultReader import open_decompressed_stream, get_result_extension
+from analysistools.AnalysisStore import AnalysisStore
+from analysistools.QueryCache import QueryCache, memoized_query
+from analysistools.StageProfiler import profiler, profiled
+from analysistools.LazyModule import LazyModule
+from statistics import NormalDist
 import pandas as pd
 import numpy as np
-import scipy.stats
 import math
+import os
+
+# Heavy dependencies, imported only by the queries that use them
+sm = LazyModule("statsmodels.api")
+scipy = LazyModule("scipy")
 
 
 class StatisticDataFrame:
-    def __init__(self, file_name):
-        csv_data = pd.read_csv(file_name, low_memory=False)
-        self.statistic_dataframe = self.__build_dataframe(csv_data)
+    '''
+    The results are read from the result file file_name (CSV export or native .vec file) and/or from the persisted analysis store in store_directory.
+    When a store is used, the runs of file_name not yet stored are appended to it, together with the updated aggregates.
+    The results of the queries are memoized in memory (the memory_cache_entries most recently used) and, if
+    cache_directory is given, on disk (at most disk_cache_size bytes), keyed by the version of the data.
+    '''
+    def __init__(self, file_name=None, store_directory=None, cache_directory=None, memory_cache_entries=32, disk_cache_size=512*1024**2):
+        self.store = None if store_directory is None else AnalysisStore(store_directory)
+        self.statistic_dataframe = None if self.store is None else self.store.load()
+
+        self.query_cache = QueryCache(cache_directory, memory_cache_entries, disk_cache_size)
+        self.data_version = () if self.store is None else (os.path.abspath(store_directory), self.store.get_version())
+
+        # Per-group aggregates, keyed by (kind, statistic_name, cashier_value, ...), updated incrementally on append
+        self.aggregate_cache = dict() if self.store is None else self.store.load_aggregates()
+        # Rows of each statistic, sorted by cashier value and repetition, rebuilt on append
+        self.statistic_index = dict()
+
+        if file_name is not None:
+            self.append_results(file_name)
+
+        if self.statistic_dataframe is None:
+            exit("ERROR: there are no results to analyse")
+
+    '''
+    Reads only the columns of the Omnet++ exported CSV file needed by the analysis; the run identifiers, the names of
+    the statistics and the attributes are stored as categorical codes instead of one string per row.
+    The file can be compressed (gzip, bz2, xz or zstd): it is decompressed as a stream and parsed in chunks of
+    chunk_rows rows, keeping from each chunk only the vectors and the attributes used by the analysis.
+    '''
+    @profiled("read_csv")
+    def __read_csv(self, file_name, chunk_rows=2000):
+        categorical_columns = ["run", "name", "attrname", "attrvalue"]
+        chunk_list = []
+
+        with open(file_name, "rb") as raw_file, open_decompressed_stream(raw_file) as csv_stream:
+            for chunk in pd.read_csv(csv_stream, usecols=categorical_columns + ["vecvalue", "vectime"], chunksize=chunk_rows,
+                                     dtype={column: "category" for column in categorical_columns}):
+                chunk_list.append(chunk[chunk["attrname"].isin(["CASH", "repetition"]) | chunk["vecvalue"].notna()])
+
+        # The categories of the chunks are different, so they are rebuilt on the whole data
+        return pd.concat(chunk_list, ignore_index=True).astype({column: "category" for column in categorical_columns})
+
+    '''
+    Reads a result file, either an Omnet++ exported CSV file or a native vector file (.vec) written by a single run,
+    possibly compressed. Returns the same columns and categorical codes of __read_csv.
+    '''
+    def __read_results(self, file_name):
+        if get_result_extension(file_name) != ".vec":
+            return self.__read_csv(file_name)
+
+        categorical_columns = ["run", "name", "attrname", "attrvalue"]
+        with profiler.stage("read_vec"), open(file_name, "rb") as raw_file, open_decompressed_stream(raw_file) as vector_stream:
+            vector_data = parse_native_vectors(vector_stream)
+
+        vector_data = vector_data[vector_data["attrname"].isin(["CASH", "repetition"]) | vector_data["vecvalue"].notna()]
+        return vector_data.astype({column: "category" for column in categorical_columns})
+
+    '''
+    Adds to the dataframe the column seconds_column with the time of time_column (e.g. "1.5min") converted in seconds;
+    each category is converted only once.
+    '''
+    def __add_seconds_column(self, dataframe, time_column, seconds_column):
+        dataframe[time_column] = dataframe[time_column].cat.remove_unused_categories()
+        category_seconds = np.array([self.__convert_to_seconds(category) for category in dataframe[time_column].cat.categories])
+        dataframe[seconds_column] = category_seconds[dataframe[time_column].cat.codes.to_numpy()]
 
     '''
     Given an Omnet++ exported CSV file, it returns a dataframe in a suitable format for data analysis.
-    The dataframe has columns: ['run' 'cashiervalue' 'repetition' 'statistic' 'vecvalue']
+    The dataframe has columns: ['run' 'cashiervalue' 'repetition' 'statistic' 'vecvalue' 'vectime' 'cashierseconds'],
+    where the last one is the numeric value of the cashier service time in seconds.
     '''
+    @profiled("build_dataframe")
     def __build_dataframe(self, csv_data):
         cashier_column = csv_data[csv_data["attrname"] == "CASH"][["run", "attrvalue"]]
         cashier_column.rename(columns={'attrvalue': 'cashiervalue'}, inplace=True)
 
-        vector_column = csv_data[["run", "name", "vecvalue"]].dropna()
+        vector_column = csv_data[["run", "name", "vecvalue", "vectime"]].dropna(subset=["vecvalue"])
         vector_column.rename(columns={'name': 'statistic'}, inplace=True)
 
         repetition_column = csv_data[(csv_data["attrname"] == "repetition")][["run", "attrvalue"]]
         repetition_column.rename(columns={'attrvalue': 'repetition'}, inplace=True)
+        del csv_data  # Only the selected rows are still referenced
 
         final_dataframe = cashier_column.merge(repetition_column, left_on="run", right_on="run", validate="one_to_one")
         final_dataframe = final_dataframe.merge(vector_column, left_on="run", right_on="run", validate="one_to_many")
-        final_dataframe["repetition"] = pd.to_numeric(final_dataframe["repetition"])
+        final_dataframe["repetition"] = final_dataframe["repetition"].cat.remove_unused_categories().astype(np.int64)
+        final_dataframe["statistic"] = final_dataframe["statistic"].cat.remove_unused_categories()
+        self.__add_seconds_column(final_dataframe, "cashiervalue", "cashierseconds")
 
         return final_dataframe
 
     '''
     Returns the dataframe rows associated to the specified vector statistic.
     The rows are sorted first by cashier value and then by repetition number, both in ascending order. 
+    The selection is built once and shared by all the queries until new results are appended.
     '''
     def __get_single_statistic_dataframe(self, statistic_name):
-        statistic_name = statistic_name + ":vector"
-        single_statistic_dataframe = self.statistic_dataframe[self.statistic_dataframe["statistic"] == statistic_name]
+        if statistic_name in self.statistic_index:
+            return self.statistic_index[statistic_name]
+
+        single_statistic_dataframe = self.statistic_dataframe[self.statistic_dataframe["statistic"] == statistic_name + ":vector"]
         single_statistic_dataframe = single_statistic_dataframe.sort_values(by=["cashiervalue", "repetition"], ascending=[True, True])
+        self.statistic_index[statistic_name] = single_statistic_dataframe
 
         return single_statistic_dataframe
 
-    ''' 
+    '''
     Each element of the "vecvalue" column of the dataframe is a string of values separated by a whitespace.
-    Given a dataframe, the method returns a list of converted "vecvalue" elements.
-    If sort_values is True, each vecvalue is sorted in ascending order. 
+    Given a dataframe, the method returns a RepetitionMatrix containing the converted "vecvalue" elements,
+    one row for each repetition. If sort_values is True, each row is sorted in ascending order.
     '''
-    def __get_list_of_converted_vecvalues(self, dataframe, sort_values):
-        veclist = []
-        for i, row in dataframe.iterrows():
-            vecvalue = [float(n) for n in row["vecvalue"].split()]
-            if sort_values:
-                vecvalue.sort()
-            veclist.append(vecvalue)
-
-        return veclist
+    def __get_repetition_matrix(self, dataframe, sort_values):
+        return RepetitionMatrix(dataframe["vecvalue"].tolist(), sort_values=sort_values)
 
     ''' 
     Each element of the "vecvalue" column of the dataframe is a string of values separated by a whitespace.
     Given a dataframe, the method combines all the elements contained in the "vecvalue" column in a single list
     of elements, which is returned.
-    If sort_values is True, the list is sorted in ascending order.
+    If sort_values is True, the observations are returned as a float64 array sorted in ascending order (see
+    RepetitionMatrix.get_sorted_observations). If a cache_key is given, e.g. (statistic_name, cashier_value), the
+    sorted array is cached and returned (read-only) by the following calls.
     '''
-    def __get_all_vecvalues_obervations(self, dataframe, sort_values):
-        veclist = []
-        for i, row in dataframe.iterrows():
-            vecvalue = [float(n) for n in row["vecvalue"].split()]
-            veclist.extend(vecvalue)
-
+    def __get_all_vecvalues_obervations(self, dataframe, sort_values, cache_key=None):
         if sort_values:
-            veclist.sort()
-        return veclist
+            aggregate_key = None if cache_key is None else ("sorted",) + cache_key
+            if aggregate_key in self.aggregate_cache:
+                return self.aggregate_cache[aggregate_key]
 
-    '''
-    Given a list of vectors, returns a copy of the list where each vector is truncated and contains the
-    same number of values. The size of the final vectors is determined as the minimum between:
-    1) the minimum size across all the vectors;
-    2) the given max size.
-    '''
-    def __balance_observations(self, vector_list, max_observations=None):
-        min_observation_recorded = min([len(v) for v in vector_list])
+            sorted_observations = self.__get_repetition_matrix(dataframe, sort_values=False).get_sorted_observations()
+            if aggregate_key is not None:
+                sorted_observations.flags.writeable = False
+                self.aggregate_cache[aggregate_key] = sorted_observations
+            return sorted_observations
 
-        if max_observations is not None:
-            balance_level = min(min_observation_recorded, max_observations)
-        else:
-            balance_level = min_observation_recorded
-
-        balanced_vector_list = []
-        for vector in vector_list:
-            balanced_vector_list.append(vector[:balance_level])
+        veclist = []
+        with profiler.stage("parse_vectors"):
+            for i, row in dataframe.iterrows():
+                vecvalue = [float(n) for n in row["vecvalue"].split()]
+                veclist.extend(vecvalue)
 
-        return balanced_vector_list
+        return veclist
 
     '''
-    Given a list of vectors of the same size, computes a vector of sample means and associated confidence intervals.
-    Each sample mean is computed between values in the same position across the vectors (sample mean of each column of
-    the matrix of repetitions).
+    Given the repetitions of a scenario (RepetitionMatrix), computes a vector of sample means and associated confidence
+    intervals on their balanced matrix (repetitions x minimum number of observations).
+    Each sample mean is computed between values in the same position across the repetitions (sample mean of each column
+    of the matrix). The columns are read and reduced in chunks of chunk_size, so that the temporary arrays have a
+    bounded size regardless of the number of observations.
     Each confidence interval is expressed with the following convention (ready to be plotted with matplotlib):
     given the confidence interval CI = [X - error, X + error], the returned value is "error".
     '''
-    def __compute_mean_across_repetitions(self, repetition_veclist, confidence_level):
-        numpy_repetition_list = np.array(repetition_veclist)
-
+    def __compute_mean_across_repetitions(self, repetition_matrix, confidence_level, chunk_size=1000000):
         # Parameters useful to compute confidence intervals
-        number_repetitions = numpy_repetition_list.shape[0]
+        number_repetitions, number_observations = repetition_matrix.get_number_repetitions(), repetition_matrix.get_balance_level()
         alpha = 1-confidence_level
-        standard_normal_quantile = scipy.stats.norm.ppf(1-alpha/2)
+        with profiler.stage("scipy_ppf"):
+            standard_normal_quantile = NormalDist().inv_cdf(1-alpha/2)
+
+        mean_vector = np.empty(number_observations, dtype=np.float64)
+        error_bar = np.empty(number_observations, dtype=np.float64)
 
-        mean_vector = np.mean(numpy_repetition_list, axis=0, dtype=np.float64)
-        std_vector = np.std(numpy_repetition_list, axis=0, ddof=1, dtype=np.float64)
-        error_bar = (std_vector/(math.sqrt(number_repetitions)))*standard_normal_quantile
+        for chunk_start in range(0, number_observations, chunk_size):
+            chunk = repetition_matrix.get_balanced_columns(chunk_start, chunk_start + chunk_size)
+            chunk_mean = mean_vector[chunk_start:chunk_start + chunk_size]
+            chunk_error = error_bar[chunk_start:chunk_start + chunk_size]
 
-        return mean_vector.tolist(), error_bar.tolist()
+            np.mean(chunk, axis=0, dtype=np.float64, out=chunk_mean)
+            np.std(chunk, axis=0, ddof=1, dtype=np.float64, out=chunk_error)
+            chunk_error *= standard_normal_quantile/math.sqrt(number_repetitions)
+
+        return mean_vector, error_bar
 
     '''
     Given a single list of observations, the method computes and returns the lists containing
@@ -121,61 +201,138 @@ class StatisticDataFrame:
     given the confidence interval CI = [X - error, X + error], the returned value is "error".
     '''
     def __compute_ECDF_points(self, obs_vector, error_vector):
+        obs_vector = np.asarray(obs_vector, dtype=np.float64)
         num_observations = len(obs_vector)
-        step_height = 1/num_observations
-        ECDF_x_vector, ECDF_y_vector, ECDF_error_bar = [], [], []
 
-        observation_classified = [(obs, count) for obs, count in Counter(obs_vector).items()]
-        observation_classified.sort(key=lambda tup: tup[0])  # To be sure of the ascending order
+        # The observations are already sorted in ascending order: each distinct value is a step of the ECDF,
+        # whose error bar is the largest one among the duplicates of the value.
+        ECDF_x_vector, first_index, step_count = np.unique(obs_vector, return_index=True, return_counts=True)
+        ECDF_y_vector = np.cumsum(step_count)/num_observations
+        ECDF_y_vector[-1] = 1  # Remove numerical errors
 
         if error_vector is None:
-            for obs_tuple in observation_classified:
-                ECDF_x_vector.append(obs_tuple[0])
-                ECDF_y_vector.append(obs_tuple[1] * step_height)
-
             ECDF_error_bar = None
         else:
-            for obs_tuple in observation_classified:
-                duplicate_indexes = [i for i, x in enumerate(obs_vector) if x == obs_tuple[0]]
-                ECDF_x_vector.append(obs_tuple[0])
-                ECDF_y_vector.append(obs_tuple[1]*step_height)
-                ECDF_error_bar.append(max([error_vector[i] for i in duplicate_indexes]))
-
-        ECDF_y_vector = (np.cumsum(ECDF_y_vector)).tolist()
-        ECDF_y_vector[-1] = 1  # Remove numerical errors
+            ECDF_error_bar = np.maximum.reduceat(np.asarray(error_vector, dtype=np.float64), first_index)
 
         return ECDF_x_vector, ECDF_y_vector, ECDF_error_bar
 
     '''
-    Given a single list of observations, the method computes and returns the lists containing
-    the x values and y values for a Lorenz curve plot.
+    Builds the LorenzCurve of the given dataframe rows on the grid of population shares, adding the sorted
+    observations of each repetition separately.
+    If a cache_key is given, e.g. (statistic_name, cashier_value), the LorenzCurve is cached for the same grid.
     '''
-    def __compute_Lorenz_points(self, obs_vector):
-        num_observations = len(obs_vector)
+    @profiled("build_Lorenz_curve")
+    def __build_Lorenz_curve(self, dataframe, population_grid, cache_key=None):
+        aggregate_key = None if cache_key is None else ("lorenz",) + cache_key + (np.asarray(population_grid, dtype=np.float64).tobytes(),)
+        if aggregate_key in self.aggregate_cache:
+            return self.aggregate_cache[aggregate_key]
+
+        Lorenz_curve = LorenzCurve(population_grid)
+        repetition_matrix = self.__get_repetition_matrix(dataframe, sort_values=True)
+        for repetition, sorted_obs in zip(dataframe["repetition"], repetition_matrix.get_row_list()):
+            Lorenz_curve.update(repetition, sorted_obs)
+
+        if aggregate_key is not None:
+            self.aggregate_cache[aggregate_key] = Lorenz_curve
+        return Lorenz_curve
+
+    '''
+    Builds the GridECDF of the given dataframe rows, adding the observations of each repetition separately.
+    If a cache_key is given, e.g. (statistic_name, cashier_value), the GridECDF is cached for the same grid.
+    '''
+    @profiled("build_grid_ECDF")
+    def __build_grid_ECDF(self, dataframe, x_grid, cache_key=None):
+        aggregate_key = None if cache_key is None else ("grid",) + cache_key + (np.asarray(x_grid, dtype=np.float64).tobytes(),)
+        if aggregate_key in self.aggregate_cache:
+            return self.aggregate_cache[aggregate_key]
 
-        Lorenz_x_vector = ((np.arange(1, num_observations+1))/num_observations).tolist()
-        Lorenz_y_vector = (np.cumsum(obs_vector)/np.sum(obs_vector)).tolist()
+        grid_ECDF = GridECDF(x_grid)
+        for i, row in dataframe.iterrows():
+            grid_ECDF.update(row["repetition"], np.array(row["vecvalue"].split(), dtype=np.float64))
 
-        # Insert starting point (0,0)
-        Lorenz_x_vector.insert(0, 0)  # Index, Value
-        Lorenz_y_vector.insert(0, 0)
+        if aggregate_key is not None:
+            self.aggregate_cache[aggregate_key] = grid_ECDF
+        return grid_ECDF
 
-        return Lorenz_x_vector, Lorenz_y_vector
+    '''
+    Returns the tuple (number_of_observations, mean, sum_of_squared_deviations) of all the observations of the given
+    dataframe rows. The moments of the repetitions are combined with the pairwise formula of Chan et al., which is
+    also used to update them when new repetitions are appended. If a cache_key is given, the moments are cached.
+    '''
+    @profiled("observation_moments")
+    def __get_observation_moments(self, dataframe, cache_key=None):
+        aggregate_key = None if cache_key is None else ("moments",) + cache_key
+        if aggregate_key in self.aggregate_cache:
+            return self.aggregate_cache[aggregate_key]
+
+        observation_moments = (0, 0.0, 0.0)
+        for vecvalue in dataframe["vecvalue"]:
+            obs_vector = np.array(vecvalue.split(), dtype=np.float64)
+            repetition_moments = (len(obs_vector), np.mean(obs_vector), np.sum((obs_vector - np.mean(obs_vector))**2))
+            observation_moments = self.__merge_moments(observation_moments, repetition_moments)
+
+        if aggregate_key is not None:
+            self.aggregate_cache[aggregate_key] = observation_moments
+        return observation_moments
 
     '''
-    Computes the sample mean of the given list of observations and its confidence interval at the specified level.
+    Merges two tuples (number_of_observations, mean, sum_of_squared_deviations) of disjoint sets of observations.
+    '''
+    def __merge_moments(self, first_moments, second_moments):
+        first_number, first_mean, first_squares = first_moments
+        second_number, second_mean, second_squares = second_moments
+        if second_number == 0:
+            return first_moments
+
+        total_number = first_number + second_number
+        delta = second_mean - first_mean
+        total_mean = first_mean + delta*second_number/total_number
+        total_squares = first_squares + second_squares + delta**2*first_number*second_number/total_number
+
+        return total_number, total_mean, total_squares
+
+    '''
+    Updates every cached aggregate with the rows of new_dataframe (new runs) belonging to its group, so that its cost
+    is proportional to the new data only.
+    '''
+    def __update_aggregates(self, new_dataframe):
+        for aggregate_key, aggregate in list(self.aggregate_cache.items()):
+            kind, statistic_name, cashier_value = aggregate_key[:3]
+            group_dataframe = new_dataframe[(new_dataframe["statistic"] == statistic_name + ":vector") & (new_dataframe["cashiervalue"] == cashier_value)]
+            if len(group_dataframe) == 0:
+                continue
+
+            group_dataframe = group_dataframe.sort_values(by="repetition")
+            if kind == "sorted":
+                new_observations = self.__get_repetition_matrix(group_dataframe, sort_values=False).get_sorted_observations()
+                merged_observations = np.concatenate((aggregate, new_observations))
+                merged_observations.sort(kind="stable")  # Merge of the two sorted runs
+                merged_observations.flags.writeable = False
+                self.aggregate_cache[aggregate_key] = merged_observations
+            elif kind == "moments":
+                self.aggregate_cache[aggregate_key] = self.__merge_moments(aggregate, self.__get_observation_moments(group_dataframe))
+            elif kind == "grid":
+                aggregate.merge(self.__build_grid_ECDF(group_dataframe, aggregate.x_grid))
+            elif kind == "lorenz":
+                aggregate.merge(self.__build_Lorenz_curve(group_dataframe, aggregate.population_grid))
+
+    '''
+    Computes the sample mean and its confidence interval at the specified level, given the tuple
+    (number_of_observations, mean, sum_of_squared_deviations) of the observations.
     The confidence interval is computed supposing a number of observations higher than 30.
+    Returns a tuple (sample_mean, error), where the error is such that the confidence interval is [sample_mean-error, sample_mean+error].
     '''
-    def __compute_sample_mean(self, obs_vector, confidence_level):
+    def __compute_sample_mean(self, observation_moments, confidence_level):
         alpha = 1-confidence_level
-        standard_normal_quantile = scipy.stats.norm.ppf(1-alpha/2)
-        obs_number = len(obs_vector)
+        with profiler.stage("scipy_ppf"):
+            standard_normal_quantile = NormalDist().inv_cdf(1-alpha/2)
+        obs_number, sample_mean, squared_deviations = observation_moments
 
         if obs_number < 30:
             print("WARNING: the number of observations used to compute the confidence interval for the mean is not high enough")
 
-        sample_mean = np.mean(obs_vector, dtype=np.float64)
-        sample_std = np.std(obs_vector, ddof=1, dtype=np.float64)
+        sample_std = math.sqrt(squared_deviations/(obs_number - 1))
         error = (sample_std/(math.sqrt(obs_number)))*standard_normal_quantile
 
         return sample_mean, error
@@ -189,9 +346,11 @@ class StatisticDataFrame:
     '''
     def __compute_sample_median(self, obs_vector, confidence_level):
         alpha = 1 - confidence_level
-        standard_normal_quantile = scipy.stats.norm.ppf(1 - alpha/2)
+        with profiler.stage("scipy_ppf"):
+            standard_normal_quantile = NormalDist().inv_cdf(1 - alpha/2)
         obs_number = len(obs_vector)
-        ordered_statistics = np.sort(obs_vector, axis=None)
+        with profiler.stage("sort"):
+            ordered_statistics = np.sort(obs_vector, axis=None)
 
         if obs_number < 30:
             print("WARNING: the number of observations used to compute the confidence interval for the median is not high enough")
@@ -221,6 +380,120 @@ class StatisticDataFrame:
 
         return CoV
 
+    '''
+    Converts a time expressed as in the Omnet++ configuration (e.g. "30s", "1.5min", "2h", "5d") in seconds.
+    '''
+    def __convert_to_seconds(self, time_string):
+        unit_multiplier = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+
+        for unit in sorted(unit_multiplier, key=len, reverse=True):
+            if time_string.endswith(unit):
+                return float(time_string[:-len(unit)])*unit_multiplier[unit]
+
+        return float(time_string)
+
+    '''
+    Given the waiting time and response time vectors (with their vectimes) recorded for the same customer class in
+    a single repetition, returns the service times of the customers appearing in both the vectors and their arrival
+    times in ascending order.
+    The arrival time of a customer is obtained as "emission time - recorded time" for both the vectors and it is used
+    to match the two records of the same customer, since the warm-up period and the end of the simulation can cut
+    the first or the last records of only one of the two vectors.
+    '''
+    def __get_service_and_arrival_times(self, waiting_row, response_row):
+        waiting_vector = np.array(waiting_row["vecvalue"].split(), dtype=np.float64)
+        waiting_time_vector = np.array(waiting_row["vectime"].split(), dtype=np.float64)
+        response_vector = np.array(response_row["vecvalue"].split(), dtype=np.float64)
+        response_time_vector = np.array(response_row["vectime"].split(), dtype=np.float64)
+
+        waiting_arrival = waiting_time_vector - waiting_vector
+        response_arrival = response_time_vector - response_vector
+        waiting_order = np.argsort(waiting_arrival, kind="stable")
+        response_order = np.argsort(response_arrival, kind="stable")
+        waiting_arrival, waiting_vector = waiting_arrival[waiting_order], waiting_vector[waiting_order]
+        response_arrival, response_vector = response_arrival[response_order], response_vector[response_order]
+
+        # Nearest waiting record of each response record; the match is accepted up to the export precision
+        match_index = np.clip(np.searchsorted(waiting_arrival, response_arrival), 1, max(len(waiting_arrival)-1, 1))
+        left_index = match_index - 1
+        closer_left = np.abs(waiting_arrival[left_index] - response_arrival) <= np.abs(waiting_arrival[match_index] - response_arrival)
+        match_index = np.where(closer_left, left_index, match_index)
+        tolerance = 1e-6*np.maximum(1, np.abs(response_arrival))
+        matched = np.abs(waiting_arrival[match_index] - response_arrival) <= tolerance
+
+        service_time_vector = response_vector[matched] - waiting_vector[match_index[matched]]
+        return service_time_vector, response_arrival
+
+    '''
+    Computes, for each repetition of a cashier level, the observed counterparts of the known input parameters:
+    the sample mean of the service time and the sample mean of the VIP and normal interarrival times.
+    Returns a dictionary where each key is a repetition number and each value is a numpy array
+    [service_mean, vip_interarrival_mean, normal_interarrival_mean].
+    The computation requires the waiting and response time vectors of both the customer classes.
+    '''
+    def __compute_control_variates(self, cashier_value):
+        category_vectors = dict()  # customer category -> {repetition: (service_time_vector, arrival_vector)}
+
+        for customer_category in ["Vip", "Normal"]:
+            waiting_dataframe = self.__get_single_statistic_dataframe("waitingTime" + customer_category + "CustomerCashierQueueStatistic")
+            response_dataframe = self.__get_single_statistic_dataframe("responseTime" + customer_category + "CustomerCashierNodeStatistic")
+            waiting_dataframe = waiting_dataframe[waiting_dataframe["cashiervalue"] == cashier_value]
+            response_dataframe = response_dataframe[response_dataframe["cashiervalue"] == cashier_value]
+
+            if waiting_dataframe.empty or response_dataframe.empty:
+                exit("ERROR: the control variates require the waiting and response time vectors of both the customer classes")
+
+            merged_dataframe = waiting_dataframe.merge(response_dataframe, on="repetition", suffixes=("_waiting", "_response"), validate="one_to_one")
+            category_vectors[customer_category] = dict()
+            for i, row in merged_dataframe.iterrows():
+                waiting_row = {"vecvalue": row["vecvalue_waiting"], "vectime": row["vectime_waiting"]}
+                response_row = {"vecvalue": row["vecvalue_response"], "vectime": row["vectime_response"]}
+                category_vectors[customer_category][row["repetition"]] = self.__get_service_and_arrival_times(waiting_row, response_row)
+
+        vip_vectors, normal_vectors = category_vectors["Vip"], category_vectors["Normal"]
+        common_repetitions = sorted(set(vip_vectors) & set(normal_vectors))
+        if len(common_repetitions) != len(set(vip_vectors) | set(normal_vectors)):
+            print("WARNING: some repetitions do not contain the vectors of both the customer classes and they are excluded from the control variates")
+
+        control_variates = dict()
+        for repetition in common_repetitions:
+            (vip_service, vip_arrival), (normal_service, normal_arrival) = vip_vectors[repetition], normal_vectors[repetition]
+            service_mean = np.mean(np.concatenate((vip_service, normal_service)), dtype=np.float64)
+            vip_interarrival_mean = (vip_arrival[-1] - vip_arrival[0])/(len(vip_arrival) - 1)
+            normal_interarrival_mean = (normal_arrival[-1] - normal_arrival[0])/(len(normal_arrival) - 1)
+            control_variates[repetition] = np.array([service_mean, vip_interarrival_mean, normal_interarrival_mean])
+
+        return control_variates
+
+    '''
+    Solves at once the control-variate regressions of many scenarios.
+    Given the tensor of the centered controls (scenarios x repetitions x controls), the matrix of the responses
+    (scenarios x repetitions) and the number of valid repetitions of each scenario (shorter scenarios are padded with
+    zero rows, which do not contribute to the normal equations), the model Y = b0 + b*(C - mu) is fitted with a single
+    batched least-squares solve.
+    Returns a tuple (adjusted_mean_vector, adjusted_std_error_vector, naive_std_error_vector, degrees_of_freedom):
+    b0 is the control-variate estimate of the mean and its standard error derives from the residual variance.
+    '''
+    def __solve_control_variate_regression(self, centered_control_tensor, response_matrix, repetition_number_vector):
+        number_scenarios, max_repetitions, number_controls = centered_control_tensor.shape
+        valid_mask = np.arange(max_repetitions)[np.newaxis, :] < repetition_number_vector[:, np.newaxis]
+
+        design_tensor = np.concatenate((valid_mask[:, :, np.newaxis].astype(np.float64), centered_control_tensor), axis=2)
+        normal_matrix = np.einsum("snp,snq->spq", design_tensor, design_tensor)
+        normal_vector = np.einsum("snp,sn->sp", design_tensor, response_matrix)
+        coefficient_matrix = np.linalg.solve(normal_matrix, normal_vector[:, :, np.newaxis])[:, :, 0]
+
+        residual_matrix = (response_matrix - np.einsum("snp,sp->sn", design_tensor, coefficient_matrix))*valid_mask
+        degrees_of_freedom = repetition_number_vector - number_controls - 1
+        residual_variance = np.sum(residual_matrix**2, axis=1)/degrees_of_freedom
+        adjusted_std_error_vector = np.sqrt(residual_variance*np.linalg.inv(normal_matrix)[:, 0, 0])
+
+        response_mean = np.sum(response_matrix, axis=1)/repetition_number_vector
+        response_variance = np.sum(((response_matrix - response_mean[:, np.newaxis])*valid_mask)**2, axis=1)/(repetition_number_vector - 1)
+        naive_std_error_vector = np.sqrt(response_variance/repetition_number_vector)
+
+        return coefficient_matrix[:, 0], adjusted_std_error_vector, naive_std_error_vector, degrees_of_freedom
+
     '''
     Executes a linear regression analysis between two list of observations x and y; the model is y = ax + b.
     It returns a tuple (a, b, R^2), where 'a' is the slope of the regression line, 'b' the offset of the latter and
@@ -245,22 +518,24 @@ class StatisticDataFrame:
        and the obtained coefficient of determination R^2.
     '''
     def __compute_qq_plot_points(self, obs_vector, theoretical_distribution, weibull_shape):
-        ordered_statistics = sorted(obs_vector)
+        with profiler.stage("sort"):
+            ordered_statistics = np.sort(obs_vector).tolist()
         theoretical_quantiles = []
 
         quantile_number = np.arange(1, len(obs_vector) + 1, 1)
         quantile_number = (quantile_number - 0.5)/len(obs_vector)
 
-        if theoretical_distribution == "normal":
-            theoretical_quantiles = scipy.stats.norm.ppf(quantile_number).tolist()
-        elif theoretical_distribution == "exponential":
-            theoretical_quantiles = scipy.stats.expon.ppf(quantile_number).tolist()
-        elif theoretical_distribution == "uniform":
-            theoretical_quantiles = scipy.stats.uniform.ppf(quantile_number).tolist()
-        elif theoretical_distribution == "weibull":
-            theoretical_quantiles = scipy.stats.weibull_min.ppf(quantile_number, weibull_shape).tolist()
-        else:
-            exit("ERROR: the specified theoretical distribution for the QQ plot is not defined.")
+        with profiler.stage("scipy_ppf"):
+            if theoretical_distribution == "normal":
+                theoretical_quantiles = scipy.stats.norm.ppf(quantile_number).tolist()
+            elif theoretical_distribution == "exponential":
+                theoretical_quantiles = scipy.stats.expon.ppf(quantile_number).tolist()
+            elif theoretical_distribution == "uniform":
+                theoretical_quantiles = scipy.stats.uniform.ppf(quantile_number).tolist()
+            elif theoretical_distribution == "weibull":
+                theoretical_quantiles = scipy.stats.weibull_min.ppf(quantile_number, weibull_shape).tolist()
+            else:
+                exit("ERROR: the specified theoretical distribution for the QQ plot is not defined.")
 
         slope, offset, rsquared = self.__linear_regression_analysis(theoretical_quantiles, ordered_statistics)
 
@@ -276,6 +551,91 @@ class StatisticDataFrame:
 
     # PUBLIC INTERFACE
 
+    '''
+    Appends the runs of the result file file_name (CSV export or native .vec file), skipping the runs already loaded (deduplicated by run identifier);
+    with a store, a file already ingested and not modified since then is not even parsed.
+    The cached aggregates are updated with the new runs only and, with a store, the new runs and the aggregates
+    are persisted. Returns the number of appended runs.
+    '''
+    def append_results(self, file_name):
+        if self.store is not None and self.store.is_ingested(file_name):
+            return 0
+
+        new_dataframe = self.__build_dataframe(self.__read_results(file_name))
+        if self.statistic_dataframe is not None:
+            new_dataframe = new_dataframe[~new_dataframe["run"].isin(self.statistic_dataframe["run"].unique())]
+        if self.store is not None:
+            new_dataframe = self.store.append(new_dataframe, file_name)
+
+        number_new_runs = new_dataframe["run"].nunique()
+        if number_new_runs == 0:
+            return 0
+
+        self.__update_aggregates(new_dataframe)
+        self.statistic_index = dict()
+        if self.store is not None:
+            self.data_version = (self.data_version[0], self.store.get_version())
+        else:
+            file_stat = os.stat(file_name)
+            self.data_version += ((os.path.abspath(file_name), file_stat.st_size, file_stat.st_mtime_ns),)
+        if self.statistic_dataframe is not None:
+            # The categories of the two dataframes may differ (e.g. a new cashier level), so they are rebuilt
+            categorical_columns = ["run", "cashiervalue", "statistic"]
+            new_dataframe = pd.concat([self.statistic_dataframe, new_dataframe], ignore_index=True)
+            new_dataframe = new_dataframe.astype({column: "category" for column in categorical_columns})
+        self.statistic_dataframe = new_dataframe
+
+        if self.store is not None:
+            self.store.save_aggregates(self.aggregate_cache)
+
+        return number_new_runs
+
+    '''
+    Returns the list of the cashier values of the loaded runs, sorted by service time.
+    '''
+    def get_cashier_list(self):
+        cashier_dataframe = self.statistic_dataframe[["cashiervalue", "cashierseconds"]].drop_duplicates()
+        return cashier_dataframe.sort_values(by="cashierseconds")["cashiervalue"].astype(str).tolist()
+
+    '''
+    Returns a dictionary with the number of loaded repetitions of each cashier value in cashier_list.
+    '''
+    def get_number_repetitions(self, cashier_list):
+        run_dataframe = self.statistic_dataframe[["run", "cashiervalue"]].drop_duplicates(subset="run")
+        return {cashier_value: int((run_dataframe["cashiervalue"] == cashier_value).sum()) for cashier_value in cashier_list}
+
+    '''
+    Returns the statistics of the query cache: memory hits, disk hits, misses and hit ratio.
+    '''
+    def get_cache_statistics(self):
+        return self.query_cache.get_statistics()
+
+    '''
+    Selects the rows of each statistic in statistic_list, which are then shared by all the queries.
+    '''
+    def build_statistic_index(self, statistic_list):
+        for statistic_name in statistic_list:
+            self.__get_single_statistic_dataframe(statistic_name)
+
+    '''
+    Sorts the observations of each (statistic, cashier value) group, which are then shared by the queries based on the
+    ordered statistics (ECDF without confidence intervals, Lorenz curve, median, coefficient of variation, qq plot).
+    '''
+    def sort_observations(self, statistic_list, cashier_list):
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+
+            for cashier_value in cashier_list:
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
+
+    '''
+    Saves in the store the aggregates computed by the queries, so that they are available to the next sessions.
+    '''
+    def save_aggregates(self):
+        if self.store is not None:
+            self.store.save_aggregates(self.aggregate_cache)
+
     '''
     Computes the points of an ECDF for a waiting/response time metric (NOT for the occupancy of queues);
     the points are computed for all the statistics in statistic_list, divided by cashier value.
@@ -299,6 +659,8 @@ class StatisticDataFrame:
     3) error_vector contains the error bars (confidence intervals) associated to the x values if confidence level is
        not None. If the latter is the case, the error_vector variable is None.
     '''
+    @profiled("get_ECDF_data")
+    @memoized_query
     def get_ECDF_data(self, statistic_list, cashier_list, confidence_level=None):
         ECDF_data = dict()
 
@@ -307,15 +669,15 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
 
                 if confidence_level is None:
-                    obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True)
+                    obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
                     error_vector = None
                 else:
-                    repetition_veclist = self.__get_list_of_converted_vecvalues(repetition_by_cashier, sort_values=True)
-                    repetition_veclist = self.__balance_observations(repetition_veclist)
-                    obs_vector, error_vector = self.__compute_mean_across_repetitions(repetition_veclist, confidence_level)
+                    repetition_matrix = self.__get_repetition_matrix(repetition_by_cashier, sort_values=True)
+                    obs_vector, error_vector = self.__compute_mean_across_repetitions(repetition_matrix, confidence_level)
 
                 ECDF_x_vector, ECDF_y_vector, ECDF_error_bar = self.__compute_ECDF_points(obs_vector, error_vector)
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
@@ -325,17 +687,86 @@ class StatisticDataFrame:
 
         return ECDF_data
 
+    '''
+    Computes the ECDF of a waiting/response time metric on a fixed grid of x values, for all the statistics in
+    statistic_list, divided by cashier value. Only the histogram counts of each repetition are kept, hence the size of
+    the result depends only on the grid resolution.
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
+    with the format (cashier_label, x_grid, ECDF_vector, DKW_error, replication_error_vector), where:
+    1) DKW_error is the half-width of the Dvoretzky-Kiefer-Wolfowitz band (same for all the points);
+    2) replication_error_vector contains the half-widths of the pointwise confidence intervals obtained
+       from the ECDFs of the single repetitions.
+    '''
+    @profiled("get_ECDF_grid_data")
+    @memoized_query
+    def get_ECDF_grid_data(self, statistic_list, cashier_list, x_grid, confidence_level):
+        ECDF_data = dict()
+
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+            statistic_data = []
+
+            for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                grid_ECDF = self.__build_grid_ECDF(repetition_by_cashier, x_grid, cache_key=(statistic_name, cashier_value))
+                ECDF_vector, DKW_error, replication_error_vector = grid_ECDF.get_ECDF(confidence_level)
+
+                cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
+                statistic_data.append((cashier_label, np.asarray(x_grid, dtype=np.float64), ECDF_vector, DKW_error, replication_error_vector))
+
+            ECDF_data[statistic_name] = statistic_data
+
+        return ECDF_data
+
+    '''
+    Computes the quantiles of a waiting/response time metric at the given probability levels, for all the statistics
+    in statistic_list, divided by cashier value. The quantiles are obtained inverting the ECDF of each repetition
+    computed on the fixed grid x_grid (the finer the grid, the more accurate the quantiles) and they are averaged
+    across the repetitions.
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
+    with the format (cashier_label, probability_levels, quantile_vector, error_vector), where each error
+    is such that the confidence interval is [quantile-error, quantile+error].
+    '''
+    @profiled("get_quantile_grid_data")
+    @memoized_query
+    def get_quantile_grid_data(self, statistic_list, cashier_list, x_grid, probability_levels, confidence_level):
+        quantile_data = dict()
+
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+            statistic_data = []
+
+            for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                grid_ECDF = self.__build_grid_ECDF(repetition_by_cashier, x_grid, cache_key=(statistic_name, cashier_value))
+                quantile_vector, error_vector = grid_ECDF.get_quantiles(probability_levels, confidence_level)
+
+                cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
+                statistic_data.append((cashier_label, np.asarray(probability_levels, dtype=np.float64), quantile_vector, error_vector))
+
+            quantile_data[statistic_name] = statistic_data
+
+        return quantile_data
+
     '''
     Computes the points of a Lorenz curve for a waiting/response time metric (NOT for the occupancy of queues);
-    the points are computed for all the statistics in statistic_list, divided by cashier value.
+    the points are computed for all the statistics in statistic_list, divided by cashier value, on a fixed grid of
+    number_points population shares, so the size of the result does not depend on the number of observations.
     Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
-    with the format (cashier_label, x_vector, y_vector).
+    with the format (cashier_label, x_vector, y_vector, error_vector).
     In particular:
-    1) x_vector contains the steps j/n (n=number of observations) to plot on the x axis; 
-    2) y_yector contains the ordinates of the Lorenz curve. The values are obtained starting from a list of 
-       all the observations gathered in the different repetitions of the given scenario.
+    1) x_vector contains the population shares (evenly spaced from 0 to 1) to plot on the x axis;
+    2) y_yector contains the ordinates of the Lorenz curve, computed on the sorted observations gathered in the
+       different repetitions of the given scenario;
+    3) error_vector contains the half-widths of the replication-based confidence intervals of the ordinates if
+       confidence_level is not None, otherwise it is None.
     '''
-    def get_Lorenz_Curve_data(self, statistic_list, cashier_list):
+    @profiled("get_Lorenz_Curve_data")
+    @memoized_query
+    def get_Lorenz_Curve_data(self, statistic_list, cashier_list, number_points=101, confidence_level=None):
+        population_grid = np.linspace(0, 1, number_points)
         Lorenz_data = dict()
 
         for statistic_name in statistic_list:
@@ -343,38 +774,87 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True)
-                Lorenz_x_vector, Lorenz_y_vector = self.__compute_Lorenz_points(obs_vector)
+                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
+                if confidence_level is None:
+                    # The curves of the single repetitions are needed only for the confidence intervals
+                    Lorenz_y_vector, error_vector = compute_Lorenz_points(obs_vector, population_grid), None
+                else:
+                    Lorenz_curve = self.__build_Lorenz_curve(repetition_by_cashier, population_grid, cache_key=(statistic_name, cashier_value))
+                    Lorenz_y_vector, error_vector = Lorenz_curve.get_curve(obs_vector, confidence_level)
 
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
-                statistic_data.append((cashier_label, Lorenz_x_vector, Lorenz_y_vector))
+                statistic_data.append((cashier_label, population_grid, Lorenz_y_vector, error_vector))
 
             Lorenz_data[statistic_name] = statistic_data
 
         return Lorenz_data
 
     '''
-    Gathers all the observations of a statistic, so that they can be used to plot an histogram.
+    Computes the inequality indices of a waiting/response time metric (Gini coefficient, Theil index, Hoover index and
+    share of the largest 10% of the observations, see LorenzCurve) for all the statistics in statistic_list, divided
+    by cashier value. The indices are computed on the pooled observations, their confidence intervals from the
+    indices of the single repetitions.
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
+    with the format (cashier_label, index_dict), where index_dict is {index_name: (estimate, error)} and the error
+    is such that the confidence interval is [estimate-error, estimate+error].
+    '''
+    @profiled("get_inequality_indices")
+    @memoized_query
+    def get_inequality_indices(self, statistic_list, cashier_list, confidence_level, number_points=101):
+        population_grid = np.linspace(0, 1, number_points)
+        index_data = dict()
+
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+            statistic_data = []
+
+            for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
+                Lorenz_curve = self.__build_Lorenz_curve(repetition_by_cashier, population_grid, cache_key=(statistic_name, cashier_value))
+
+                cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
+                statistic_data.append((cashier_label, Lorenz_curve.get_indices(obs_vector, confidence_level)))
+
+            index_data[statistic_name] = statistic_data
+
+        return index_data
+
+    '''
+    Computes the histogram of all the observations (across repetitions) of the statistics in statistic_list, divided by
+    cashier value. number_bins is either the number of bins, which divide the range from 0 to the largest observation
+    in equal parts, or the sequence of the bin edges. If shared_bin_edges is True, the bins of a statistic are the same
+    for all the cashier values (the range goes up to the largest observation among them), so the histograms can be compared.
+    The counts are computed on the sorted observations of each group, so only the bins are returned.
     Returns a dictionary where each key is the name of a statistic from the given statistic_list
-    and each value is a list of tuples with the format (cashier_label, x_vector, number_of_bins).
-    In particular:
-    1) x_vector contains all the observations (across repetitions) gathered with the associated cashier value; 
-    2) number_of_bins is the number of buckets to be used in the histogram plot; it is the same passed as argument.
+    and each value is a list of tuples with the format (cashier_label, bin_edges, counts), where bin_edges has
+    one element more than counts.
     '''
-    def get_histogram_data(self, statistic_list, cashier_list, number_bins):
+    @profiled("get_histogram_data")
+    @memoized_query
+    def get_histogram_data(self, statistic_list, cashier_list, number_bins, shared_bin_edges=True):
         histogram_data = dict()
 
         for statistic_name in statistic_list:
             repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
-            statistic_data = []
+            obs_vector_list = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+                obs_vector_list.append(self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value)))
+
+            statistic_data = []
+            shared_edges = get_shared_bin_edges(obs_vector_list, number_bins) if shared_bin_edges else None
+            for cashier_value, obs_vector in zip(cashier_list, obs_vector_list):
+                bin_edges = shared_edges if shared_bin_edges else get_shared_bin_edges([obs_vector], number_bins)
+                counts = compute_histogram(obs_vector, bin_edges, is_sorted=True)
 
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
-                statistic_data.append((cashier_label, obs_vector, number_bins))
+                statistic_data.append((cashier_label, bin_edges, counts))
 
             histogram_data[statistic_name] = statistic_data
 
@@ -386,8 +866,13 @@ class StatisticDataFrame:
     Returns a dictionary where each key is the name of a statistic and each value is a list of tuples 
     with the format (cashier_label, sample_mean, error).
     In particular, the error is such that the confidence interval is [sample_mean-error, sample_mean+error].
+    If autocorrelation_correction is True, the error is multiplied by the square root of the integrated
+    autocorrelation time (computed up to max_lag), i.e. it is based on the effective sample size instead of
+    the number of observations, which are not independent.
     '''
-    def get_sample_mean(self, statistic_list, cashier_list, confidence_level):
+    @profiled("get_sample_mean")
+    @memoized_query
+    def get_sample_mean(self, statistic_list, cashier_list, confidence_level, autocorrelation_correction=False, max_lag=1000):
         sample_mean_dict = dict()
 
         for statistic_name in statistic_list:
@@ -395,10 +880,14 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+                observation_moments = self.__get_observation_moments(repetition_by_cashier, cache_key=(statistic_name, cashier_value))
 
-                sample_mean, error = self.__compute_sample_mean(obs_vector, confidence_level)
+                sample_mean, error = self.__compute_sample_mean(observation_moments, confidence_level)
+                if autocorrelation_correction:
+                    repetition_veclist = self.__get_repetition_matrix(repetition_by_cashier, sort_values=False).get_row_list()
+                    error = error*math.sqrt(AutocorrelationDiagnostics(repetition_veclist, max_lag).get_integrated_autocorrelation_time())
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
                 statistic_data.append((cashier_label, sample_mean, error))
 
@@ -406,11 +895,108 @@ class StatisticDataFrame:
 
         return sample_mean_dict
 
+    '''
+    Computes the sample mean and the relative confidence interval for all the statistics in statistic_list,
+    divided by cashier value, using the observed service and interarrival times as control variates.
+    The service mean of each scenario is given by the cashier value, while the interarrival means of the VIP and normal
+    customers must be specified as in the Omnet++ configuration (e.g. "5.5min").
+    For each repetition, the mean of the statistic is regressed on the sample mean of the service times and of the
+    VIP/normal interarrival times; all the scenarios are solved with a single batched least-squares solve.
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
+    with the format (cashier_label, adjusted_mean, error, variance_reduction), where:
+    1) the error is such that the confidence interval is [adjusted_mean-error, adjusted_mean+error];
+    2) variance_reduction is the ratio between the variance of the plain mean of the repetitions
+       and the variance of the control-variate estimator.
+    '''
+    @profiled("get_sample_mean_control_variate")
+    @memoized_query
+    def get_sample_mean_control_variate(self, statistic_list, cashier_list, confidence_level, vip_interarrival_time, normal_interarrival_time):
+        vip_interarrival_mean = self.__convert_to_seconds(vip_interarrival_time)
+        normal_interarrival_mean = self.__convert_to_seconds(normal_interarrival_time)
+        control_variates_by_cashier = {cashier_value: self.__compute_control_variates(cashier_value) for cashier_value in cashier_list}
+
+        scenario_list, control_list, response_list = [], [], []
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+
+            for cashier_value in cashier_list:
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                control_variates = control_variates_by_cashier[cashier_value]
+                known_mean_vector = np.array([self.__convert_to_seconds(cashier_value), vip_interarrival_mean, normal_interarrival_mean])
+
+                repetition_controls, repetition_responses = [], []
+                for i, row in repetition_by_cashier.iterrows():
+                    if row["repetition"] in control_variates:
+                        repetition_controls.append(control_variates[row["repetition"]] - known_mean_vector)
+                        repetition_responses.append(np.mean(np.array(row["vecvalue"].split(), dtype=np.float64)))
+
+                scenario_list.append((statistic_name, cashier_value))
+                control_list.append(repetition_controls)
+                response_list.append(repetition_responses)
+
+        repetition_number_vector = np.array([len(responses) for responses in response_list])
+        if np.any(repetition_number_vector < 5):
+            exit("ERROR: the control-variate estimator needs at least 5 repetitions for each scenario")
+
+        centered_control_tensor = np.zeros(shape=(len(scenario_list), np.max(repetition_number_vector), 3), dtype=np.float64)
+        response_matrix = np.zeros(shape=(len(scenario_list), np.max(repetition_number_vector)), dtype=np.float64)
+        for scenario_index, repetition_number in enumerate(repetition_number_vector):
+            centered_control_tensor[scenario_index, :repetition_number] = control_list[scenario_index]
+            response_matrix[scenario_index, :repetition_number] = response_list[scenario_index]
+
+        adjusted_mean_vector, adjusted_std_error_vector, naive_std_error_vector, degrees_of_freedom = \
+            self.__solve_control_variate_regression(centered_control_tensor, response_matrix, repetition_number_vector)
+
+        alpha = 1 - confidence_level
+        with profiler.stage("scipy_ppf"):
+            student_quantile_vector = scipy.stats.t.ppf(1 - alpha/2, df=degrees_of_freedom)
+        error_vector = adjusted_std_error_vector*student_quantile_vector
+        variance_reduction_vector = (naive_std_error_vector/adjusted_std_error_vector)**2
+
+        control_variate_dict = dict()
+        for scenario_index, (statistic_name, cashier_value) in enumerate(scenario_list):
+            cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
+            control_variate_dict.setdefault(statistic_name, []).append((cashier_label, adjusted_mean_vector[scenario_index],
+                                                                        error_vector[scenario_index], variance_reduction_vector[scenario_index]))
+
+        return control_variate_dict
+
+    '''
+    Computes the autocorrelation diagnostics for all the statistics in statistic_list, divided by cashier value.
+    The autocorrelation is computed within each repetition up to max_lag and pooled across the repetitions.
+    Returns a dictionary where each key is the name of a statistic and each value is a list of tuples
+    with the format (cashier_label, integrated_autocorrelation_time, effective_sample_size, autocorrelation_vector).
+    '''
+    @profiled("get_autocorrelation_diagnostics")
+    @memoized_query
+    def get_autocorrelation_diagnostics(self, statistic_list, cashier_list, max_lag=1000):
+        autocorrelation_dict = dict()
+
+        for statistic_name in statistic_list:
+            repetition_dataframe = self.__get_single_statistic_dataframe(statistic_name)
+            statistic_data = []
+
+            for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
+                repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
+                repetition_veclist = self.__get_repetition_matrix(repetition_by_cashier, sort_values=False).get_row_list()
+                diagnostics = AutocorrelationDiagnostics(repetition_veclist, max_lag)
+
+                cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
+                statistic_data.append((cashier_label, diagnostics.get_integrated_autocorrelation_time(),
+                                       diagnostics.get_effective_sample_size(), diagnostics.get_autocorrelation()))
+
+            autocorrelation_dict[statistic_name] = statistic_data
+
+        return autocorrelation_dict
+
     '''
     Computes the sample median for all the statistics in statistic_list, divided by cashier value.
     Returns a dictionary where each key is the name of a statistic and each value is a list of tuples 
     with the format (cashier_label, sample_median, lower_error, upper_error).
     '''
+    @profiled("get_sample_median")
+    @memoized_query
     def get_sample_median(self, statistic_list, cashier_list, confidence_level):
         median_dict = dict()
 
@@ -419,8 +1005,9 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
 
                 median, lower_error, upper_error = self.__compute_sample_median(obs_vector, confidence_level)
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
@@ -435,6 +1022,8 @@ class StatisticDataFrame:
     Returns a dictionary where each key is the name of a statistic and each value is a list of tuples 
     with the format (cashier_label, sample CoV).
     '''
+    @profiled("get_sample_coefficient_of_variation")
+    @memoized_query
     def get_sample_coefficient_of_variation(self, statistic_list, cashier_list):
         CoV_dict = dict()
 
@@ -443,8 +1032,9 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
 
                 CoV = self.__compute_sample_coefficient_of_variation(obs_vector)
                 cashier_label = r'$T_{CASHIER} = ' + cashier_value + '$'
@@ -462,6 +1052,8 @@ class StatisticDataFrame:
     2) cashier_label is a list of strings specifying as first element the cashier level and as second
         the equation of the regression line with the coefficient of determination R^2.
     '''
+    @profiled("get_qq_plot_data")
+    @memoized_query
     def get_qq_plot_data(self, statistic_list, cashier_list, theoretical_distribution="normal", weibull_shape=None):
         qq_dict = dict()
 
@@ -470,8 +1062,9 @@ class StatisticDataFrame:
             statistic_data = []
 
             for cashier_value in cashier_list:
+                profiler.set_cell(statistic_name, cashier_value)
                 repetition_by_cashier = repetition_dataframe[repetition_dataframe["cashiervalue"] == cashier_value]
-                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=False)
+                obs_vector = self.__get_all_vecvalues_obervations(repetition_by_cashier, sort_values=True, cache_key=(statistic_name, cashier_value))
 
                 theor_quant, ordered_stats, regr_x, regr_y, regr_equation = self.__compute_qq_plot_points(obs_vector, theoretical_distribution, weibull_shape)
 
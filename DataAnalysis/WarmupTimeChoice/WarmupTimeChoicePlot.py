@@ -1,3 +1,4 @@
+from sharedtools.ResultReader import get_file_compression
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -84,7 +85,7 @@ it must be obtained from a scenario with static parameters, i.e. without iterati
 (it must be pre-filtered when exporting from Omnet++).
 '''
 def main():
-    csv_data = pd.read_csv("./Throughput.csv", low_memory=False)
+    csv_data = pd.read_csv("./Throughput.csv", compression=get_file_compression("./Throughput.csv"), low_memory=False)
     throughput_dataframe = build_dataframe(csv_data)
     vecvalue_list, vectime_list = convert_vecvalues(throughput_dataframe)
 
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+'''
+Given a list of observation vectors (one for each repetition of the same scenario), computes the autocorrelation
+function up to max_lag, the integrated autocorrelation time and the effective sample size.
+The repetitions are processed in batches of batch_size vectors, to bound the memory used by the FFTs.
+'''
+class AutocorrelationDiagnostics:
+    def __init__(self, vector_list, max_lag, batch_size=8):
+        self.number_observations = sum(len(vector) for vector in vector_list)
+        self.max_lag = min(max_lag, max(len(vector) for vector in vector_list) - 1)
+        self.autocorrelation_vector = self.__compute_autocorrelation(vector_list, batch_size)
+        self.integrated_autocorrelation_time, self.window = self.__compute_integrated_autocorrelation_time()
+
+    '''
+    Computes the autocovariance of each repetition in O(n log n) with the Wiener-Khinchin theorem: each centered
+    vector is zero-padded to at least twice its length (to avoid circular wrap-around) and the inverse FFT of its
+    power spectrum gives the sums x_t*x_(t+k) for every lag k. A batch of repetitions is transformed with a single
+    2-D FFT. The autocovariances are pooled across repetitions (each repetition keeps its own mean), so that the
+    returned autocorrelation vector, for lags 0..max_lag, is sum_i R_i(k) / sum_i R_i(0).
+    '''
+    def __compute_autocorrelation(self, vector_list, batch_size):
+        import scipy.fft  # Imported by the first diagnostics, not at the startup of the tools
+
+        pooled_autocovariance = np.zeros(self.max_lag + 1, dtype=np.float64)
+
+        for batch_start in range(0, len(vector_list), batch_size):
+            batch = vector_list[batch_start:batch_start + batch_size]
+            fft_length = scipy.fft.next_fast_len(2*max(len(vector) for vector in batch))
+
+            batch_matrix = np.zeros(shape=(len(batch), fft_length), dtype=np.float64)
+            for row, vector in enumerate(batch):
+                vector = np.asarray(vector, dtype=np.float64)
+                batch_matrix[row, :len(vector)] = vector - np.mean(vector)
+
+            spectrum = scipy.fft.rfft(batch_matrix, axis=1)
+            autocovariance_matrix = scipy.fft.irfft(spectrum.real**2 + spectrum.imag**2, n=fft_length, axis=1)
+            pooled_autocovariance += np.sum(autocovariance_matrix[:, :self.max_lag + 1], axis=0)
+
+        if pooled_autocovariance[0] == 0:
+            return np.concatenate(([1.0], np.zeros(self.max_lag)))
+
+        return pooled_autocovariance/pooled_autocovariance[0]
+
+    '''
+    Computes the integrated autocorrelation time tau = 1 + 2*sum_(k=1..M) rho(k) with the automatic windowing of Sokal:
+    M is the smallest lag such that M >= 5*tau(M). If the condition is never satisfied up to max_lag, the window is
+    max_lag and a warning is printed, since tau is probably underestimated.
+    Returns a tuple (tau, M).
+    '''
+    def __compute_integrated_autocorrelation_time(self):
+        cumulative_tau = 1 + 2*np.cumsum(self.autocorrelation_vector[1:])
+        if len(cumulative_tau) == 0:
+            return 1.0, 0
+
+        window_satisfied = np.arange(1, len(cumulative_tau) + 1) >= 5*cumulative_tau
+        if not np.any(window_satisfied):
+            print("WARNING: the autocorrelation window is larger than max_lag, the integrated autocorrelation time may be underestimated")
+            return max(float(cumulative_tau[-1]), 1.0), self.max_lag
+
+        window = int(np.argmax(window_satisfied))
+        return max(float(cumulative_tau[window]), 1.0), window + 1
+
+    '''
+    Returns the autocorrelation function for the lags 0..max_lag.
+    '''
+    def get_autocorrelation(self):
+        return self.autocorrelation_vector
+
+    '''
+    Returns the integrated autocorrelation time, i.e. the factor by which the variance of the sample mean
+    is inflated with respect to the case of independent observations.
+    '''
+    def get_integrated_autocorrelation_time(self):
+        return self.integrated_autocorrelation_time
+
+    '''
+    Returns the number of independent observations that would give the same variance of the sample mean.
+    '''
+    def get_effective_sample_size(self):
+        return self.number_observations/self.integrated_autocorrelation_time
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+'''
+Returns the bin edges shared by the histograms of all the observation vectors in obs_vector_list.
+bins is either the number of bins, which divide the range from 0 to the largest observation in equal parts (as the
+range (0, max) used by the plots), or the sequence of the bin edges, which is returned as it is.
+'''
+def get_shared_bin_edges(obs_vector_list, bins):
+    if np.ndim(bins) > 0:
+        return np.asarray(bins, dtype=np.float64)
+
+    upper_bound = max((np.max(obs_vector) for obs_vector in obs_vector_list if len(obs_vector) > 0), default=0)
+    return np.linspace(0, upper_bound if upper_bound > 0 else 1, int(bins) + 1)
+
+
+'''
+Returns True if the bin edges are consecutive integers, i.e. each bin contains a single integer value.
+'''
+def has_unit_integer_bins(bin_edges):
+    return len(bin_edges) > 1 and bin_edges[0] == np.rint(bin_edges[0]) and np.all(np.diff(bin_edges) == 1)
+
+
+'''
+Computes the counts of the observations in the bins defined by bin_edges, with the same convention of numpy and
+matplotlib: every bin is half-open [left, right), except the last one which also includes its right edge; the
+observations outside the edges are not counted.
+If weight_vector is given, each observation is counted with its weight (e.g. the time spent in a state).
+If integer_values is True (e.g. the occupancy of a queue) and the bins are unit integer intervals, the observations
+are counted with np.bincount, which is much faster than np.histogram with weights; sorted observations (is_sorted)
+are counted with a binary search of the edges, the others with np.histogram.
+'''
+def compute_histogram(obs_vector, bin_edges, weight_vector=None, integer_values=False, is_sorted=False):
+    obs_vector = np.asarray(obs_vector, dtype=np.float64)
+    bin_edges = np.asarray(bin_edges, dtype=np.float64)
+    number_bins = len(bin_edges) - 1
+
+    if integer_values and has_unit_integer_bins(bin_edges):
+        offset_vector = obs_vector.astype(np.int64) - int(bin_edges[0])
+        if len(offset_vector) > 0 and (offset_vector.min() < 0 or offset_vector.max() > number_bins):
+            in_range = (offset_vector >= 0) & (offset_vector <= number_bins)
+            offset_vector = offset_vector[in_range]
+            if weight_vector is not None:
+                weight_vector = np.asarray(weight_vector, dtype=np.float64)[in_range]
+
+        counts = np.bincount(offset_vector, weights=weight_vector, minlength=number_bins + 1)
+        # The right edge of the last bin is included in it
+        counts[number_bins - 1] += counts[number_bins]
+        return counts[:number_bins]
+
+    if is_sorted and weight_vector is None:
+        edge_index = np.searchsorted(obs_vector, bin_edges, side="left")
+        edge_index[-1] = np.searchsorted(obs_vector, bin_edges[-1], side="right")
+        return np.diff(edge_index)
+
+    return np.histogram(obs_vector, bins=bin_edges, weights=weight_vector)[0]
@@ -0,0 +1,172 @@
+import numpy as np
+import gzip
+import bz2
+import lzma
+import shlex
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MAGIC_NUMBER_DICT = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz", b"\x28\xb5\x2f\xfd": "zstd"}
+COMPRESSED_EXTENSION_LIST = [".gz", ".bz2", ".xz", ".zst"]
+RUN_ATTRIBUTE_LIST = ["attr", "itervar", "config", "param"]
+BLOCK_LINES = 200000
+
+
+'''
+Returns the compression format of a binary stream ("gzip", "bz2", "xz", "zstd" or None if not compressed), detected
+from its magic number; the stream is rewound to the beginning.
+'''
+def get_compression(raw_stream):
+    header = raw_stream.read(6)
+    raw_stream.seek(0)
+
+    for magic_number, compression in MAGIC_NUMBER_DICT.items():
+        if header.startswith(magic_number):
+            return compression
+
+    return None
+
+
+'''
+Returns the compression format of a file, as get_compression; the value can be passed as it is to the compression
+argument of pandas.read_csv, so that a compressed export is decompressed as a stream whatever its extension.
+'''
+def get_file_compression(file_name):
+    with open(file_name, "rb") as raw_file:
+        return get_compression(raw_file)
+
+
+'''
+Wraps a seekable binary stream into a stream that decompresses it on the fly, so that a compressed result file can
+be parsed without being decompressed on disk or in memory first. Uncompressed streams are returned as they are.
+'''
+def open_decompressed_stream(raw_stream):
+    compression = get_compression(raw_stream)
+
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw_stream, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(raw_stream, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(raw_stream, mode="rb")
+    if compression == "zstd":
+        if zstandard is None:
+            exit("ERROR: the package zstandard is needed to read zstd compressed files")
+        return zstandard.ZstdDecompressor().stream_reader(raw_stream)
+
+    return raw_stream
+
+
+'''
+Returns the extension of a result file (e.g. ".csv", ".vec"), ignoring the one of the compression format.
+'''
+def get_result_extension(file_name):
+    base_name, extension = os.path.splitext(file_name.lower())
+    if extension in COMPRESSED_EXTENSION_LIST:
+        extension = os.path.splitext(base_name)[1]
+
+    return extension
+
+
+'''
+Removes the quotes around a value of a native Omnet++ result file (e.g. "1min" -> 1min).
+'''
+def unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+
+    return value
+
+
+'''
+Streams the items of a native Omnet++ result file, either a vector file (.vec) or a scalar file (.sca), read from a
+binary stream. Yields tuples with one of the formats:
+1) ("attribute", run, attribute_name, attribute_value), for the run attributes, iteration variables and configuration;
+2) ("scalar", run, name, value);
+3) ("vector", run, name, time_tokens, value_tokens, vector_id), for a chunk of a vector: the times and the values are
+   arrays of the tokens exactly as they appear in the file (strings), so they can be converted or joined as they are.
+The data lines are collected in blocks of block_lines lines: the chunks of a vector are yielded in chronological
+order, but they can be interleaved with the ones of other vectors (which are told apart by their vector_id).
+'''
+def stream_native_items(native_stream, block_lines=BLOCK_LINES):
+    vector_info = dict()  # vector id -> (run, name, value column, time column)
+    block_dict = dict()  # vector id -> data lines of the current block
+    block_size = 0
+    run = None
+    run_header = False  # True until the first result item of the run, afterwards the attributes refer to the items
+
+    def flush_block():
+        for vector_id in [vector_id for vector_id in vector_info if vector_id in block_dict]:
+            data_lines = block_dict[vector_id]
+            vector_run, name, value_column, time_column = vector_info[vector_id]
+            token_matrix = np.array(" ".join(data_lines).split()).reshape(len(data_lines), -1)
+            yield "vector", vector_run, name, token_matrix[:, time_column], token_matrix[:, value_column], vector_id
+        block_dict.clear()
+
+    for line in io.TextIOWrapper(native_stream, encoding="utf-8"):
+        line = line.rstrip("\r\n")
+        if not line or line[0] == "#":
+            continue
+
+        if line[0].isdigit():
+            vector_id = line.split(maxsplit=1)[0]
+            block_dict.setdefault(vector_id, []).append(line)
+            block_size += 1
+            if block_size == block_lines:
+                yield from flush_block()
+                block_size = 0
+            continue
+
+        fields = line.split(maxsplit=2)
+        if fields[0] == "run":
+            run = fields[1]
+            run_header = True
+        elif fields[0] in RUN_ATTRIBUTE_LIST:
+            if run_header and len(fields) == 3:
+                yield "attribute", run, fields[1], unquote(fields[2])
+        elif fields[0] == "scalar":
+            run_header = False
+            # scalar <module> <name> <value>, where the module and the name are quoted if they contain spaces
+            module, name, value = shlex.split(line, posix=False)[1:4]
+            yield "scalar", run, unquote(name), float(value)
+        elif fields[0] == "vector":
+            run_header = False
+            # vector <id> <module> <name> [<columns>], columns default to "TV" (e.g. "ETV": event number, time, value)
+            declaration = shlex.split(line, posix=False)
+            columns = declaration[4] if len(declaration) > 4 else "TV"
+            vector_info[declaration[1]] = (run, unquote(declaration[3]), columns.index("V") + 1, columns.index("T") + 1)
+        elif fields[0] != "version":
+            run_header = False  # statistic, field, bin, par: result items with their own attributes
+
+    yield from flush_block()
+
+
+'''
+Streams the items of a native Omnet++ result file as stream_native_items, but yields each vector once, after all the
+other items, as ("vector", run, name, vectime, vecvalue): the times and the values are joined in two strings exactly
+as they appear in the file, as in the "vectime" and "vecvalue" columns of the CSV export.
+The data lines are still converted in blocks of block_lines lines, so only the joined strings are kept in memory.
+'''
+def stream_joined_native_items(native_stream, block_lines=BLOCK_LINES):
+    vector_dict = dict()  # (run, vector id) -> (name, chunks of the times, chunks of the values)
+    run_order = dict()
+
+    for item in stream_native_items(native_stream, block_lines):
+        if item[0] == "vector":
+            name, time_chunk_list, value_chunk_list = vector_dict.setdefault((item[1], item[5]), (item[2], [], []))
+            time_chunk_list.append(" ".join(item[3]))
+            value_chunk_list.append(" ".join(item[4]))
+            run_order.setdefault(item[1], len(run_order))
+        else:
+            yield item
+
+    # In order of declaration (the vector ids are increasing), whatever the block in which each vector starts
+    for run, vector_id in sorted(vector_dict, key=lambda vector_key: (run_order[vector_key[0]], int(vector_key[1]))):
+        name, time_chunk_list, value_chunk_list = vector_dict[(run, vector_id)]
+        yield "vector", run, name, " ".join(time_chunk_list), " ".join(value_chunk_list)